@@ -1,13 +1,17 @@
 import asyncio
 from dotenv import load_dotenv
-from flask import abort, Flask, request
+from flask import abort, Flask, request, Response
 from flask_cors import CORS
 from flask_restx import Api, Resource, fields
 
 
+import json
 import os
+import queue
 import sys
+import threading
 import time
+from typing import Any, Awaitable, Callable, Dict, Iterator, Sequence
 
 project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 sys.path.append(project_root)
@@ -17,8 +21,13 @@ from lib.data_processing.utils import (
     RecommendationFilterException,
     UserProfileException,
 )
+from lib.data_processing.watchlist_picks import get_user_watchlist_picks
 from lib.model.recommender import merge_recommendations, recommend_n_movies
 
+# The lib modules import data_processing without the lib. prefix, so the callback
+# must come from that same module for their progress reports to reach it
+from data_processing.progress import progress_callback
+
 load_dotenv()
 
 app = Flask(__name__)
@@ -95,6 +104,15 @@ watchlist_data = api.model(
         "overlap": fields.Boolean(required=True, description="Overlap requirement"),
         "pickType": fields.String(required=True, description="Pick type"),
         "numPicks": fields.Integer(required=True, description="Number of picks"),
+        "minOverlap": fields.Integer(
+            required=False,
+            description="Minimum number of watchlists a pick must be on",
+        ),
+        "modelType": fields.String(
+            required=False,
+            description="Model type for recommendation picks",
+            enum=["personalized", "general"],
+        ),
     },
 )
 
@@ -129,6 +147,134 @@ health_response = api.model(
 )
 
 
+# Status a streamed request's error event reports, by exception name since the
+# lib modules can be loaded under both the lib. and the bare package path
+STREAM_ERROR_STATUS = {
+    "RecommendationFilterException": 406,
+    "WatchlistOverlapException": 406,
+    "WatchlistMoviesMissingException": 406,
+    "UserProfileException": 500,
+    "WatchlistEmptyException": 500,
+    "ValueError": 400,
+}
+
+# Seconds between heartbeats while a streamed request makes no progress
+STREAM_HEARTBEAT_INTERVAL = float(os.getenv("STREAM_HEARTBEAT_INTERVAL", "10"))
+
+
+# Gets movie recommendations for one or more users
+async def get_movie_recommendations(query: Dict[str, Any]) -> Sequence[Dict[str, Any]]:
+
+    usernames = query.get("usernames")
+    filters = {
+        "model_type": query.get("model_type"),
+        "genres": query.get("genres"),
+        "content_types": query.get("content_types"),
+        "min_release_year": query.get("min_release_year"),
+        "max_release_year": query.get("max_release_year"),
+        "min_runtime": query.get("min_runtime"),
+        "max_runtime": query.get("max_runtime"),
+        "popularity": query.get("popularity"),
+    }
+
+    if len(usernames) == 1:
+        recommendations = await recommend_n_movies(
+            num_recs=25, user=usernames[0], **filters
+        )
+
+        return recommendations["recommendations"].to_dict(orient="records")
+
+    tasks = [
+        recommend_n_movies(num_recs=500, user=username, **filters)
+        for username in usernames
+    ]
+    all_recommendations = await asyncio.gather(*tasks)
+
+    # Merges recommendations
+    merged_recommendations = merge_recommendations(
+        num_recs=25, all_recommendations=all_recommendations
+    )
+
+    return merged_recommendations.to_dict(orient="records")
+
+
+# Updates user logs in database
+def log_users(usernames: Sequence[str]) -> None:
+
+    try:
+        database.update_many_user_logs(usernames)
+        print(f'Successfully logged {", ".join(map(str, usernames))} in database')
+    except:
+        print(f'Failed to log {", ".join(map(str, usernames))} in database')
+
+
+# Encodes a stream event as an NDJSON line or a server-sent event
+def encode_event(event: Dict[str, Any], sse: bool) -> str:
+
+    # Numpy scalars in result records become plain JSON numbers
+    payload = json.dumps(
+        event,
+        default=lambda value: value.item() if hasattr(value, "item") else str(value),
+    )
+    if sse:
+        return f"event: {event['event']}\ndata: {payload}\n\n"
+
+    return f"{payload}\n"
+
+
+# Runs a request in a worker thread and streams its progress, then its result or error
+def stream_events(job: str, run: Callable[[], Awaitable[Any]]) -> Response:
+
+    accept = request.headers.get("Accept", "")
+    sse = request.args.get("format") == "sse" or "text/event-stream" in accept
+    events = queue.Queue()
+
+    def worker() -> None:
+        try:
+            with progress_callback(events.put):
+                result = asyncio.run(run())
+            events.put({"event": "result", "data": result})
+        except Exception as e:
+            print(f"Failed to stream {job}: {e}")
+            # Unexpected errors get a generic message, as the blocking endpoints do
+            known = type(e).__name__ in STREAM_ERROR_STATUS
+            events.put(
+                {
+                    "event": "error",
+                    "status": STREAM_ERROR_STATUS.get(type(e).__name__, 500),
+                    "message": str(e) if known else f"Error getting {job}",
+                }
+            )
+        finally:
+            events.put(None)
+
+    threading.Thread(target=worker, name=f"stream-{job}", daemon=True).start()
+
+    # Heartbeats keep idle-timeout proxies from closing slow streams
+    def generate() -> Iterator[str]:
+        yield encode_event({"event": "started", "job": job, "time": time.time()}, sse)
+        while True:
+            try:
+                event = events.get(timeout=STREAM_HEARTBEAT_INTERVAL)
+            except queue.Empty:
+                yield (
+                    ": heartbeat\n\n"
+                    if sse
+                    else encode_event({"event": "heartbeat", "time": time.time()}, sse)
+                )
+                continue
+
+            if event is None:
+                break
+            yield encode_event(event, sse)
+
+    return Response(
+        generate(),
+        mimetype="text/event-stream" if sse else "application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 # RECOMMENDATION ENDPOINTS
 @recommendations_ns.route("/get-recommendations")
 class MovieRecommendations(Resource):
@@ -149,61 +295,10 @@ class MovieRecommendations(Resource):
 
         data = request.json.get("currentQuery")
         usernames = data.get("usernames")
-        model_type = data.get("model_type")
-        genres = data.get("genres")
-        content_types = data.get("content_types")
-        min_release_year = data.get("min_release_year")
-        max_release_year = data.get("max_release_year")
-        min_runtime = data.get("min_runtime")
-        max_runtime = data.get("max_runtime")
-        popularity = data.get("popularity")
 
         # Gets movie recommendations
         try:
-            if len(usernames) == 1:
-                recommendations = asyncio.run(
-                    recommend_n_movies(
-                        num_recs=25,
-                        user=usernames[0],
-                        model_type=model_type,
-                        genres=genres,
-                        content_types=content_types,
-                        min_release_year=min_release_year,
-                        max_release_year=max_release_year,
-                        min_runtime=min_runtime,
-                        max_runtime=max_runtime,
-                        popularity=popularity,
-                    )
-                )
-
-                recommendations = recommendations["recommendations"].to_dict(
-                    orient="records"
-                )
-
-            else:
-                tasks = [
-                    recommend_n_movies(
-                        num_recs=500,
-                        user=username,
-                        model_type=model_type,
-                        genres=genres,
-                        content_types=content_types,
-                        min_release_year=min_release_year,
-                        max_release_year=max_release_year,
-                        min_runtime=min_runtime,
-                        max_runtime=max_runtime,
-                        popularity=popularity,
-                    )
-                    for username in usernames
-                ]
-                all_recommendations = asyncio.run(asyncio.gather(*tasks))
-
-                # Merges recommendations
-                merged_recommendations = merge_recommendations(
-                    num_recs=25, all_recommendations=all_recommendations
-                )
-                recommendations = merged_recommendations.to_dict(orient="records")
-
+            recommendations = asyncio.run(get_movie_recommendations(query=data))
         except RecommendationFilterException as e:
             abort(406, str(e))
         except UserProfileException as e:
@@ -211,12 +306,7 @@ class MovieRecommendations(Resource):
         except Exception as e:
             abort(500, "Error getting recommendations")
 
-        # Updates user logs in database
-        try:
-            database.update_many_user_logs(usernames)
-            print(f'Successfully logged {", ".join(map(str, usernames))} in database')
-        except:
-            print(f'Failed to log {", ".join(map(str, usernames))} in database')
+        log_users(usernames=usernames)
 
         finish = time.perf_counter()
         print(
@@ -226,6 +316,73 @@ class MovieRecommendations(Resource):
         return recommendations
 
 
+@recommendations_ns.route("/stream-recommendations")
+class StreamMovieRecommendations(Resource):
+    @api.expect(recommendation_request)
+    @api.doc(
+        description="Stream progress events, then movie recommendations, as NDJSON or server-sent events (Accept: text/event-stream or ?format=sse)",
+        responses={
+            200: "Success - Streams progress events followed by a result or error event",
+        },
+    )
+    def post(self):
+        """Stream movie recommendations for specified users and criteria"""
+
+        data = request.json.get("currentQuery")
+        usernames = data.get("usernames")
+
+        async def run() -> Sequence[Dict[str, Any]]:
+            start = time.perf_counter()
+            recommendations = await get_movie_recommendations(query=data)
+            log_users(usernames=usernames)
+
+            finish = time.perf_counter()
+            print(
+                f'Streamed movie recommendations for {", ".join(map(str, usernames))} in {finish - start} seconds'
+            )
+
+            return recommendations
+
+        return stream_events(job="recommendations", run=run)
+
+
+@recommendations_ns.route("/stream-watchlist-picks")
+class StreamWatchlistPicks(Resource):
+    @api.expect(watchlist_request)
+    @api.doc(
+        description="Stream progress events, then watchlist picks, as NDJSON or server-sent events (Accept: text/event-stream or ?format=sse)",
+        responses={
+            200: "Success - Streams progress events followed by a result or error event",
+        },
+    )
+    def post(self):
+        """Stream picks from the watchlists of specified users"""
+
+        data = request.json.get("data")
+        user_list = data.get("userList")
+
+        async def run() -> Sequence[Dict[str, Any]]:
+            start = time.perf_counter()
+            watchlist_picks = await get_user_watchlist_picks(
+                user_list=user_list,
+                overlap="y" if data.get("overlap") else "n",
+                pick_type=data.get("pickType"),
+                model_type=data.get("modelType", "personalized"),
+                num_picks=data.get("numPicks"),
+                min_overlap=data.get("minOverlap"),
+            )
+            log_users(usernames=user_list)
+
+            finish = time.perf_counter()
+            print(
+                f'Streamed watchlist picks for {", ".join(map(str, user_list))} in {finish - start} seconds'
+            )
+
+            return watchlist_picks
+
+        return stream_events(job="watchlist_picks", run=run)
+
+
 # USER ENDPOINTS
 @users_ns.route("/users")
 class Users(Resource):
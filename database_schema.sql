@@ -110,6 +110,14 @@ CREATE INDEX IF NOT EXISTS idx_movie_urls_movie_id ON movie_urls(movie_id);
 CREATE INDEX IF NOT EXISTS idx_movie_data_movie_id ON movie_data(movie_id);
 CREATE INDEX IF NOT EXISTS idx_application_metrics_date ON application_metrics(date);
 
+-- Scrape queue: movie URLs not deprecated and not yet in movie_data, anti-joined in the database
+ALTER TABLE movie_urls ADD COLUMN IF NOT EXISTS is_deprecated BOOLEAN DEFAULT FALSE;
+CREATE OR REPLACE VIEW pending_movie_urls AS
+SELECT u.movie_id, u.url
+FROM movie_urls u
+WHERE NOT COALESCE(u.is_deprecated, FALSE)
+  AND NOT EXISTS (SELECT 1 FROM movie_data d WHERE d.movie_id = u.movie_id);
+
 -- Add Row Level Security (RLS) policies if needed
 -- ALTER TABLE users ENABLE ROW LEVEL SECURITY;
 -- ALTER TABLE user_statistics ENABLE ROW LEVEL SECURITY;
@@ -8,45 +8,66 @@ project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 sys.path.append(project_root)
 
 import data_processing.database as database
+from data_processing.genre_codec import GENRE_COLUMNS, GENRES
+from data_processing.percentile_index import USER_PERCENTILE_INDEX
 
+# Rating columns summarized per genre
+GENRE_STATISTIC_COLUMNS = ["user_rating", "rating_differential"]
 
-# Gets average genre ratings
-def get_average_genre_ratings(user_df: pd.DataFrame) -> Dict[str, Dict[str, float]]:
 
-    genre_averages = {
-        "action": {},
-        "adventure": {},
-        "animation": {},
-        "comedy": {},
-        "crime": {},
-        "documentary": {},
-        "drama": {},
-        "family": {},
-        "fantasy": {},
-        "history": {},
-        "horror": {},
-        "music": {},
-        "mystery": {},
-        "romance": {},
-        "science_fiction": {},
-        "tv_movie": {},
-        "thriller": {},
-        "war": {},
-        "western": {},
+# Gets per-genre counts, means and standard deviations with one matrix product
+def get_genre_statistics(user_df: pd.DataFrame) -> Dict[str, np.ndarray]:
+
+    # Films x genres indicators and films x columns values; films missing from the
+    # catalog have no genres after the left join, so they count towards none
+    indicators = np.nan_to_num(user_df[GENRE_COLUMNS].to_numpy(dtype=np.float64))
+    values = user_df[GENRE_STATISTIC_COLUMNS].to_numpy(dtype=np.float64)
+    present = ~np.isnan(values)
+
+    # Variance is shift invariant, so centering first keeps the sum of squares accurate
+    shift = np.array(
+        [
+            values[present[:, i], i].mean() if present[:, i].any() else 0.0
+            for i in range(values.shape[1])
+        ]
+    )
+    centered = np.where(present, values - shift, 0.0)
+
+    # One genres x (3 * columns) product gives every count, sum and sum of squares
+    totals = indicators.T @ np.hstack([present, centered, centered**2])
+    counts, sums, squares = np.split(totals, 3, axis=1)
+
+    # Genres with no films get NaN means, and with one film NaN deviations, as pandas does
+    with np.errstate(divide="ignore", invalid="ignore"):
+        centered_means = sums / counts
+        variances = (squares - counts * centered_means**2) / (counts - 1)
+
+    return {
+        "count": indicators.sum(axis=0).astype(np.int64),
+        "mean": centered_means + shift,
+        "std": np.sqrt(np.clip(variances, 0, None)),
     }
 
-    for genre in genre_averages:
-        temp = user_df.loc[user_df[f"is_{genre}"] == 1]
-        genre_averages[genre]["mean_user_rating"] = round(temp["user_rating"].mean(), 3)
-        genre_averages[genre]["mean_rating_differential"] = round(
-            temp["rating_differential"].mean(), 3
-        )
+
+# Gets average genre ratings
+def get_average_genre_ratings(user_df: pd.DataFrame) -> Dict[str, Dict[str, float]]:
+
+    statistics = get_genre_statistics(user_df=user_df)
 
     # Converts NaN values to string N/A
-    for key in genre_averages:
-        for subkey in genre_averages[key]:
-            if pd.isna(genre_averages[key][subkey]):
-                genre_averages[key][subkey] = "N/A"
+    def format_statistic(value: float) -> float | str:
+        return "N/A" if np.isnan(value) else round(float(value), 3)
+
+    genre_averages = {}
+    for position, genre in enumerate(GENRES):
+        genre_averages[genre] = {"count": int(statistics["count"][position])}
+        for column_position, column in enumerate(GENRE_STATISTIC_COLUMNS):
+            genre_averages[genre][f"mean_{column}"] = format_statistic(
+                statistics["mean"][position, column_position]
+            )
+            genre_averages[genre][f"std_{column}"] = format_statistic(
+                statistics["std"][position, column_position]
+            )
 
     return genre_averages
 
@@ -78,28 +99,10 @@ async def get_user_statistics(
     return user_stats
 
 
-# Gets user percentiles
+# Gets user percentiles from the in-memory index, loading it when stale
 def get_user_percentiles(user_stats: Dict[str, Any]) -> Dict[str, float]:
 
-    # Loads all statistics from database
-    statistics = database.get_all_user_statistics()
-    statistics["mean_rating_differential"] = (
-        statistics["mean_user_rating"] - statistics["mean_letterboxd_rating"]
-    )
+    if USER_PERCENTILE_INDEX.is_stale():
+        USER_PERCENTILE_INDEX.load(statistics=database.get_all_user_statistics())
 
-    # Calculates user percentiles
-    percentiles = {}
-    for category in [
-        "user_rating",
-        "letterboxd_rating",
-        "rating_differential",
-        "letterboxd_rating_count",
-    ]:
-        percentiles[f"{category}_percentile"] = round(
-            np.sum(statistics[f"mean_{category}"] < user_stats[category]["mean"])
-            / len(statistics)
-            * 100,
-            1,
-        )
-
-    return percentiles
+    return USER_PERCENTILE_INDEX.get_percentiles(user_stats=user_stats)
@@ -0,0 +1,96 @@
+import json
+import os
+import time
+from typing import Any, Dict, Iterable, Sequence
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+CHECKPOINT_DIR = os.getenv("CHECKPOINT_DIR", os.path.join(project_root, "checkpoints"))
+
+
+# Tracks a bulk job's progress in an append-only log so a crashed run can resume
+class JobCheckpoint:
+
+    def __init__(self, job: str, resume: bool = False):
+        self.path = os.path.join(CHECKPOINT_DIR, f"{job}.jsonl")
+        self.completed = set()
+        self.pending = {}
+
+        # Prefixes this run's batch keys, so they never reuse a pending key from an earlier run
+        self.run_id = f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}"
+
+        if resume:
+            self._load()
+            print(
+                f"Resuming {job}: {len(self.completed)} completed, "
+                f"{len(self.pending)} pending write batches"
+            )
+        elif os.path.exists(self.path):
+            os.remove(self.path)
+
+    # Replays the log, ignoring a line truncated by a crash mid-write
+    def _load(self) -> None:
+
+        if not os.path.exists(self.path):
+            return
+
+        with open(self.path, "r") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+
+                if entry["event"] == "completed":
+                    self.completed.update(entry["keys"])
+                elif entry["event"] == "pending":
+                    self.pending[entry["batch"]] = entry["records"]
+                elif entry["event"] == "flushed":
+                    self.pending.pop(entry["batch"], None)
+
+    # Appends one event, so each checkpoint costs a single small write
+    def _append(self, entry: Dict[str, Any]) -> None:
+
+        os.makedirs(CHECKPOINT_DIR, exist_ok=True)
+        with open(self.path, "a") as f:
+            f.write(json.dumps(entry, default=str) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    # Checks whether a user or film was finished in an earlier run
+    def is_completed(self, key: Any) -> bool:
+
+        return str(key) in self.completed
+
+    # Records users or films whose results are safely persisted
+    def mark_completed(self, keys: Iterable[Any]) -> None:
+
+        keys = [str(key) for key in keys]
+        if keys:
+            self.completed.update(keys)
+            self._append({"event": "completed", "keys": keys})
+
+    # Names a write batch uniquely across runs
+    def get_batch_key(self, name: str, batch_num: int) -> str:
+
+        return f"{self.run_id}-{name}-{batch_num}"
+
+    # Records a write batch before it is sent to the database
+    def add_pending(self, batch: str, records: Sequence[Dict[str, Any]]) -> None:
+
+        self.pending[batch] = records
+        self._append({"event": "pending", "batch": batch, "records": records})
+
+    # Records that a pending write batch reached the database
+    def mark_flushed(self, batch: str) -> None:
+
+        self.pending.pop(batch, None)
+        self._append({"event": "flushed", "batch": batch})
+
+    # Removes the checkpoint once the job has finished
+    def clear(self) -> None:
+
+        self.completed.clear()
+        self.pending.clear()
+        if os.path.exists(self.path):
+            os.remove(self.path)
@@ -0,0 +1,249 @@
+import aiohttp
+import asyncio
+import bisect
+from collections import Counter
+from contextlib import contextmanager
+import json
+import os
+import threading
+import time
+from types import SimpleNamespace
+from typing import Any, Dict, Iterator, Sequence
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+TELEMETRY_DIR = os.getenv("TELEMETRY_DIR", os.path.join(project_root, "telemetry"))
+
+# Seconds between snapshots while a job runs; 0 turns them off
+TELEMETRY_INTERVAL = float(os.getenv("TELEMETRY_INTERVAL", "30"))
+
+# Upper bucket bounds in milliseconds, roughly log spaced
+LATENCY_BUCKETS_MS = [1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000]
+
+# Stages a crawl spends time in, in request order
+STAGES = ["dns", "connect", "ttfb", "download", "parse", "write"]
+
+
+# Fixed-bucket latency histogram, cheap enough to update on every request
+class LatencyHistogram:
+
+    def __init__(self, buckets_ms: Sequence[float] = LATENCY_BUCKETS_MS):
+        self.buckets_ms = list(buckets_ms)
+        self.counts = [0] * (len(self.buckets_ms) + 1)  # last bucket is overflow
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    # Adds one observation
+    def observe(self, seconds: float) -> None:
+
+        ms = seconds * 1000
+        self.counts[bisect.bisect_left(self.buckets_ms, ms)] += 1
+        self.count += 1
+        self.total_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+
+    # Estimates a percentile as the upper bound of the bucket it falls in
+    def percentile(self, q: float) -> float:
+
+        if self.count == 0:
+            return 0.0
+
+        rank = q / 100 * self.count
+        seen = 0
+        for bound, count in zip(self.buckets_ms + [self.max_ms], self.counts):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.max_ms)
+
+        return self.max_ms
+
+    def to_dict(self) -> Dict[str, Any]:
+
+        return {
+            "count": self.count,
+            "mean_ms": round(self.total_ms / self.count, 3) if self.count else 0.0,
+            "p50_ms": round(self.percentile(50), 3),
+            "p95_ms": round(self.percentile(95), 3),
+            "p99_ms": round(self.percentile(99), 3),
+            "max_ms": round(self.max_ms, 3),
+            "buckets_ms": self.buckets_ms + ["inf"],
+            "counts": list(self.counts),
+        }
+
+
+# Collects per-stage latencies, bytes, status codes and retries for a scraping job
+class CrawlTelemetry:
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    # Clears everything recorded, e.g. at the start of a job
+    def reset(self) -> None:
+
+        with self._lock:
+            self.started_at = time.time()
+            self.stages = {stage: LatencyHistogram() for stage in STAGES}
+            self.bytes_received = 0
+            self.status_counts = Counter()
+            self.counters = Counter()
+
+    # Records time spent in a stage (dns, connect, ttfb, download, parse, write)
+    def observe(self, stage: str, seconds: float) -> None:
+
+        with self._lock:
+            if stage not in self.stages:
+                self.stages[stage] = LatencyHistogram()
+            self.stages[stage].observe(seconds)
+
+    # Times a block of code as one stage
+    @contextmanager
+    def measure(self, stage: str) -> Iterator[None]:
+
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage=stage, seconds=time.perf_counter() - start)
+
+    # Records a response received from the network
+    def record_response(self, status: int, num_bytes: int) -> None:
+
+        with self._lock:
+            self.status_counts[str(status)] += 1
+            self.bytes_received += num_bytes
+
+    # Counts an event such as a retry, a network error or a reused connection
+    def increment(self, counter: str, amount: int = 1) -> None:
+
+        with self._lock:
+            self.counters[counter] += amount
+
+    # Summarizes everything recorded so far as JSON-ready data
+    def snapshot(self, job: str) -> Dict[str, Any]:
+
+        with self._lock:
+            elapsed = time.time() - self.started_at
+            requests = sum(self.status_counts.values())
+
+            return {
+                "job": job,
+                "timestamp": time.time(),
+                "elapsed_s": round(elapsed, 3),
+                "requests": requests,
+                "requests_per_s": round(requests / elapsed, 3) if elapsed else 0.0,
+                "bytes_received": self.bytes_received,
+                "status_counts": dict(self.status_counts),
+                "retries": self.counters["retries"],
+                "counters": dict(self.counters),
+                "stages": {
+                    stage: histogram.to_dict()
+                    for stage, histogram in self.stages.items()
+                    if histogram.count
+                },
+            }
+
+    # Prints a snapshot every interval seconds until cancelled
+    async def log_snapshots(self, job: str, interval: float) -> None:
+
+        while True:
+            await asyncio.sleep(interval)
+            print(f"TELEMETRY {json.dumps(self.snapshot(job=job))}")
+
+    # Starts periodic snapshots for a job on the running event loop
+    def start(
+        self, job: str, interval: float = TELEMETRY_INTERVAL
+    ) -> asyncio.Task | None:
+
+        self.reset()
+        if interval <= 0:
+            return None
+
+        return asyncio.create_task(self.log_snapshots(job=job, interval=interval))
+
+    # Stops snapshots, then prints and saves the job's JSON summary
+    def finish(self, job: str, task: asyncio.Task | None = None) -> Dict[str, Any]:
+
+        if task is not None:
+            task.cancel()
+
+        summary = self.snapshot(job=job)
+        try:
+            os.makedirs(TELEMETRY_DIR, exist_ok=True)
+            path = os.path.join(
+                TELEMETRY_DIR, f"{job}-{time.strftime('%Y%m%d-%H%M%S')}.json"
+            )
+            with open(path, "w") as f:
+                json.dump(summary, f, indent=2)
+            print(f"Telemetry for {job} saved to {path}")
+        except OSError as e:
+            print(f"Failed to save telemetry for {job}: {e}")
+
+        stages = ", ".join(
+            f"{stage} p50 {histogram['p50_ms']:g} ms p95 {histogram['p95_ms']:g} ms"
+            for stage, histogram in summary["stages"].items()
+        )
+        print(
+            f"Telemetry for {job}: {summary['requests']} requests, "
+            f"{summary['bytes_received'] / 1024 / 1024:.1f} MiB, "
+            f"statuses {summary['status_counts']}, {summary['retries']} retries"
+            + (f"; {stages}" if stages else "")
+        )
+
+        return summary
+
+    # Builds aiohttp hooks that time DNS, connection setup and time to first byte
+    def trace_config(self) -> aiohttp.TraceConfig:
+
+        trace_config = aiohttp.TraceConfig(trace_config_ctx_factory=SimpleNamespace)
+
+        async def on_request_start(session, context, params):
+            context.request_start = time.perf_counter()
+            context.dns = 0.0
+
+        async def on_dns_resolvehost_start(session, context, params):
+            context.dns_start = time.perf_counter()
+
+        async def on_dns_resolvehost_end(session, context, params):
+            context.dns = time.perf_counter() - context.dns_start
+            self.observe(stage="dns", seconds=context.dns)
+
+        async def on_dns_cache_hit(session, context, params):
+            self.increment(counter="dns_cache_hits")
+
+        async def on_connection_create_start(session, context, params):
+            context.connect_start = time.perf_counter()
+
+        # Connection setup includes DNS, which is recorded on its own
+        async def on_connection_create_end(session, context, params):
+            connect = time.perf_counter() - context.connect_start
+            self.observe(stage="connect", seconds=max(connect - context.dns, 0.0))
+
+        async def on_connection_reuseconn(session, context, params):
+            self.increment(counter="connections_reused")
+
+        # Fires once the response headers have arrived
+        async def on_request_end(session, context, params):
+            self.observe(
+                stage="ttfb", seconds=time.perf_counter() - context.request_start
+            )
+
+        async def on_request_exception(session, context, params):
+            self.increment(counter="network_errors")
+
+        trace_config.on_request_start.append(on_request_start)
+        trace_config.on_dns_resolvehost_start.append(on_dns_resolvehost_start)
+        trace_config.on_dns_resolvehost_end.append(on_dns_resolvehost_end)
+        trace_config.on_dns_cache_hit.append(on_dns_cache_hit)
+        trace_config.on_connection_create_start.append(on_connection_create_start)
+        trace_config.on_connection_create_end.append(on_connection_create_end)
+        trace_config.on_connection_reuseconn.append(on_connection_reuseconn)
+        trace_config.on_request_end.append(on_request_end)
+        trace_config.on_request_exception.append(on_request_exception)
+
+        return trace_config
+
+
+# Shared telemetry for all scraping jobs
+CRAWL_TELEMETRY = CrawlTelemetry()
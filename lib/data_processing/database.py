@@ -1,20 +1,23 @@
 from datetime import datetime, timezone
 from dotenv import load_dotenv
 from functools import lru_cache
+import numpy as np
 import os
 import pandas as pd
 from supabase import create_client, Client
 import sys
 from tqdm import tqdm
-from typing import Any, Dict, Sequence, Tuple
+from typing import Any, Dict, Iterator, Sequence, Tuple
 
 project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 sys.path.append(project_root)
 
+from data_processing.percentile_index import USER_PERCENTILE_INDEX
 
 load_dotenv()
 
 SUPABASE_MAX_ROWS = 100000
+PENDING_MOVIE_URLS_PAGE_SIZE = 999  # Stay under Supabase's 1000 row hard limit
 
 # Initializes supabase
 try:
@@ -25,6 +28,11 @@ except Exception as e:
     print("Failed to connect to Supabase: ", e)
 
 
+# Raised when the database has no pending_movie_urls view yet
+class PendingViewMissing(Exception):
+    pass
+
+
 # Gets table size
 def get_table_size(table_name: str) -> int:
 
@@ -223,6 +231,97 @@ def get_movie_urls(batch_size=SUPABASE_MAX_ROWS) -> pd.DataFrame:
     return df
 
 
+# Streams the scrape queue (URLs not deprecated and not yet in movie_data) in pages
+def iter_pending_movie_urls(
+    page_size: int = PENDING_MOVIE_URLS_PAGE_SIZE, url: str | None = None
+) -> Iterator[pd.DataFrame]:
+
+    try:
+        yield from iter_pending_movie_urls_view(page_size=page_size, url=url)
+    except PendingViewMissing:
+        print("pending_movie_urls view not found, filtering with an id-only projection")
+        yield from iter_pending_movie_urls_by_ids(page_size=page_size, url=url)
+
+
+# Pages through the pending_movie_urls view, which anti-joins in the database
+def iter_pending_movie_urls_view(
+    page_size: int, url: str | None = None
+) -> Iterator[pd.DataFrame]:
+
+    # Keyset paging stays correct while the crawler deletes rows behind it
+    last_movie_id = ""
+    while True:
+        query = (
+            supabase.table("pending_movie_urls")
+            .select("movie_id, url")
+            .gt("movie_id", last_movie_id)
+        )
+        if url is not None:
+            query = query.eq("url", url)
+        try:
+            response = query.order("movie_id").limit(page_size).execute()
+        except Exception as e:
+            if last_movie_id == "" and "pending_movie_urls" in str(e):
+                raise PendingViewMissing() from e
+            print(e)
+            raise e
+
+        if not response.data:
+            return
+        yield pd.DataFrame.from_records(response.data)
+        if len(response.data) < page_size:
+            return
+        last_movie_id = response.data[-1]["movie_id"]
+
+
+# Pages through movie_urls, dropping ids found with an id-only movie_data query
+def iter_pending_movie_urls_by_ids(
+    page_size: int, url: str | None = None
+) -> Iterator[pd.DataFrame]:
+
+    last_movie_id = ""
+    while True:
+        query = (
+            supabase.table("movie_urls")
+            .select("movie_id, url")
+            .or_("is_deprecated.is.null,is_deprecated.eq.false")
+            .gt("movie_id", last_movie_id)
+        )
+        if url is not None:
+            query = query.eq("url", url)
+        try:
+            response = query.order("movie_id").limit(page_size).execute()
+            if not response.data:
+                return
+            page = pd.DataFrame.from_records(response.data)
+
+            # Only this page's ids are looked up, never the whole catalog
+            existing = (
+                supabase.table("movie_data")
+                .select("movie_id")
+                .in_("movie_id", page["movie_id"].tolist())
+                .execute()
+            )
+        except Exception as e:
+            print(e)
+            raise e
+
+        existing_ids = {row["movie_id"] for row in existing.data}
+        yield page[~page["movie_id"].isin(existing_ids)]
+        if len(response.data) < page_size:
+            return
+        last_movie_id = response.data[-1]["movie_id"]
+
+
+# Counts the scrape queue without downloading it
+def count_pending_movie_urls() -> int | None:
+
+    try:
+        return get_table_size(table_name="pending_movie_urls")
+    except Exception:
+        return None
+
+
 # Marks movie urls as deprecated in database
 def mark_movie_urls_deprecated(deprecated_df: pd.DataFrame) -> None:
     # Checks if the DataFrame is empty
@@ -271,9 +370,28 @@ def update_movie_urls(urls_df: pd.DataFrame) -> None:
         raise e
 
 
-# Gets movie data from cache or database
+# Builds integer film id to row position index for movie data
+def build_movie_index(movie_data: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
+
+    # Non-numeric ids (e.g. list slugs) can never match a scraped film id
+    film_ids = pd.to_numeric(movie_data["movie_id"], errors="coerce").to_numpy(
+        dtype="float64"
+    )
+    valid_positions = np.flatnonzero(~np.isnan(film_ids))
+    valid_ids = film_ids[valid_positions].astype("int64")
+
+    order = np.argsort(valid_ids, kind="stable")
+
+    return valid_ids[order], valid_positions[order]
+
+
+# URL index over the cached movie data, paired with the frame it was built from
+_movie_url_index = None
+
+
+# Gets movie data and its film id index from cache or database
 @lru_cache(maxsize=1)
-def get_movie_data_cached() -> Tuple:
+def get_movie_data_cached() -> Tuple[pd.DataFrame, np.ndarray, np.ndarray]:
 
     try:
         # Get table size first
@@ -309,11 +427,16 @@ def get_movie_data_cached() -> Tuple:
         movie_data = pd.DataFrame.from_records(all_movie_data)
 
         # Process data types
-        movie_data["url"] = movie_data["url"].astype("string")
+        movie_data["url"] = movie_data["url"].astype("string").str.strip()
         movie_data["title"] = movie_data["title"].astype("string")
         movie_data["poster"] = movie_data["poster"].astype("string")
 
-        return tuple(movie_data.to_dict("records"))
+        # Normalizes join keys once so user lookups never re-cast the catalog
+        movie_data["movie_id"] = movie_data["movie_id"].astype(str).str.strip()
+
+        film_ids, positions = build_movie_index(movie_data=movie_data)
+
+        return movie_data, film_ids, positions
     except Exception as e:
         print(e)
         raise e
@@ -322,7 +445,35 @@ def get_movie_data_cached() -> Tuple:
 # Gets movie data
 def get_movie_data() -> pd.DataFrame:
 
-    return pd.DataFrame.from_records(get_movie_data_cached())
+    movie_data, _, _ = get_movie_data_cached()
+
+    return movie_data.copy()
+
+
+# Gets film id index aligned with the rows of get_movie_data()
+def get_movie_index() -> Tuple[np.ndarray, np.ndarray]:
+
+    _, film_ids, positions = get_movie_data_cached()
+
+    return film_ids, positions
+
+
+# Gets the cached movie data with a URL to row position index, rebuilt after a reload
+def get_movie_url_index() -> Tuple[pd.DataFrame, pd.Series]:
+
+    global _movie_url_index
+
+    movie_data, _, _ = get_movie_data_cached()
+    if _movie_url_index is None or _movie_url_index[0] is not movie_data:
+        positions = pd.Series(
+            np.arange(len(movie_data)), index=movie_data["url"].astype(str)
+        )
+        _movie_url_index = (
+            movie_data,
+            positions[~positions.index.duplicated(keep="first")],
+        )
+
+    return _movie_url_index
 
 
 # Gets raw movie data from database
@@ -354,6 +505,23 @@ def update_movie_data(movie_data_df: pd.DataFrame) -> None:
         raise e
 
 
+# Updates only the language column of movies, one request per language per chunk
+def update_movie_languages(
+    movie_languages: pd.DataFrame, chunk_size: int = 200
+) -> None:
+
+    try:
+        for language, group in movie_languages.groupby("language"):
+            movie_ids = group["movie_id"].astype(str).tolist()
+            for i in range(0, len(movie_ids), chunk_size):
+                supabase.table("movie_data").update({"language": int(language)}).in_(
+                    "movie_id", movie_ids[i : i + chunk_size]
+                ).execute()
+    except Exception as e:
+        print(e)
+        raise e
+
+
 # Gets all user statistics from database
 def get_all_user_statistics() -> pd.DataFrame:
 
@@ -385,6 +553,8 @@ def update_user_statistics(user: str, user_stats: Dict[str, Any]) -> None:
         print(e)
         raise e
 
+    USER_PERCENTILE_INDEX.update(user=user, user_stats=user_stats)
+
 
 # Updates multiple user's statistics in database
 def update_many_user_statistics(
@@ -410,6 +580,7 @@ def update_many_user_statistics(
 
         success = 0
         fail = 0
+        updated_users = []
         for i in range(0, len(records), batch_size):
             batch = records[i : i + batch_size]
             try:
@@ -418,6 +589,7 @@ def update_many_user_statistics(
                     f"Successfully updated batch {i // batch_size}'s statistics in database"
                 )
                 success += 1
+                updated_users.extend(record["username"] for record in batch)
             except:
                 print(
                     f"Failed to update batch {i // batch_size}'s statistics in database"
@@ -426,6 +598,11 @@ def update_many_user_statistics(
         print(
             f"Successfully updated {success} / {success + fail} statistics batches in database"
         )
+
+        # Only statistics the database accepted reach the percentile index
+        USER_PERCENTILE_INDEX.update_many(
+            all_stats={user: all_stats[user] for user in updated_users}
+        )
     except Exception as e:
         print(e)
         raise e
@@ -0,0 +1,78 @@
+import asyncio
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+import os
+import sys
+import time
+from typing import Any, Callable
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(project_root)
+
+from data_processing.crawl_telemetry import CRAWL_TELEMETRY
+
+# "thread" keeps parsing in-process, "process" also sidesteps the GIL
+PARSE_POOL = os.getenv("PARSE_POOL", "thread")
+PARSE_WORKERS = int(os.getenv("PARSE_WORKERS", "4"))
+
+_parse_executor = None
+
+
+# Gets the shared parse pool, creating it on first use
+def get_parse_executor() -> Executor:
+
+    global _parse_executor
+    if _parse_executor is None:
+        if PARSE_POOL == "process":
+            _parse_executor = ProcessPoolExecutor(max_workers=PARSE_WORKERS)
+        else:
+            _parse_executor = ThreadPoolExecutor(
+                max_workers=PARSE_WORKERS, thread_name_prefix="html-parse"
+            )
+
+    return _parse_executor
+
+
+# Runs a CPU-bound parser in the parse pool so it never blocks the event loop
+async def run_parser(parser: Callable[..., Any], *args: Any) -> Any:
+
+    loop = asyncio.get_running_loop()
+
+    # Includes any wait for a free pool worker, which is crawl time too
+    with CRAWL_TELEMETRY.measure(stage="parse"):
+        return await loop.run_in_executor(get_parse_executor(), parser, *args)
+
+
+# Measures how long the event loop is blocked while a scrape runs
+class EventLoopBlockingMonitor:
+
+    def __init__(self, interval: float = 0.005, threshold: float = 0.002):
+        self.interval = interval
+        self.threshold = threshold
+        self.blocked_time = 0.0
+        self.max_block = 0.0
+        self._task = None
+
+    # Sleeps repeatedly and records how late each wake-up is
+    async def _watch(self) -> None:
+
+        while True:
+            expected = time.perf_counter() + self.interval
+            await asyncio.sleep(self.interval)
+            lag = time.perf_counter() - expected
+            if lag > self.threshold:
+                self.blocked_time += lag
+                self.max_block = max(self.max_block, lag)
+
+    async def __aenter__(self) -> "EventLoopBlockingMonitor":
+
+        self._task = asyncio.create_task(self._watch())
+
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
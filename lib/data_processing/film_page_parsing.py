@@ -0,0 +1,306 @@
+from bs4 import BeautifulSoup
+from collections import Counter, defaultdict
+import json
+import re
+import threading
+import time
+from typing import Any, Callable, Dict
+
+# The ld+json block is wrapped in CDATA comments on Letterboxd film pages
+LD_JSON_PATTERN = re.compile(
+    r'<script type="application/ld\+json">\s*'
+    r"(?:/\*\s*<!\[CDATA\[\s*\*/)?\s*(.*?)\s*(?:/\*\s*\]\]>\s*\*/)?\s*</script>",
+    re.S,
+)
+RUNTIME_PATTERN = re.compile(
+    r'class="[^"]*text-footer[^"]*"[^>]*>\s*([\d,]+)(?:&nbsp;|\s)+mins?'
+)
+TMDB_LINK_PATTERN = re.compile(r'<a\s[^>]*data-track-action="TMDB"[^>]*>')
+HREF_PATTERN = re.compile(r'href="([^"]+)"')
+PRIMARY_LANGUAGE_PATTERN = re.compile(
+    r"<span>Primary Language</span>.{0,200}?"
+    r'<a\s[^>]*class="text-slug"[^>]*>([^<]+)</a>',
+    re.S,
+)
+LANGUAGE_PATTERN = re.compile(
+    r"<span>Language</span>.{0,200}?<a\s[^>]*class=\"text-slug\"[^>]*>([^<]+)</a>",
+    re.S,
+)
+
+# Languages recognised by the last-resort soup fallback
+KNOWN_LANGUAGES = [
+    "Korean",
+    "English",
+    "Spanish",
+    "French",
+    "German",
+    "Italian",
+    "Japanese",
+    "Chinese",
+    "Russian",
+    "Portuguese",
+    "Hindi",
+    "Arabic",
+]
+
+
+# Decodes the ld+json block straight from the page text
+def extract_ld_json(text: str | bytes) -> Dict[str, Any] | None:
+
+    if isinstance(text, bytes):
+        text = text.decode("utf-8", errors="replace")
+
+    match = LD_JSON_PATTERN.search(text)
+    if match is None:
+        return None
+
+    try:
+        return json.loads(match.group(1))
+    except json.JSONDecodeError:
+        return None
+
+
+# Gets the runtime in minutes from the page footer
+def extract_runtime(text: str) -> int | None:
+
+    match = RUNTIME_PATTERN.search(text)
+
+    return int(match.group(1).replace(",", "")) if match else None
+
+
+# Gets the TMDB link, which tells movies from TV
+def extract_tmdb_url(text: str) -> str | None:
+
+    link = TMDB_LINK_PATTERN.search(text)
+    if link is None:
+        return None
+    href = HREF_PATTERN.search(link.group(0))
+
+    return href.group(1) if href else None
+
+
+# Gets the language from the ld+json data
+def get_language_from_json(web_data: Dict[str, Any]) -> str | None:
+
+    languages = web_data.get("inLanguage")
+    if isinstance(languages, list) and len(languages) > 0:
+        return languages[0]["name"]
+    elif isinstance(languages, dict):
+        return languages["name"]
+
+    return None
+
+
+# Gets the primary language, or None when only the soup can tell
+def extract_language(text: str, web_data: Dict[str, Any]) -> str | None:
+
+    # English doubles as the default, so it is confirmed from the details tab
+    language = get_language_from_json(web_data=web_data)
+    if language is not None and language != "English":
+        return language
+
+    for pattern in (PRIMARY_LANGUAGE_PATTERN, LANGUAGE_PATTERN):
+        match = pattern.search(text)
+        if match:
+            return match.group(1).strip()
+
+    return None
+
+
+# Builds the full soup, only needed when a fast path misses a field
+def get_film_soup(text: str) -> BeautifulSoup:
+
+    return BeautifulSoup(text, "lxml")
+
+
+# Decodes the ld+json block from the soup
+def extract_ld_json_from_soup(soup: BeautifulSoup) -> Dict[str, Any] | None:
+
+    script = soup.find("script", {"type": "application/ld+json"})
+    if script is None or script.string is None:
+        return None
+
+    return extract_ld_json(
+        text=f'<script type="application/ld+json">{script.string}</script>'
+    )
+
+
+# Gets the runtime from the soup
+def extract_runtime_from_soup(soup: BeautifulSoup) -> int | None:
+
+    footer = soup.find("p", {"class": "text-footer"})
+    match = re.search(r"([\d,]+)\s+mins", footer.text) if footer else None
+
+    return int(match.group(1).replace(",", "")) if match else None
+
+
+# Gets the TMDB link from the soup
+def extract_tmdb_url_from_soup(soup: BeautifulSoup) -> str | None:
+
+    link = soup.find("a", {"data-track-action": "TMDB"})
+
+    return link.get("href") if link else None
+
+
+# Gets the language from the text-slug links, defaulting to English
+def extract_language_from_soup(soup: BeautifulSoup) -> str:
+
+    language_elements = soup.find_all("a", {"class": "text-slug"})
+
+    # First, look for "Primary Language" specifically
+    for elem in language_elements:
+        parent = elem.parent
+        if parent and "Primary Language" in parent.get_text():
+            return elem.get_text().strip()
+
+    # Then for a "Language" label (but not "Primary Language")
+    for elem in language_elements:
+        parent = elem.parent
+        if parent:
+            parent_text = parent.get_text()
+            if "Language" in parent_text and "Primary Language" not in parent_text:
+                return elem.get_text().strip()
+
+    # Finally, for any known language mentioned in a text-slug element
+    for elem in language_elements:
+        elem_text = elem.get_text().strip()
+        if elem_text in KNOWN_LANGUAGES:
+            return elem_text
+
+    return "English"
+
+
+# Every field parse_film_page extracts, in the order it extracts them
+FILM_PAGE_FIELDS = [
+    "title",
+    "release_year",
+    "runtime",
+    "letterboxd_rating",
+    "letterboxd_rating_count",
+    "genres",
+    "country_of_origin",
+    "language",
+    "poster",
+    "tmdb_url",
+    "content_type",
+]
+
+
+# Accumulates time spent extracting each field across film pages
+class FieldTimings:
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.seconds = defaultdict(float)
+        self.counts = Counter()
+
+    # Adds one extraction's duration
+    def add(self, field: str, seconds: float) -> None:
+
+        with self._lock:
+            self.seconds[field] += seconds
+            self.counts[field] += 1
+
+    # Clears the totals, e.g. between benchmark runs
+    def reset(self) -> None:
+
+        with self._lock:
+            self.seconds.clear()
+            self.counts.clear()
+
+    # Prints the average and total time per field, slowest first
+    def report(self, job: str) -> None:
+
+        with self._lock:
+            fields = sorted(self.seconds, key=self.seconds.get, reverse=True)
+            if not fields:
+                return
+
+            print(f"Film page parsing ({job}, {self.counts['ld_json']} pages):")
+            for field in fields:
+                print(
+                    f"  {field:<24} {self.seconds[field] / self.counts[field] * 1000:7.3f} ms/page"
+                    f"  {self.seconds[field]:7.2f} s total"
+                )
+
+
+# Timings are per process, so a process parse pool keeps them in its workers
+FILM_PAGE_TIMINGS = FieldTimings()
+
+
+# Parses every known field from a film page in one pass, None for fields it lacks
+def parse_film_page(
+    text: str | bytes, timings: FieldTimings | None = FILM_PAGE_TIMINGS
+) -> Dict[str, Any] | None:
+
+    if isinstance(text, bytes):
+        text = text.decode("utf-8", errors="replace")
+
+    soup = None
+
+    # Builds the full soup once, only if a fast path misses
+    def get_soup() -> BeautifulSoup:
+        nonlocal soup
+        if soup is None:
+            soup = get_film_soup(text=text)
+
+        return soup
+
+    # Runs one extractor, treating a missing key as a missing field
+    def timed(field: str, extract: Callable[[], Any]) -> Any:
+        start = time.perf_counter()
+        try:
+            value = extract()
+        except (KeyError, IndexError, TypeError, ValueError):
+            value = None
+        if timings is not None:
+            timings.add(field, time.perf_counter() - start)
+
+        return value
+
+    web_data = timed(
+        "ld_json",
+        lambda: extract_ld_json(text=text) or extract_ld_json_from_soup(get_soup()),
+    )
+    if web_data is None:
+        return None
+
+    fields = {
+        "title": timed("title", lambda: web_data["name"]),
+        "release_year": timed(
+            "release_year", lambda: int(web_data["releasedEvent"][0]["startDate"])
+        ),
+        "runtime": timed(
+            "runtime",
+            lambda: extract_runtime(text=text) or extract_runtime_from_soup(get_soup()),
+        ),
+        "letterboxd_rating": timed(
+            "letterboxd_rating", lambda: web_data["aggregateRating"]["ratingValue"]
+        ),
+        "letterboxd_rating_count": timed(
+            "letterboxd_rating_count",
+            lambda: web_data["aggregateRating"]["ratingCount"],
+        ),
+        "genres": timed("genres", lambda: web_data["genre"]),
+        "country_of_origin": timed(
+            "country_of_origin", lambda: web_data["countryOfOrigin"][0]["name"]
+        ),
+        "language": timed(
+            "language",
+            lambda: extract_language(text=text, web_data=web_data)
+            or extract_language_from_soup(get_soup()),
+        ),
+        "poster": timed("poster", lambda: web_data["image"]),
+        "tmdb_url": timed(
+            "tmdb_url",
+            lambda: extract_tmdb_url(text=text)
+            or extract_tmdb_url_from_soup(get_soup()),
+        ),
+    }
+    fields["content_type"] = (
+        ("movie" if "/movie/" in fields["tmdb_url"] else "tv")
+        if fields["tmdb_url"]
+        else None
+    )
+
+    return fields
@@ -0,0 +1,90 @@
+import numpy as np
+import pandas as pd
+from typing import Any, Iterable, Sequence
+
+GENRES = [
+    "action",
+    "adventure",
+    "animation",
+    "comedy",
+    "crime",
+    "documentary",
+    "drama",
+    "family",
+    "fantasy",
+    "history",
+    "horror",
+    "music",
+    "mystery",
+    "romance",
+    "science_fiction",
+    "tv_movie",
+    "thriller",
+    "war",
+    "western",
+]
+GENRE_COLUMNS = [f"is_{genre}" for genre in GENRES]
+GENRE_POSITIONS = {genre: position for position, genre in enumerate(GENRES)}
+
+# The first genre is the most significant of the 19 bits
+GENRE_BITS = np.left_shift(1, np.arange(len(GENRES) - 1, -1, -1), dtype=np.int64)
+
+
+# Encodes lists of genre names (e.g. "Science Fiction") as bitmasks
+def encode_genre_lists(genre_lists: Iterable[Sequence[str]]) -> np.ndarray:
+
+    genre_lists = pd.Series(list(genre_lists), dtype=object)
+    genres = genre_lists.explode()
+
+    # Only the few distinct names are normalized, then looked up by code
+    codes, names = pd.factorize(genres)
+    name_bits = np.zeros(len(names) + 1, dtype=np.int64)  # code -1 maps to the last 0
+    for code, name in enumerate(names):
+        position = GENRE_POSITIONS.get(str(name).lower().replace(" ", "_"))
+        if position is not None:
+            name_bits[code] = GENRE_BITS[position]
+
+    # OR is idempotent, so repeated genres within a list are harmless
+    bitmasks = np.zeros(len(genre_lists), dtype=np.int64)
+    np.bitwise_or.at(bitmasks, genres.index.to_numpy(), name_bits[codes])
+
+    return bitmasks
+
+
+# Encodes 0/1 genre columns (in GENRES order) as bitmasks
+def encode_genre_matrix(genre_matrix: np.ndarray) -> np.ndarray:
+
+    return np.asarray(genre_matrix, dtype=np.int64) @ GENRE_BITS
+
+
+# Coerces stored genres (ints, numeric strings or missing) to bitmasks
+def to_bitmasks(genres: Iterable[Any]) -> np.ndarray:
+
+    if not isinstance(genres, (pd.Series, np.ndarray)):
+        genres = pd.Series(list(genres), dtype=object)
+    if isinstance(genres.dtype, np.dtype) and np.issubdtype(genres.dtype, np.integer):
+        return np.asarray(genres, dtype=np.int64)
+
+    return (
+        pd.to_numeric(pd.Series(genres), errors="coerce")
+        .fillna(0)
+        .to_numpy(dtype=np.int64)
+    )
+
+
+# Decodes bitmasks into a (rows, genres) matrix of 0/1 flags
+def decode_genres(bitmasks: Iterable[Any]) -> np.ndarray:
+
+    bitmasks = to_bitmasks(bitmasks)
+
+    return ((bitmasks[:, None] & GENRE_BITS) != 0).astype(np.int8)
+
+
+# Adds an is_<genre> column for every genre from a bitmask column
+def add_genre_columns(df: pd.DataFrame, column: str = "genres") -> pd.DataFrame:
+
+    flags = decode_genres(df[column])
+    for position, genre_column in enumerate(GENRE_COLUMNS):
+        df[genre_column] = flags[:, position]
+
+    return df
@@ -0,0 +1,227 @@
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Dict, Sequence, Tuple
+import zlib
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+HTTP_CACHE_PATH = os.getenv(
+    "HTTP_CACHE_PATH", os.path.join(project_root, "cache", "letterboxd_http.sqlite")
+)
+
+# Off by default, so API requests always see live pages and never touch the disk;
+# batch jobs turn it on unless HTTP_CACHE=0, and HTTP_CACHE=1 turns it on everywhere
+HTTP_CACHE_SETTING = os.getenv("HTTP_CACHE")
+HTTP_CACHE_ENABLED = HTTP_CACHE_SETTING == "1"
+
+# Errors that mean the cache file cannot be used, e.g. on a read-only filesystem
+CACHE_ERRORS = (OSError, sqlite3.Error, zlib.error, UnicodeDecodeError)
+
+# Seconds a cached page is served without revalidation, by URL class
+TTL_POLICY: Sequence[Tuple[re.Pattern, int]] = [
+    (re.compile(r"/film/[^/]+/?$"), 7 * 24 * 3600),  # film pages rarely change
+    (re.compile(r"/list/"), 24 * 3600),
+    (re.compile(r"/watchlist/"), 3600),
+    (re.compile(r"/films/"), 3600),  # user ratings
+]
+DEFAULT_TTL = 3600
+
+
+# Cached response for a URL
+class CachedPage:
+
+    def __init__(
+        self,
+        url: str,
+        text: str,
+        etag: str | None,
+        last_modified: str | None,
+        fetched_at: float,
+    ):
+        self.url = url
+        self.text = text
+        self.etag = etag
+        self.last_modified = last_modified
+        self.fetched_at = fetched_at
+
+    # Checks whether the page can be served without contacting Letterboxd
+    def is_fresh(self) -> bool:
+
+        return time.time() - self.fetched_at < get_ttl(url=self.url)
+
+    # Builds If-None-Match / If-Modified-Since headers for revalidation
+    def get_conditional_headers(self) -> Dict[str, str]:
+
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+
+        return headers
+
+
+# Gets the freshness lifetime for a URL from the TTL policy
+def get_ttl(url: str) -> int:
+
+    for pattern, ttl in TTL_POLICY:
+        if pattern.search(url):
+            return ttl
+
+    return DEFAULT_TTL
+
+
+# On-disk cache of successful page bodies, compressed and keyed by URL
+class HttpCache:
+
+    def __init__(self, path: str = HTTP_CACHE_PATH, enabled: bool = True):
+        self.path = path
+        self.enabled = enabled
+        self._connection = None
+        self._lock = threading.Lock()
+        self.reset_stats()
+
+    # Turns the cache on for a batch job unless HTTP_CACHE=0
+    def enable_for_batch_job(self) -> None:
+
+        self.enabled = HTTP_CACHE_SETTING != "0"
+
+    # Turns the cache off after an I/O error, so fetches fall back to the network
+    def _disable(self, error: Exception) -> None:
+
+        if self.enabled:
+            self.enabled = False
+            print(f"Disabled HTTP cache at {self.path}: {error}")
+
+    # Opens the database on first use so importing never touches the disk
+    def _get_connection(self) -> sqlite3.Connection:
+
+        if self._connection is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._connection = sqlite3.connect(
+                self.path, check_same_thread=False, isolation_level=None
+            )
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute("""
+                CREATE TABLE IF NOT EXISTS pages (
+                    url TEXT PRIMARY KEY,
+                    body BLOB NOT NULL,
+                    etag TEXT,
+                    last_modified TEXT,
+                    fetched_at REAL NOT NULL
+                )
+                """)
+
+        return self._connection
+
+    # Gets the cached page for a URL, if any
+    def get(self, url: str) -> CachedPage | None:
+
+        if not self.enabled:
+            return None
+
+        try:
+            with self._lock:
+                row = (
+                    self._get_connection()
+                    .execute(
+                        "SELECT body, etag, last_modified, fetched_at FROM pages WHERE url = ?",
+                        (url,),
+                    )
+                    .fetchone()
+                )
+
+            if row is None:
+                return None
+
+            body, etag, last_modified, fetched_at = row
+            text = zlib.decompress(body).decode("utf-8")
+        except CACHE_ERRORS as e:
+            self._disable(error=e)
+            return None
+
+        return CachedPage(
+            url=url,
+            text=text,
+            etag=etag,
+            last_modified=last_modified,
+            fetched_at=fetched_at,
+        )
+
+    # Stores a freshly downloaded page
+    def put(
+        self, url: str, text: str, etag: str | None, last_modified: str | None
+    ) -> None:
+
+        if not self.enabled:
+            return
+
+        body = zlib.compress(text.encode("utf-8"), 6)
+        try:
+            with self._lock:
+                self._get_connection().execute(
+                    "INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?)",
+                    (url, body, etag, last_modified, time.time()),
+                )
+        except CACHE_ERRORS as e:
+            self._disable(error=e)
+
+    # Restarts a page's TTL after a 304 Not Modified
+    def touch(self, url: str) -> None:
+
+        if not self.enabled:
+            return
+
+        try:
+            with self._lock:
+                self._get_connection().execute(
+                    "UPDATE pages SET fetched_at = ? WHERE url = ?", (time.time(), url)
+                )
+        except CACHE_ERRORS as e:
+            self._disable(error=e)
+
+    # Counts a page served from cache without a request
+    def record_hit(self, page: CachedPage) -> None:
+
+        self.stats["hits"] += 1
+        self.stats["bytes_saved"] += len(page.text.encode("utf-8"))
+
+    # Counts a page confirmed unchanged by a 304
+    def record_revalidation(self, page: CachedPage) -> None:
+
+        self.stats["revalidated"] += 1
+        self.stats["bytes_saved"] += len(page.text.encode("utf-8"))
+
+    # Counts a page that had to be downloaded
+    def record_miss(self) -> None:
+
+        self.stats["misses"] += 1
+
+    # Clears the counters reported for a job
+    def reset_stats(self) -> None:
+
+        self.stats = {"hits": 0, "revalidated": 0, "misses": 0, "bytes_saved": 0}
+
+    # Prints the job's hit rate and bytes saved
+    def report(self, job: str) -> None:
+
+        if not self.enabled:
+            return
+
+        hits = self.stats["hits"]
+        revalidated = self.stats["revalidated"]
+        total = hits + revalidated + self.stats["misses"]
+        hit_rate = (hits + revalidated) / total * 100 if total else 0.0
+
+        print(
+            f"HTTP cache for {job}: {hit_rate:.1f}% hit rate "
+            f"({hits} fresh, {revalidated} revalidated, {self.stats['misses']} downloaded), "
+            f"{self.stats['bytes_saved'] / 1024 / 1024:.1f} MiB saved"
+        )
+
+
+# Shared cache for all Letterboxd pages
+LETTERBOXD_HTTP_CACHE = HttpCache(enabled=HTTP_CACHE_ENABLED)
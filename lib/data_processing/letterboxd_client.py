@@ -0,0 +1,171 @@
+import aiohttp
+import asyncio
+import os
+import re
+import sys
+import time
+from typing import Dict, Mapping, Tuple
+from urllib.parse import urlsplit
+import weakref
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(project_root)
+
+from data_processing.crawl_telemetry import CRAWL_TELEMETRY
+from data_processing.http_cache import LETTERBOXD_HTTP_CACHE
+from data_processing.rate_limiter import LETTERBOXD_RATE_LIMITER
+
+# Set LETTERBOXD_BASE_URL to point every scraper at a stand-in server
+LETTERBOXD_URL = os.getenv("LETTERBOXD_BASE_URL", "https://letterboxd.com").rstrip("/")
+LETTERBOXD_URL_PATTERN = re.compile(r"^https?://(?:www\.)?letterboxd\.com")
+
+# Maximum number of in-flight requests to a single host
+MAX_REQUESTS_PER_HOST = 4
+
+# Retries for throttled (429) and server error (5xx) responses
+MAX_RETRIES = 3
+
+# Set proper headers to avoid being blocked by Letterboxd
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
+    "Accept-Language": "en-US,en;q=0.5",
+    "Accept-Encoding": "gzip, deflate",
+    "DNT": "1",
+    "Connection": "keep-alive",
+    "Upgrade-Insecure-Requests": "1",
+}
+
+# Semaphores are bound to an event loop, so they are kept per loop
+_host_semaphores = weakref.WeakKeyDictionary()
+
+
+# Gets the request semaphore for a host on the running event loop
+def get_host_semaphore(host: str) -> asyncio.Semaphore:
+
+    loop = asyncio.get_running_loop()
+    semaphores = _host_semaphores.setdefault(loop, {})
+    if host not in semaphores:
+        semaphores[host] = asyncio.Semaphore(MAX_REQUESTS_PER_HOST)
+
+    return semaphores[host]
+
+
+# Points a Letterboxd URL at the configured base URL
+def rebase_url(url: str) -> str:
+
+    return LETTERBOXD_URL_PATTERN.sub(LETTERBOXD_URL, url, count=1)
+
+
+# Fetches a page through the HTTP cache, revalidating stale (or all, if asked) entries
+async def fetch_page(
+    session: aiohttp.ClientSession,
+    url: str,
+    max_retries: int = MAX_RETRIES,
+    revalidate: bool = False,
+) -> Tuple[int, str]:
+
+    url = rebase_url(url=url)
+    cached = await asyncio.to_thread(LETTERBOXD_HTTP_CACHE.get, url)
+    if cached is not None and cached.is_fresh() and not revalidate:
+        LETTERBOXD_HTTP_CACHE.record_hit(page=cached)
+
+        return 200, cached.text
+
+    headers = cached.get_conditional_headers() if cached is not None else {}
+    status, text, response_headers = await fetch_from_network(
+        session=session, url=url, headers=headers, max_retries=max_retries
+    )
+
+    if status == 304 and cached is not None:
+        LETTERBOXD_HTTP_CACHE.record_revalidation(page=cached)
+        await asyncio.to_thread(LETTERBOXD_HTTP_CACHE.touch, url)
+
+        return 200, cached.text
+
+    LETTERBOXD_HTTP_CACHE.record_miss()
+    if status == 200:
+        await asyncio.to_thread(
+            LETTERBOXD_HTTP_CACHE.put,
+            url,
+            text,
+            response_headers.get("ETag"),
+            response_headers.get("Last-Modified"),
+        )
+
+    return status, text
+
+
+# Fetches a page under the global rate limit, retrying throttled responses
+async def fetch_from_network(
+    session: aiohttp.ClientSession,
+    url: str,
+    headers: Dict[str, str],
+    max_retries: int = MAX_RETRIES,
+) -> Tuple[int, str, Mapping[str, str]]:
+
+    for attempt in range(max_retries + 1):
+        await LETTERBOXD_RATE_LIMITER.acquire()
+
+        async with get_host_semaphore(host=urlsplit(url).netloc):
+            start = time.perf_counter()
+            try:
+                async with session.get(url, headers=headers) as page:
+                    with CRAWL_TELEMETRY.measure(stage="download"):
+                        body = await page.read()
+                        text = await page.text()
+                    status = page.status
+                    response_headers = page.headers
+            except (aiohttp.ClientError, asyncio.TimeoutError):
+                LETTERBOXD_RATE_LIMITER.record_failure()
+                raise
+        CRAWL_TELEMETRY.record_response(status=status, num_bytes=len(body))
+
+        retry_after = response_headers.get("Retry-After")
+        retry_after = (
+            float(retry_after) if retry_after and retry_after.isdigit() else None
+        )
+        LETTERBOXD_RATE_LIMITER.record_response(
+            status=status,
+            latency=time.perf_counter() - start,
+            retry_after=retry_after,
+        )
+
+        # Retries throttled and server error responses with exponential backoff
+        if (status == 429 or status >= 500) and attempt < max_retries:
+            CRAWL_TELEMETRY.increment(counter="retries")
+            await asyncio.sleep(retry_after or 2**attempt)
+            continue
+
+        return status, text, response_headers
+
+
+# Fetches page text under the global rate limit
+async def fetch_page_text(session: aiohttp.ClientSession, url: str) -> str:
+
+    _, text = await fetch_page(session=session, url=url)
+
+    return text
+
+
+# Creates a long-lived pooled session with keep-alive, a DNS cache and request tracing
+def create_session(
+    max_connections: int = 100,
+    keepalive_timeout: float = 60,
+    dns_cache_ttl: int = 600,
+) -> aiohttp.ClientSession:
+
+    connector = aiohttp.TCPConnector(
+        limit=max_connections,
+        limit_per_host=MAX_REQUESTS_PER_HOST,
+        keepalive_timeout=keepalive_timeout,
+        ttl_dns_cache=dns_cache_ttl,
+    )
+    timeout = aiohttp.ClientTimeout(total=60, connect=10)
+
+    return aiohttp.ClientSession(
+        headers=HEADERS,
+        connector=connector,
+        timeout=timeout,
+        trace_configs=[CRAWL_TELEMETRY.trace_config()],
+    )
@@ -0,0 +1,143 @@
+import numpy as np
+import os
+import pandas as pd
+import threading
+import time
+from typing import Any, Dict, Mapping
+
+# Seconds before a full reload, which picks up writes made by other processes
+PERCENTILE_INDEX_TTL = float(os.getenv("PERCENTILE_INDEX_TTL", "3600"))
+
+# Statistic each percentile is computed over, by user statistics category
+PERCENTILE_METRICS = [
+    "user_rating",
+    "letterboxd_rating",
+    "rating_differential",
+    "letterboxd_rating_count",
+]
+
+
+# Gets the values a user's statistics add to the index, as the table stores them
+def get_metric_values(user_stats: Mapping[str, Any]) -> Dict[str, float]:
+
+    # The table has no differential column, so it is derived from the stored means
+    return {
+        "user_rating": float(user_stats["user_rating"]["mean"]),
+        "letterboxd_rating": float(user_stats["letterboxd_rating"]["mean"]),
+        "rating_differential": float(user_stats["user_rating"]["mean"])
+        - float(user_stats["letterboxd_rating"]["mean"]),
+        "letterboxd_rating_count": float(user_stats["letterboxd_rating_count"]["mean"]),
+    }
+
+
+# Gets the values a user's percentiles are looked up with
+def get_lookup_values(user_stats: Mapping[str, Any]) -> Dict[str, float]:
+
+    # The differential mean skips films without a Letterboxd rating, so it can
+    # differ from the difference of the two means
+    return {metric: float(user_stats[metric]["mean"]) for metric in PERCENTILE_METRICS}
+
+
+# Sorted per-metric values for every user, answering percentile lookups by binary search
+class PercentileIndex:
+
+    def __init__(self, ttl: float = PERCENTILE_INDEX_TTL):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self.loaded_at: float | None = None
+        self.users: Dict[str, Dict[str, float]] = {}
+        self.sorted_values: Dict[str, np.ndarray] = {}
+
+    # Whether the index needs a full load before answering lookups
+    def is_stale(self) -> bool:
+
+        return self.loaded_at is None or time.time() - self.loaded_at > self.ttl
+
+    # Replaces the index with rows from the user_statistics table
+    def load(self, statistics: pd.DataFrame) -> None:
+
+        users = {}
+        if len(statistics) > 0:
+            values = pd.DataFrame(
+                {
+                    "user_rating": statistics["mean_user_rating"],
+                    "letterboxd_rating": statistics["mean_letterboxd_rating"],
+                    "rating_differential": statistics["mean_user_rating"]
+                    - statistics["mean_letterboxd_rating"],
+                    "letterboxd_rating_count": statistics[
+                        "mean_letterboxd_rating_count"
+                    ],
+                }
+            ).astype(float)
+            users = dict(zip(statistics["username"], values.to_dict(orient="records")))
+
+        with self._lock:
+            self.users = users
+            self._rebuild()
+            self.loaded_at = time.time()
+
+    # Re-sorts every metric, O(n log n)
+    def _rebuild(self) -> None:
+
+        for metric in PERCENTILE_METRICS:
+            values = np.array(
+                [user[metric] for user in self.users.values()], dtype=np.float64
+            )
+            self.sorted_values[metric] = np.sort(values[~np.isnan(values)])
+
+    # Moves one user's values within the sorted arrays, O(log n) search plus a shift
+    def update(self, user: str, user_stats: Mapping[str, Any]) -> None:
+
+        values = get_metric_values(user_stats=user_stats)
+
+        with self._lock:
+            if self.loaded_at is None:
+                return
+
+            previous = self.users.get(user)
+            for metric in PERCENTILE_METRICS:
+                sorted_values = self.sorted_values[metric]
+                if previous is not None and not np.isnan(previous[metric]):
+                    position = np.searchsorted(sorted_values, previous[metric])
+                    sorted_values = np.delete(sorted_values, position)
+                if not np.isnan(values[metric]):
+                    position = np.searchsorted(sorted_values, values[metric])
+                    sorted_values = np.insert(sorted_values, position, values[metric])
+                self.sorted_values[metric] = sorted_values
+
+            self.users[user] = values
+
+    # Applies a batch of users' statistics with a single re-sort
+    def update_many(self, all_stats: Mapping[str, Mapping[str, Any]]) -> None:
+
+        with self._lock:
+            if self.loaded_at is None:
+                return
+
+            for user, user_stats in all_stats.items():
+                self.users[user] = get_metric_values(user_stats=user_stats)
+            self._rebuild()
+
+    # Gets the share of users below each of a user's statistics
+    def get_percentiles(self, user_stats: Mapping[str, Any]) -> Dict[str, float]:
+
+        values = get_lookup_values(user_stats=user_stats)
+
+        with self._lock:
+            num_users = len(self.users)
+            percentiles = {}
+            for metric in PERCENTILE_METRICS:
+                below = (
+                    int(np.searchsorted(self.sorted_values[metric], values[metric]))
+                    if not np.isnan(values[metric])
+                    else 0
+                )
+                percentiles[f"{metric}_percentile"] = (
+                    round(below / num_users * 100, 1) if num_users else 0.0
+                )
+
+        return percentiles
+
+
+# Shared index, refreshed by every user statistics write in this process
+USER_PERCENTILE_INDEX = PercentileIndex()
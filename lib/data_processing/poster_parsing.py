@@ -0,0 +1,119 @@
+from bs4 import BeautifulSoup, SoupStrainer
+import re
+from typing import Any, Dict, Sequence, Tuple
+
+RATINGS = {
+    "½": 0.5,
+    "★": 1,
+    "★½": 1.5,
+    "★★": 2,
+    "★★½": 2.5,
+    "★★★": 3,
+    "★★★½": 3.5,
+    "★★★★": 4,
+    "★★★★½": 4.5,
+    "★★★★★": 5,
+}
+
+RATED_CLASS_PATTERN = re.compile(r"^rated-(\d+)$")
+
+# lxml tokenizes several times faster than html.parser
+PARSER = "lxml"
+
+
+# Keeps only poster containers and pagination entries while parsing
+def is_poster_grid_tag(name: str, attrs: Dict[str, Any]) -> bool:
+
+    if name != "li":
+        return False
+
+    classes = attrs.get("class") or ""
+    if not isinstance(classes, str):
+        classes = " ".join(classes)
+
+    return "poster-container" in classes or "paginate-page" in classes
+
+
+POSTER_GRID_STRAINER = SoupStrainer(is_poster_grid_tag)
+
+
+# Slices the raw page down to the poster grid and pagination markup
+def get_poster_grid_fragment(text: str) -> str:
+
+    first = text.find("poster-container")
+    if first == -1:
+        return text
+    start = text.rfind("<li", 0, first)
+
+    # Pagination follows the grid, so it bounds the fragment when present
+    last = text.rfind("paginate-page")
+    if last == -1:
+        last = text.rfind("poster-container")
+    end = text.find("</li>", last)
+
+    if start == -1 or end == -1:
+        return text
+
+    return text[start : end + len("</li>")]
+
+
+# Parses a films, watchlist or list page into poster fields and the last page number
+def parse_poster_grid(text: str) -> Tuple[Sequence[Dict[str, Any]], int | None]:
+
+    soup = BeautifulSoup(
+        get_poster_grid_fragment(text=text), PARSER, parse_only=POSTER_GRID_STRAINER
+    )
+
+    posters = []
+    page_numbers = []
+    for item in soup.find_all("li", recursive=False):
+        classes = item.get("class", [])
+        if "poster-container" in classes:
+            posters.append(parse_poster(item=item))
+        elif "paginate-page" in classes:
+            link = item.a
+            if link is not None and link.text.strip().isdigit():
+                page_numbers.append(int(link.text.strip()))
+
+    return posters, max(page_numbers) if page_numbers else None
+
+
+# Reads poster fields directly from the poster container attributes
+def parse_poster(item: Any) -> Dict[str, Any]:
+
+    film = item.div
+    movie_id = film.get("data-film-id") if film is not None else None
+    link = film.get("data-target-link") if film is not None else None
+    title = film.img.get("alt") if film is not None and film.img else None
+
+    liked = False
+    rating = None
+    viewing_data = item.p
+    if viewing_data is not None:
+        for span in viewing_data.find_all("span", recursive=False):
+            span_classes = span.get("class", [])
+            if "like" in span_classes:
+                liked = True
+            elif "rating" in span_classes:
+                rating = get_rating_from_classes(
+                    classes=span_classes, text=span.text.strip()
+                )
+
+    return {
+        "movie_id": int(movie_id) if movie_id else None,
+        "url": link,
+        "title": title,
+        "liked": liked,
+        "rating": rating,
+    }
+
+
+# Gets a star rating from its rated-N class, falling back to the star text
+def get_rating_from_classes(classes: Sequence[str], text: str) -> float | None:
+
+    for cls in classes:
+        match = RATED_CLASS_PATTERN.match(cls)
+        if match:
+            return int(match.group(1)) / 2
+
+    return RATINGS.get(text)
@@ -0,0 +1,35 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+import time
+from typing import Any, Callable, Dict, Iterator
+
+# Receives progress events for the request being served, if it is streamed
+ProgressCallback = Callable[[Dict[str, Any]], None]
+
+_progress_callback: ContextVar[ProgressCallback | None] = ContextVar(
+    "progress_callback", default=None
+)
+
+
+# Sends progress events raised in this context, including its tasks and threads, to a callback
+@contextmanager
+def progress_callback(callback: ProgressCallback) -> Iterator[None]:
+
+    token = _progress_callback.set(callback)
+    try:
+        yield
+    finally:
+        _progress_callback.reset(token)
+
+
+# Reports a progress event, doing nothing unless a callback is listening
+def report_progress(stage: str, **fields: Any) -> None:
+
+    callback = _progress_callback.get()
+    if callback is None:
+        return
+
+    try:
+        callback({"event": "progress", "stage": stage, "time": time.time(), **fields})
+    except Exception as e:
+        print(f"Failed to report {stage} progress: {e}")
@@ -0,0 +1,81 @@
+import asyncio
+import threading
+import time
+
+
+# Token bucket whose refill rate adapts to observed latency and throttling
+class AdaptiveRateLimiter:
+
+    def __init__(
+        self,
+        rate: float = 4.0,
+        min_rate: float = 0.5,
+        max_rate: float = 20.0,
+        burst: float = 4.0,
+        target_latency: float = 1.5,
+        increase_step: float = 0.05,
+        decrease_factor: float = 0.5,
+    ):
+        self.rate = rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.burst = burst
+        self.target_latency = target_latency
+        self.increase_step = increase_step
+        self.decrease_factor = decrease_factor
+
+        self._tokens = burst
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+
+        # Scrapers may run event loops on several threads (e.g. Flask workers)
+        self._lock = threading.Lock()
+
+    # Reserves a token and returns how long the caller must wait for it
+    def reserve(self) -> float:
+
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(
+                self.burst, self._tokens + (now - self._updated) * self.rate
+            )
+            self._updated = now
+            self._tokens -= 1
+
+            wait = max(0.0, -self._tokens / self.rate)
+
+            return max(wait, self._paused_until - now)
+
+    # Waits until a request may be sent
+    async def acquire(self) -> None:
+
+        wait = self.reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    # Adapts the rate from a response's status code and latency
+    def record_response(
+        self, status: int, latency: float, retry_after: float | None = None
+    ) -> None:
+
+        with self._lock:
+            if status == 429 or status == 503:
+                self.rate = max(self.min_rate, self.rate * self.decrease_factor)
+                pause = retry_after if retry_after is not None else 1 / self.rate
+                self._paused_until = max(self._paused_until, time.monotonic() + pause)
+            elif status >= 500:
+                self.rate = max(self.min_rate, self.rate * 0.75)
+            elif latency > self.target_latency:
+                self.rate = max(self.min_rate, self.rate * 0.9)
+            else:
+                self.rate = min(self.max_rate, self.rate + self.increase_step)
+
+    # Backs off after a connection error or timeout
+    def record_failure(self) -> None:
+
+        with self._lock:
+            self.rate = max(self.min_rate, self.rate * 0.75)
+
+
+# Shared limiter for all Letterboxd traffic
+LETTERBOXD_RATE_LIMITER = AdaptiveRateLimiter()
@@ -0,0 +1,125 @@
+import heapq
+import json
+import os
+import pandas as pd
+import time
+from typing import Any, Dict, Iterable, Sequence
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+REFRESH_STATE_PATH = os.getenv(
+    "REFRESH_STATE_PATH",
+    os.path.join(project_root, "checkpoints", "movie_refresh_state.json"),
+)
+
+# Daily relative rating count growth assumed for a movie released this year
+PRIOR_GROWTH = 0.02
+MIN_GROWTH = 1e-4
+
+# Caps the age of movies never refreshed, so drift still decides among them
+MAX_AGE_DAYS = 365.0
+
+SECONDS_PER_DAY = 24 * 3600
+
+
+# Last refresh time and rating count growth per movie, kept between runs
+class RefreshState:
+
+    def __init__(self, path: str = REFRESH_STATE_PATH):
+        self.path = path
+        self.movies: Dict[str, Dict[str, float]] = {}
+
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, "r") as f:
+                    self.movies = json.load(f)
+            except (json.JSONDecodeError, OSError) as e:
+                print(f"Ignoring unreadable refresh state {self.path}: {e}")
+
+    # Records refreshed rating counts and their growth since the last refresh
+    def record(
+        self,
+        movie_ids: Iterable[Any],
+        rating_counts: Iterable[Any],
+        checked_at: float | None = None,
+    ) -> None:
+
+        checked_at = time.time() if checked_at is None else checked_at
+        for movie_id, rating_count in zip(movie_ids, rating_counts):
+            movie_id = str(movie_id)
+            entry = {"checked_at": checked_at, "rating_count": int(rating_count)}
+
+            previous = self.movies.get(movie_id)
+            if previous is not None:
+                days = (checked_at - previous["checked_at"]) / SECONDS_PER_DAY
+                if days > 0:
+                    entry["growth"] = (
+                        entry["rating_count"] - previous["rating_count"]
+                    ) / (max(previous["rating_count"], 1) * days)
+                elif "growth" in previous:
+                    entry["growth"] = previous["growth"]
+
+            self.movies[movie_id] = entry
+
+    # Writes the state atomically so a crash cannot leave it half written
+    def save(self) -> None:
+
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, "w") as f:
+            json.dump(self.movies, f)
+        os.replace(temp_path, self.path)
+
+
+# Scores each movie by expected relative rating count drift since its last refresh
+def get_refresh_priorities(
+    movie_data: pd.DataFrame, state: RefreshState, now: float | None = None
+) -> pd.Series:
+
+    now = time.time() if now is None else now
+    movie_ids = movie_data["movie_id"].astype(str)
+
+    # Falls back to the row's timestamps for movies this scheduler never refreshed
+    last_checked = pd.to_numeric(
+        movie_ids.map(
+            lambda movie_id: state.movies.get(movie_id, {}).get("checked_at")
+        ),
+        errors="coerce",
+    )
+    for column in ("updated_at", "created_at"):
+        if column in movie_data.columns:
+            timestamps = pd.to_datetime(movie_data[column], utc=True, errors="coerce")
+            seconds = timestamps.astype("int64") / 1e9
+            last_checked = last_checked.fillna(seconds.where(timestamps.notna()))
+    age_days = ((now - last_checked) / SECONDS_PER_DAY).fillna(MAX_AGE_DAYS)
+    age_days = age_days.clip(lower=0, upper=MAX_AGE_DAYS)
+
+    # Recent releases gain ratings fastest until a measured growth rate exists
+    release_year = pd.to_numeric(movie_data["release_year"], errors="coerce")
+    years_since_release = (
+        (time.gmtime(now).tm_year - release_year).clip(lower=0).fillna(50)
+    )
+    growth = PRIOR_GROWTH / (1 + years_since_release) ** 1.5
+    measured = movie_ids.map(
+        lambda movie_id: state.movies.get(movie_id, {}).get("growth")
+    )
+    growth = pd.to_numeric(measured, errors="coerce").fillna(growth)
+
+    return pd.Series(
+        (age_days * growth.clip(lower=MIN_GROWTH)).to_numpy(), index=movie_ids
+    )
+
+
+# Pops the movies with the most expected drift, up to the request budget
+def schedule_refresh(
+    movie_data: pd.DataFrame,
+    state: RefreshState,
+    budget: int,
+    now: float | None = None,
+) -> Sequence[str]:
+
+    priorities = get_refresh_priorities(movie_data=movie_data, state=state, now=now)
+    queue = [(-priority, movie_id) for movie_id, priority in priorities.items()]
+    heapq.heapify(queue)
+
+    return [heapq.heappop(queue)[1] for _ in range(min(budget, len(queue)))]
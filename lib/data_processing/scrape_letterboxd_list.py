@@ -12,6 +12,9 @@ project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 sys.path.append(project_root)
 
 import data_processing.database as database
+from data_processing.event_loop import run_parser
+from data_processing.letterboxd_client import create_session, fetch_page
+from data_processing.poster_parsing import parse_poster_grid
 
 
 class ListEmptyException(Exception):
@@ -43,24 +46,15 @@ async def get_letterboxd_list(
 
         print(f"Scraping: {page_url}")
 
-        async with session.get(page_url) as page:
-            if page.status != 200:
-                print(f"Error {page.status} accessing {page_url}")
-                return []
+        status, text = await fetch_page(session=session, url=page_url)
+        if status != 200:
+            print(f"Error {status} accessing {page_url}")
+            return []
 
-            soup = BeautifulSoup(await page.text(), "html.parser")
+        movie_urls = await run_parser(parse_list_page, text)
+        print(f"Found {len(movie_urls)} movies on page {page_number}")
 
-            # Look for movie poster containers (same as watchlist)
-            movies = soup.select("li.poster-container")
-
-            if not movies:
-                # Try alternative selectors for different list layouts
-                movies = soup.select(".film-poster")
-                if not movies:
-                    movies = soup.select(".poster")
-
-            print(f"Found {len(movies)} movies on page {page_number}")
-            return [get_url(movie=movie) for movie in movies if get_url(movie)]
+        return movie_urls
 
     movie_urls = []
     page_number = 1
@@ -74,15 +68,29 @@ async def get_letterboxd_list(
         movie_urls.extend(data)
         page_number += 1
 
-        # Add delay to be respectful
-        await asyncio.sleep(1)
-
     if not movie_urls:
         raise ListEmptyException(f"No movies found in list: {list_url}")
 
     return movie_urls
 
 
+# Parses movie URLs from a list page
+def parse_list_page(text: str) -> Sequence[str]:
+
+    # Look for movie poster containers (same as watchlist)
+    posters, _ = parse_poster_grid(text=text)
+    if posters:
+        return [normalize_url(url=poster["url"]) for poster in posters if poster["url"]]
+
+    # Try alternative selectors for different list layouts
+    soup = BeautifulSoup(text, "html.parser")
+    movies = soup.select(".film-poster")
+    if not movies:
+        movies = soup.select(".poster")
+
+    return [get_url(movie=movie) for movie in movies if get_url(movie)]
+
+
 # Gets movie URL from HTML element
 def get_url(movie: Tag) -> str:
     """Extract movie URL from Letterboxd HTML element"""
@@ -105,6 +113,12 @@ def get_url(movie: Tag) -> str:
     elif movie.get("data-film-slug"):
         url = f"/film/{movie.get('data-film-slug')}/"
 
+    return normalize_url(url=url)
+
+
+# Normalizes a scraped movie URL to the relative database format
+def normalize_url(url: str | None) -> str | None:
+
     if url and not url.startswith("http"):
         # Convert relative URL to absolute URL and clean it
         url = url.replace("https://www.letterboxd.com", "")  # Remove if already there
@@ -127,7 +141,7 @@ async def scrape_and_add_list(list_url: str, update_urls: bool = True):
 
     start_time = time.perf_counter()
 
-    async with aiohttp.ClientSession() as session:
+    async with create_session() as session:
         try:
             print(f"🎬 Scraping Letterboxd list: {list_url}")
             movie_urls = await get_letterboxd_list(list_url, session)
@@ -1,58 +1,69 @@
 import aiohttp
 import argparse
 import asyncio
-from bs4 import BeautifulSoup
-import json
+from datetime import datetime, timezone
+import numpy as np
 import os
 import pandas as pd
-import re
 import requests
 import sys
 import time
-from typing import Any, Dict, Sequence, Tuple
+from typing import Any, Awaitable, Callable, Dict, Iterable, Iterator, Sequence, Tuple
 
 project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 sys.path.append(project_root)
 
+from data_processing.checkpoint import JobCheckpoint
 import data_processing.database as database
 from data_processing.arg_checks import check_num_movies_argument_type
+from data_processing.event_loop import run_parser
+from data_processing.film_page_parsing import FILM_PAGE_TIMINGS, parse_film_page
+from data_processing.genre_codec import (
+    add_genre_columns,
+    encode_genre_lists,
+    to_bitmasks,
+)
+from data_processing.letterboxd_client import (
+    CRAWL_TELEMETRY,
+    LETTERBOXD_HTTP_CACHE,
+    LETTERBOXD_URL,
+    create_session,
+    fetch_page,
+)
+from data_processing.refresh_scheduler import RefreshState, schedule_refresh
+
+# Film page fields a movie_data row cannot do without
+MOVIE_DATA_FIELDS = [
+    "title",
+    "release_year",
+    "runtime",
+    "letterboxd_rating",
+    "letterboxd_rating_count",
+    "genres",
+    "country_of_origin",
+    "language",
+    "poster",
+]
+
+# Columns a refresh compares against the stored row before writing it back
+REFRESH_COLUMNS = [
+    "title",
+    "content_type",
+    "release_year",
+    "runtime",
+    "letterboxd_rating",
+    "letterboxd_rating_count",
+    "genres",
+    "country_of_origin",
+    "language",
+    "poster",
+]
 
 
 # Encodes genres as integers
 def encode_genres(genres: Sequence[str]) -> int:
 
-    genre_options = [
-        "action",
-        "adventure",
-        "animation",
-        "comedy",
-        "crime",
-        "documentary",
-        "drama",
-        "family",
-        "fantasy",
-        "history",
-        "horror",
-        "music",
-        "mystery",
-        "romance",
-        "science_fiction",
-        "tv_movie",
-        "thriller",
-        "war",
-        "western",
-    ]
-
-    genre_binary = ""
-    for genre in genre_options:
-        if genre in genres:
-            genre_binary += "1"
-        else:
-            genre_binary += "0"
-
-    genre_int = int(genre_binary, 2)
-
-    return genre_int
+    return int(encode_genre_lists(genre_lists=[genres])[0])
 
 
 # Maps country of origin to numerical values
@@ -112,129 +123,234 @@ def assign_languages(language: str) -> int:
 def add_genre_boolean_columns(df: pd.DataFrame) -> pd.DataFrame:
     """Populates boolean genre columns from the encoded genres integer"""
 
-    genre_options = [
-        "action",
-        "adventure",
-        "animation",
-        "comedy",
-        "crime",
-        "documentary",
-        "drama",
-        "family",
-        "fantasy",
-        "history",
-        "horror",
-        "music",
-        "mystery",
-        "romance",
-        "science_fiction",
-        "tv_movie",
-        "thriller",
-        "war",
-        "western",
-    ]
-
-    # Initialize all boolean columns to 0
-    for genre in genre_options:
-        df[f"is_{genre}"] = 0
-
-    # Populate boolean columns from encoded genres
-    for idx, row in df.iterrows():
-        genres_int = row["genres"]
-        if pd.isna(genres_int) or genres_int == 0:
-            continue
-
-        # Convert to binary and pad to 19 characters
-        genre_binary = bin(int(genres_int))[2:].zfill(19)
-
-        # Set boolean columns
-        for i, genre in enumerate(genre_options):
-            df.loc[idx, f"is_{genre}"] = int(genre_binary[i])
+    return add_genre_columns(df=df, column="genres")
 
-    return df
 
-
-# Scrapes movie data
+# Streams movie data through fetch, parse, transform and write stages
 async def movie_crawl(
-    movie_urls: pd.DataFrame,
+    movie_urls: pd.DataFrame | Iterable[pd.DataFrame],
     session: aiohttp.ClientSession,
     show_objects: bool,
     update_movie_data: bool,
+    num_workers: int = 8,
+    flush_size: int = 100,
+    flush_interval: float = 30.0,
     verbose: bool = False,
-    batch_num: int = 1,
-    total_batches: int = 1,
+    checkpoint: JobCheckpoint | None = None,
+    persist_batch: Callable[..., Tuple[int, int, int, int]] | None = None,
+    revalidate: bool = False,
+    total_movies: int | None = None,
 ) -> Tuple[int, int, int, int]:
 
-    movie_data = []
-    deprecated_urls = []
-    total_movies = len(movie_urls)
-    successful_scrapes = 0
-    failed_scrapes = 0
-
-    print(f"🎬 Batch {batch_num}/{total_batches}: Processing {total_movies} movies...")
-
-    for idx, (_, row) in enumerate(movie_urls.iterrows()):
-        movie_num = idx + 1
-        start_time = time.perf_counter()
-
-        result, is_deprecated = await get_letterboxd_data(
-            row=row, session=session, verbose=verbose
+    persist_batch = persist_batch or persist_movie_batch
+
+    # URLs arrive either as one frame or as a stream of pages
+    if isinstance(movie_urls, pd.DataFrame):
+        total_movies = len(movie_urls)
+        movie_urls = [movie_urls]
+    url_pages = iter(movie_urls)
+
+    # Bounded so no stage can run far ahead of the one after it
+    url_queue = asyncio.Queue(maxsize=4 * num_workers)
+    page_queue = asyncio.Queue(maxsize=2 * num_workers)
+    result_queue = asyncio.Queue(maxsize=2 * num_workers)
+    batch_queue = asyncio.Queue(maxsize=2)
+
+    progress = {"done": 0, "start": time.perf_counter()}
+    totals = [0, 0, 0, 0]
+
+    # Source stage: pulls URL pages off the event loop as the crawl needs them
+    async def feed_urls() -> None:
+        while True:
+            url_page = await asyncio.to_thread(next, url_pages, None)
+            if url_page is None:
+                break
+            for _, row in url_page.iterrows():
+                await url_queue.put(row)
+
+        for _ in range(num_workers):
+            await url_queue.put(None)
+
+    # Fetch stage: downloads film pages under the global rate limit
+    async def fetch_worker() -> None:
+        while True:
+            row = await url_queue.get()
+            if row is None:
+                return
+
+            start_time = time.perf_counter()
+            text, is_deprecated = await fetch_letterboxd_page(
+                row=row, session=session, revalidate=revalidate
+            )
+            await page_queue.put((row, text, is_deprecated, start_time))
+
+    # Parse stage: extracts movie fields in the parse pool
+    async def parse_worker() -> None:
+        while True:
+            item = await page_queue.get()
+            if item is None:
+                return
+            row, text, is_deprecated, start_time = item
+
+            result = None
+            if text is not None:
+                result = await run_parser(
+                    parse_letterboxd_data, row["movie_id"], row["url"], text, verbose
+                )
+            log_progress(row=row, result=result, is_deprecated=is_deprecated)
+            await result_queue.put((row, result, is_deprecated))
+
+            if show_objects and result:
+                print(f"    📋 Data: {result}")
+
+    # Logs each finished movie with the crawl's overall ETA
+    def log_progress(
+        row: pd.Series, result: Dict[str, Any] | None, is_deprecated: bool
+    ) -> None:
+        progress["done"] += 1
+        movie_num = progress["done"]
+        elapsed = time.perf_counter() - progress["start"]
+        status = "✅" if result else "❌"
+        if is_deprecated:
+            status += " (deprecated)"
+        title = str(result.get("title", "Unknown") if result else row["movie_id"])
+
+        # A streamed queue's size is an estimate, or unknown
+        remaining_movies = max((total_movies or 0) - movie_num, 0)
+        eta_str = (
+            f", ETA: {elapsed / movie_num * remaining_movies:.0f}s"
+            if remaining_movies > 0
+            else ""
+        )
+        progress_pct = min(movie_num / total_movies, 1) * 100 if total_movies else 0
+        print(
+            f"  [{movie_num}/{total_movies or '?'}] ({progress_pct:.1f}%) {status} {title[:40]}{'...' if len(title) > 40 else ''} ({movie_num / elapsed:.1f} movies/s){eta_str}"
         )
 
-        end_time = time.perf_counter()
-        scrape_time = end_time - start_time
-
-        if result:
-            movie_data.append(result)
-            successful_scrapes += 1
-            status = "✅"
-            title = result.get("title", "Unknown")
-        else:
-            failed_scrapes += 1
-            status = "❌"
-            title = row.get("movie_id", "Unknown")
+    # Transform stage: encodes micro-batches of flush_size records or flush_interval seconds
+    async def transform_worker() -> None:
+        loop = asyncio.get_running_loop()
+        movie_data = []
+        deprecated_urls = []
+        deadline = None
+        while True:
+            is_due = False
+            try:
+                timeout = None if deadline is None else max(0, deadline - loop.time())
+                item = await asyncio.wait_for(result_queue.get(), timeout=timeout)
+            except asyncio.TimeoutError:
+                item, is_due = (), True  # The interval passed mid-crawl
+
+            if item:
+                row, result, is_deprecated = item
+                if result:
+                    movie_data.append(result)
+                if is_deprecated:
+                    deprecated_urls.append(
+                        {"movie_id": row["movie_id"], "url": row["url"]}
+                    )
+                if deadline is None:
+                    deadline = loop.time() + flush_interval
+
+            batch_size = len(movie_data) + len(deprecated_urls)
+            if is_due or batch_size >= flush_size or item is None:
+                if batch_size:
+                    movie_data_df = await asyncio.to_thread(
+                        transform_movie_data, movie_data=movie_data
+                    )
+                    await batch_queue.put((movie_data_df, deprecated_urls))
+                movie_data = []
+                deprecated_urls = []
+                deadline = None
+
+            if item is None:
+                await batch_queue.put(None)
+                return
+
+    # Write stage: saves each micro-batch and releases its URLs together
+    async def write_worker() -> None:
+        batch_num = 0
+        while True:
+            batch = await batch_queue.get()
+            if batch is None:
+                return
+            movie_data_df, deprecated_urls = batch
+
+            batch_num += 1
+            with CRAWL_TELEMETRY.measure(stage="write"):
+                batch_totals = await asyncio.to_thread(
+                    persist_batch,
+                    movie_data_df=movie_data_df,
+                    deprecated_urls=deprecated_urls,
+                    update_movie_data=update_movie_data,
+                    batch_num=batch_num,
+                    checkpoint=checkpoint,
+                )
+            for i, value in enumerate(batch_totals):
+                totals[i] += value
 
-        if is_deprecated:
-            deprecated_urls.append({"movie_id": row["movie_id"], "url": row["url"]})
-            status += " (deprecated)"
+    print(
+        f"🎬 Crawling {total_movies if total_movies is not None else 'queued'} movies with {num_workers} workers..."
+    )
 
-        # Calculate speed and ETA
-        elapsed_total = time.perf_counter() - start_time if idx == 0 else None
-        if movie_num > 1:
-            avg_time_per_movie = (
-                (time.perf_counter() - start_time) / movie_num
-                if idx == 0
-                else scrape_time
-            )
-            remaining_movies = total_movies - movie_num
-            eta_seconds = (
-                remaining_movies * avg_time_per_movie if avg_time_per_movie else 0
-            )
-            eta_str = (
-                f", ETA: {eta_seconds:.0f}s"
-                if eta_seconds > 0 and remaining_movies > 0
-                else ""
+    feeder = asyncio.create_task(feed_urls())
+    fetchers = [asyncio.create_task(fetch_worker()) for _ in range(num_workers)]
+    parsers = [asyncio.create_task(parse_worker()) for _ in range(num_workers)]
+    transformer = asyncio.create_task(transform_worker())
+    writer = asyncio.create_task(write_worker())
+
+    downstream = [*parsers, transformer, writer]
+    tasks = [feeder, *fetchers, *downstream]
+
+    # Waits for an awaitable unless a later stage fails first, since a dead stage
+    # would leave the ones before it blocked on its full queue
+    async def unless_downstream_fails(awaitable: Awaitable[Any]) -> Any:
+        waiter = asyncio.ensure_future(awaitable)
+        while True:
+            for task in downstream:
+                if task.done() and not task.cancelled() and task.exception():
+                    waiter.cancel()
+                    await asyncio.gather(waiter, return_exceptions=True)
+                    raise task.exception()
+            if waiter.done():
+                return waiter.result()
+
+            await asyncio.wait(
+                [waiter, *[task for task in downstream if not task.done()]],
+                return_when=asyncio.FIRST_COMPLETED,
             )
-        else:
-            eta_str = ""
 
-        # Progress logging
-        progress_pct = (movie_num / total_movies) * 100
-        print(
-            f"  [{movie_num}/{total_movies}] ({progress_pct:.1f}%) {status} {title[:40]}{'...' if len(title) > 40 else ''} ({scrape_time:.1f}s){eta_str}"
-        )
-
-        if show_objects and result:
-            print(f"    📋 Data: {result}")
+    try:
+        try:
+            await unless_downstream_fails(asyncio.gather(feeder, *fetchers))
+        finally:
+            # Stops the remaining fetchers after an error, then saves what was scraped
+            for task in [feeder, *fetchers]:
+                task.cancel()
+            await asyncio.gather(feeder, *fetchers, return_exceptions=True)
+            for _ in parsers:
+                await unless_downstream_fails(page_queue.put(None))
+            await unless_downstream_fails(asyncio.gather(*parsers))
+            await unless_downstream_fails(result_queue.put(None))
+            await unless_downstream_fails(asyncio.gather(transformer, writer))
+    finally:
+        # Nothing is left running if any stage failed
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    return tuple(totals)
+
+
+# Encodes scraped movie fields into the movie_data table format
+def transform_movie_data(movie_data: Sequence[Dict[str, Any]]) -> pd.DataFrame:
 
-    # Processes movie data
     movie_data_df = pd.DataFrame(movie_data)
     if not movie_data_df.empty:
         print(f"  🔧 Processing {len(movie_data_df)} scraped movies...")
-        movie_data_df["genres"] = movie_data_df["genres"].apply(
-            lambda genres: [genre.lower().replace(" ", "_") for genre in genres]
+        movie_data_df["genres"] = encode_genre_lists(
+            genre_lists=movie_data_df["genres"]
         )
-        movie_data_df["genres"] = movie_data_df["genres"].apply(encode_genres)
         movie_data_df["country_of_origin"] = movie_data_df["country_of_origin"].apply(
             assign_countries
         )
@@ -244,6 +360,18 @@ async def movie_crawl(
         print(f"  🏷️  Adding genre boolean columns...")
         movie_data_df = add_genre_boolean_columns(movie_data_df)
 
+    return movie_data_df
+
+
+# Saves a batch of transformed movies and marks deprecated URLs
+def persist_movie_batch(
+    movie_data_df: pd.DataFrame,
+    deprecated_urls: Sequence[Dict[str, str]],
+    update_movie_data: bool,
+    batch_num: int,
+    checkpoint: JobCheckpoint | None = None,
+) -> Tuple[int, int, int, int]:
+
     num_updates = 0
     num_success_batches = 0
     num_failure_batches = 0
@@ -251,20 +379,25 @@ async def movie_crawl(
 
     # Updates movie data and genres in database
     if update_movie_data:
+        batch_key = (
+            checkpoint.get_batch_key(name="batch", batch_num=batch_num)
+            if checkpoint is not None
+            else None
+        )
+        if checkpoint is not None and not movie_data_df.empty:
+            checkpoint.add_pending(
+                batch=batch_key, records=movie_data_df.to_dict(orient="records")
+            )
+
         try:
             if not movie_data_df.empty:
                 print(f"  💾 Saving {len(movie_data_df)} movies to database...")
-                database.update_movie_data(movie_data_df=movie_data_df)
-                num_updates = len(movie_data_df)
+                num_updates = save_movie_data(movie_data_df=movie_data_df)
                 print(f"  ✅ Successfully saved {num_updates} movies to database")
 
-                # Clean up: Delete successfully scraped URLs
-                scraped_movie_ids = movie_data_df["movie_id"].tolist()
-                print(f"  🗑️  Cleaning up {len(scraped_movie_ids)} scraped URLs...")
-                database.delete_scraped_movie_urls(scraped_movie_ids)
-                print(
-                    f"  ✅ Successfully removed {len(scraped_movie_ids)} URLs from scraping queue"
-                )
+                if checkpoint is not None:
+                    checkpoint.mark_flushed(batch=batch_key)
+                    checkpoint.mark_completed(keys=movie_data_df["movie_id"])
             else:
                 print(f"  ⚠️  No movie data to save to database")
 
@@ -283,6 +416,9 @@ async def movie_crawl(
                 print(
                     f"  ✅ Successfully marked {num_deprecated_marked} URLs as deprecated"
                 )
+
+                if checkpoint is not None:
+                    checkpoint.mark_completed(keys=deprecated_df["movie_id"])
             except Exception as e:
                 print(f"  ❌ Failed to mark deprecated URLs: {e}")
         else:
@@ -291,172 +427,204 @@ async def movie_crawl(
         print(f"  🚫 Skipping database update (update_movie_data=False)")
 
     print(
-        f"  📈 Batch {batch_num} summary: {successful_scrapes} ✅, {failed_scrapes} ❌, {len(deprecated_urls)} deprecated"
+        f"  📈 Batch {batch_num} summary: {len(movie_data_df)} ✅, {len(deprecated_urls)} deprecated"
     )
     return num_success_batches, num_updates, num_failure_batches, num_deprecated_marked
 
 
+# Saves scraped movies and removes their URLs from the scraping queue
+def save_movie_data(movie_data_df: pd.DataFrame) -> int:
+
+    database.update_movie_data(movie_data_df=movie_data_df)
+
+    # Clean up: Delete successfully scraped URLs
+    scraped_movie_ids = movie_data_df["movie_id"].tolist()
+    print(f"  🗑️  Cleaning up {len(scraped_movie_ids)} scraped URLs...")
+    database.delete_scraped_movie_urls(scraped_movie_ids)
+    print(
+        f"  ✅ Successfully removed {len(scraped_movie_ids)} URLs from scraping queue"
+    )
+
+    return len(movie_data_df)
+
+
+# Finds re-scraped movies whose values differ from the stored rows
+def find_changed_movies(
+    movie_data_df: pd.DataFrame, existing_df: pd.DataFrame
+) -> pd.DataFrame:
+
+    # Movies missing from the stored rows always count as changed
+    existing_df = existing_df.reindex(movie_data_df["movie_id"].astype(str).to_numpy())
+    changed = existing_df["movie_id"].isna().to_numpy()
+
+    for column in REFRESH_COLUMNS:
+        if column not in movie_data_df.columns or column not in existing_df.columns:
+            continue
+
+        new_values = movie_data_df[column]
+        old_values = existing_df[column]
+        if column == "genres":
+            differs = to_bitmasks(new_values) != to_bitmasks(old_values)
+        elif pd.api.types.is_numeric_dtype(new_values):
+            differs = ~np.isclose(
+                pd.to_numeric(new_values, errors="coerce").to_numpy(dtype=float),
+                pd.to_numeric(old_values, errors="coerce").to_numpy(dtype=float),
+                equal_nan=True,
+            )
+        else:
+            differs = (
+                new_values.astype(str).to_numpy() != old_values.astype(str).to_numpy()
+            )
+        changed |= np.asarray(differs)
+
+    return movie_data_df[changed]
+
+
+# Writes back only the refreshed movies whose values changed
+def persist_refresh_batch(
+    movie_data_df: pd.DataFrame,
+    deprecated_urls: Sequence[Dict[str, str]],
+    update_movie_data: bool,
+    batch_num: int,
+    checkpoint: JobCheckpoint | None,
+    existing_df: pd.DataFrame,
+    state: RefreshState,
+) -> Tuple[int, int, int, int]:
+
+    if movie_data_df.empty:
+        print(
+            f"  📈 Batch {batch_num} summary: 0 refreshed, {len(deprecated_urls)} gone"
+        )
+        return 1, 0, 0, len(deprecated_urls)
+
+    changed_df = find_changed_movies(
+        movie_data_df=movie_data_df, existing_df=existing_df
+    )
+    print(
+        f"  🔄 Batch {batch_num}: {len(changed_df)} of {len(movie_data_df)} refreshed movies changed"
+    )
+
+    if not update_movie_data:
+        print(f"  🚫 Skipping database update (update_movie_data=False)")
+        return 1, 0, 0, len(deprecated_urls)
+
+    try:
+        if not changed_df.empty:
+            changed_df = changed_df.assign(
+                updated_at=datetime.now(tz=timezone.utc).isoformat()
+            )
+            database.update_movie_data(movie_data_df=changed_df)
+            print(f"  ✅ Successfully saved {len(changed_df)} changed movies")
+    except Exception as e:
+        print(f"  ❌ Failed to save refreshed movies: {e}")
+        return 0, 0, 1, len(deprecated_urls)
+
+    # Unchanged movies count as refreshed too, so they drop down the queue
+    state.record(
+        movie_ids=movie_data_df["movie_id"],
+        rating_counts=movie_data_df["letterboxd_rating_count"],
+    )
+    state.save()
+
+    return 1, len(changed_df), 0, len(deprecated_urls)
+
+
+# Re-scrapes the stalest movies within a request budget
+async def refresh_movie_data(
+    budget: int,
+    show_objects: bool,
+    update_movie_data: bool,
+    num_workers: int,
+    flush_size: int,
+    flush_interval: float,
+) -> None:
+
+    start = time.perf_counter()
+    LETTERBOXD_HTTP_CACHE.enable_for_batch_job()
+    telemetry_task = CRAWL_TELEMETRY.start(job="refresh_movie_data")
+
+    existing_df = database.get_raw_movie_data()
+    existing_df.index = existing_df["movie_id"].astype(str)
+    state = RefreshState()
+    movie_ids = schedule_refresh(movie_data=existing_df, state=state, budget=budget)
+    movie_urls = existing_df.loc[movie_ids, ["movie_id", "url"]]
+
+    print(f"\n🔄 Refreshing movie data:")
+    print(f"   📊 Catalog size: {len(existing_df)}")
+    print(f"   🎯 Request budget: {budget}")
+    print(f"   👷 Workers: {num_workers}\n")
+
+    async with create_session() as session:
+        results = await movie_crawl(
+            movie_urls=movie_urls,
+            session=session,
+            show_objects=show_objects,
+            update_movie_data=update_movie_data,
+            num_workers=num_workers,
+            flush_size=flush_size,
+            flush_interval=flush_interval,
+            persist_batch=lambda **kwargs: persist_refresh_batch(
+                existing_df=existing_df, state=state, **kwargs
+            ),
+            revalidate=True,
+        )
+    _, num_changed, num_failure_batches, num_gone = results
+
+    print(f"🎯 REFRESH COMPLETE!")
+    print(f"═══════════════════════════════════════")
+    print(f"📊 Movies refreshed: {len(movie_urls)}")
+    print(f"✏️  Changed rows written: {num_changed}")
+    print(f"❌ Failed batches: {num_failure_batches}")
+    print(f"🗑️  Film pages gone: {num_gone}")
+    print(f"⏱️  Total time: {time.perf_counter() - start:.1f} seconds")
+    LETTERBOXD_HTTP_CACHE.report(job="refresh_movie_data")
+    FILM_PAGE_TIMINGS.report(job="refresh_movie_data")
+    CRAWL_TELEMETRY.finish(job="refresh_movie_data", task=telemetry_task)
+    print(f"═══════════════════════════════════════\n")
+
+
 # Gets Letterboxd data
 async def get_letterboxd_data(
     row: pd.DataFrame, session: aiohttp.ClientSession, verbose: bool
 ) -> Tuple[Dict[str, Any] | None, bool]:
 
-    movie_id = row["movie_id"]  # ID
-    url = row["url"]  # URL
+    text, is_deprecated = await fetch_letterboxd_page(row=row, session=session)
+    if text is None:
+        return None, is_deprecated
 
-    # Scrapes relevant Letterboxd data from each page if possible
-    try:
-        # Add small delay to be respectful to Letterboxd's servers
-        await asyncio.sleep(0.5)
-        async with session.get("https://letterboxd.com" + url, timeout=60) as response:
-
-            # Checks is URL is not found
-            if response.status == 404 or response.status == 410:
-                print(f"URL deprecated: {url} - status code: {response.status}")
+    # Parses the page off the event loop
+    return (
+        await run_parser(
+            parse_letterboxd_data, row["movie_id"], row["url"], text, verbose
+        ),
+        False,
+    )
 
-                return None, True
-            elif response.status != 200:
-                print(f"Failed to fetch {url} - status code:", response.status)
 
-                return None, False
+# Fetches a film page, returning its text and whether the URL is deprecated
+async def fetch_letterboxd_page(
+    row: pd.DataFrame, session: aiohttp.ClientSession, revalidate: bool = False
+) -> Tuple[str | None, bool]:
 
-            soup = BeautifulSoup(await response.text(), "html.parser")
-            script = str(soup.find("script", {"type": "application/ld+json"}))
-            script = script[52:-20]  # Trimmed to useful json data
-            try:
-                webData = json.loads(script)
-            except Exception as e:
-                print(f"Error while scraping {url} (JSON parsing): {e}")
+    url = row["url"]  # URL
 
-                return None, False
+    # Scrapes relevant Letterboxd data from each page if possible
+    try:
+        status, text = await fetch_page(
+            session=session, url=LETTERBOXD_URL + url, revalidate=revalidate
+        )
 
-            try:
-                title = webData["name"]  # Title
-                if verbose:
-                    print(f"Scraping {title}")
-                release_year = int(
-                    webData["releasedEvent"][0]["startDate"]
-                )  # Release year
-                runtime = int(
-                    re.search(
-                        r"(\d+)\s+mins", soup.find("p", {"class": "text-footer"}).text
-                    ).group(1)
-                )  # Runtime
-                rating = webData["aggregateRating"]["ratingValue"]  # Letterboxd rating
-                rating_count = webData["aggregateRating"][
-                    "ratingCount"
-                ]  # Letterboxd rating count
-                genre = webData["genre"]  # Genres
-                country = webData["countryOfOrigin"][0]["name"]  # Country of origin
-
-                # Extract language information
-                language = "English"  # Default to English
-                if "inLanguage" in webData:
-                    if (
-                        isinstance(webData["inLanguage"], list)
-                        and len(webData["inLanguage"]) > 0
-                    ):
-                        language = webData["inLanguage"][0]["name"]
-                    elif isinstance(webData["inLanguage"], dict):
-                        language = webData["inLanguage"]["name"]
-
-                        # If no language in JSON, try to find it in the HTML
-                if language == "English":
-                    # Look for language in text-slug elements (common pattern for language tags)
-                    language_elements = soup.find_all("a", {"class": "text-slug"})
-
-                    # First, look for "Primary Language" specifically
-                    primary_language_found = False
-                    for elem in language_elements:
-                        elem_text = elem.get_text().strip()
-                        # Check if this element is near a "Primary Language" label
-                        parent = elem.parent
-                        if parent:
-                            parent_text = parent.get_text()
-                            if "Primary Language" in parent_text:
-                                language = elem_text
-                                primary_language_found = True
-                                break
-
-                    # If no "Primary Language" found, look for just "Language"
-                    if not primary_language_found:
-                        for elem in language_elements:
-                            elem_text = elem.get_text().strip()
-                            # Check if this element is near a "Language" label (but not "Primary Language")
-                            parent = elem.parent
-                            if parent:
-                                parent_text = parent.get_text()
-                                if (
-                                    "Language" in parent_text
-                                    and "Primary Language" not in parent_text
-                                ):
-                                    language = elem_text
-                                    break
-
-                    # If still not found, look for any language mentions in text-slug elements
-                    if language == "English":
-                        for elem in language_elements:
-                            elem_text = elem.get_text().strip()
-                            # Check if it's a known language
-                            known_languages = [
-                                "Korean",
-                                "English",
-                                "Spanish",
-                                "French",
-                                "German",
-                                "Italian",
-                                "Japanese",
-                                "Chinese",
-                                "Russian",
-                                "Portuguese",
-                                "Hindi",
-                                "Arabic",
-                            ]
-                            if elem_text in known_languages:
-                                language = elem_text
-                                break
-
-                poster = webData["image"]  # Poster
-            except asyncio.TimeoutError:
-                # Catches timeout
-                print(f"Failed to scrape - timed out")
+        # Checks is URL is not found
+        if status == 404 or status == 410:
+            print(f"URL deprecated: {url} - status code: {status}")
 
-                return None, False
-            except aiohttp.ClientOSError as e:
-                print("Connection terminated by Letterboxd")
-                raise e
-            except:
-                # Catches movies with missing data
-                print(f"Failed to scrape {title} - missing data")
+            return None, True
+        elif status != 200:
+            print(f"Failed to fetch {url} - status code:", status)
 
-                return None, False
+            return None, False
 
-            try:
-                tmdb_url = soup.find("a", {"data-track-action": "TMDB"})["href"]
-                if "/movie/" in tmdb_url:  # Content type
-                    content_type = "movie"
-                else:
-                    content_type = "tv"
-            except Exception as e:
-                # Catches movies missing content type
-                print(f"Failed to scrape {title} - missing content type")
-
-                return None, False
-
-        return {
-            "movie_id": movie_id,
-            "url": url,
-            "title": title,
-            "content_type": content_type,
-            "release_year": release_year,
-            "runtime": runtime,
-            "letterboxd_rating": rating,
-            "letterboxd_rating_count": rating_count,
-            "genres": genre,
-            "country_of_origin": country,
-            "language": language,
-            "poster": poster,
-        }, False
+        return text, False
     except aiohttp.ClientOSError as e:
         print(f"Connection terminated by Letterboxd for {url}: {e}")
         raise e
@@ -470,38 +638,123 @@ async def get_letterboxd_data(
         return None, False
 
 
+# Parses Letterboxd data from a film page
+def parse_letterboxd_data(
+    movie_id: str, url: str, text: str, verbose: bool
+) -> Dict[str, Any] | None:
+
+    fields = parse_film_page(text=text)
+    if fields is None:
+        print(f"Error while scraping {url} (JSON parsing)")
+
+        return None
+
+    if verbose and fields["title"] is not None:
+        print(f"Scraping {fields['title']}")
+
+    # Catches movies with missing data
+    if any(fields[field] is None for field in MOVIE_DATA_FIELDS):
+        print(f"Failed to scrape {url} - missing data")
+
+        return None
+
+    # Catches movies missing content type
+    if fields["content_type"] is None:
+        print(f"Failed to scrape {fields['title']} - missing content type")
+
+        return None
+
+    return {
+        "movie_id": movie_id,
+        "url": url,
+        "title": fields["title"],
+        "content_type": fields["content_type"],
+        "release_year": fields["release_year"],
+        "runtime": fields["runtime"],
+        "letterboxd_rating": fields["letterboxd_rating"],
+        "letterboxd_rating_count": fields["letterboxd_rating_count"],
+        "genres": fields["genres"],
+        "country_of_origin": fields["country_of_origin"],
+        "language": fields["language"],
+        "poster": fields["poster"],
+    }
+
+
+# Streams queued URL pages, skipping checkpointed movies and stopping after num_movies
+def select_movie_urls(
+    url_pages: Iterable[pd.DataFrame],
+    num_movies: str | int,
+    checkpoint: JobCheckpoint | None,
+) -> Iterator[pd.DataFrame]:
+
+    remaining = None if num_movies == "all" else num_movies
+    for url_page in url_pages:
+        # Skips movies finished by an interrupted run
+        if checkpoint is not None and checkpoint.completed:
+            url_page = url_page[
+                ~url_page["movie_id"].astype(str).isin(checkpoint.completed)
+            ]
+        if remaining is not None:
+            url_page = url_page[:remaining]
+            remaining -= len(url_page)
+
+        if len(url_page) > 0:
+            yield url_page
+        if remaining == 0:
+            return
+
+
 async def main(
     clear_movie_data_cache: bool,
     num_movies: str | int,
     show_objects: bool,
     movie_url: str | None,
     update_movie_data: bool,
+    resume: bool = False,
+    num_workers: int = 8,
+    flush_size: int = 100,
+    flush_interval: float = 30.0,
+    refresh_budget: int | None = None,
 ) -> None:
 
-    start = time.perf_counter()
-
-    # Gets movie URLs
-    all_movie_urls = database.get_movie_urls()
+    # Refresh mode re-scrapes stale catalog movies instead of new URLs
+    if refresh_budget is not None:
+        await refresh_movie_data(
+            budget=refresh_budget,
+            show_objects=show_objects,
+            update_movie_data=update_movie_data,
+            num_workers=num_workers,
+            flush_size=flush_size,
+            flush_interval=flush_interval,
+        )
+        if clear_movie_data_cache and update_movie_data:
+            clear_backend_movie_data_cache()
+        return
 
-    # Filter out deprecated URLs
-    all_movie_urls = all_movie_urls[all_movie_urls["is_deprecated"] == False]
+    start = time.perf_counter()
+    LETTERBOXD_HTTP_CACHE.enable_for_batch_job()
+    telemetry_task = CRAWL_TELEMETRY.start(job="scrape_movie_data")
+
+    # Checkpoints only matter when scraped movies are being saved
+    checkpoint = (
+        JobCheckpoint(job="scrape_movie_data", resume=resume)
+        if update_movie_data
+        else None
+    )
 
-    # NEW: Remove URLs for movies that are already in movie_data to avoid re-scraping
-    try:
-        existing_movie_ids = set(database.get_raw_movie_data()["movie_id"].tolist())
-        before_filter = len(all_movie_urls)
-        all_movie_urls = all_movie_urls[
-            ~all_movie_urls["movie_id"].isin(existing_movie_ids)
-        ]
-        # Drop any accidental duplicate movie_id rows
-        all_movie_urls = all_movie_urls.drop_duplicates(subset=["movie_id"])
-        after_filter = len(all_movie_urls)
-        print(
-            f"🔍 Filtered out {before_filter - after_filter} already-scraped movies; {after_filter} URLs remain in queue"
-        )
-    except Exception as e:
-        print(f"⚠️  Could not filter existing movies: {e}")
+    # Saves batches left pending by an interrupted run
+    if checkpoint is not None:
+        for batch_key, records in list(checkpoint.pending.items()):
+            try:
+                print(f"💾 Saving pending {batch_key} from the interrupted run...")
+                pending_df = pd.DataFrame(records)
+                save_movie_data(movie_data_df=pending_df)
+                checkpoint.mark_flushed(batch=batch_key)
+                checkpoint.mark_completed(keys=pending_df["movie_id"])
+            except Exception as e:
+                print(f"  ❌ Failed to save pending {batch_key}: {e}")
 
+    # The queue is anti-joined in the database and streamed to the crawler
     if movie_url is not None:
         # Trims URL to match database format
         movie_url = movie_url.replace("https://letterboxd.com", "")
@@ -510,93 +763,61 @@ async def main(
         if not movie_url.endswith("/"):
             movie_url += "/"
 
-        movie_urls = all_movie_urls[all_movie_urls["url"] == movie_url]
-        if len(movie_urls) == 0:
+        movie_urls = list(database.iter_pending_movie_urls(url=movie_url))
+        total_movies = sum(len(url_page) for url_page in movie_urls)
+        if total_movies == 0:
             print("Movie url not in database")
-    elif num_movies == "all":
-        movie_urls = all_movie_urls
     else:
-        movie_urls = all_movie_urls[:num_movies]
-
-    # Creates URL batches
-    batch_size = 500
-    url_batches = [
-        movie_urls.iloc[i : i + batch_size]
-        for i in range(0, len(movie_urls), batch_size)
-    ]
-
-    # Processes each batch asynchronously
-    session_refresh = 5
-    results = []
+        movie_urls = database.iter_pending_movie_urls()
+        total_movies = database.count_pending_movie_urls()
+        if total_movies is not None and num_movies != "all":
+            total_movies = min(total_movies, num_movies)
+    movie_urls = select_movie_urls(
+        url_pages=movie_urls, num_movies=num_movies, checkpoint=checkpoint
+    )
 
-    total_movies = len(movie_urls)
-    total_batches = len(url_batches)
     print(f"\n🚀 Starting movie scraping process:")
-    print(f"   📊 Total movies to scrape: {total_movies}")
-    print(f"   📦 Total batches: {total_batches}")
-    print(f"   🔄 Session refresh every {session_refresh} batches")
-    print(f"   ⚡ Batch size: {batch_size} movies per batch\n")
-
-    # Set proper headers to avoid being blocked by Letterboxd
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
-        "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
-        "Accept-Language": "en-US,en;q=0.5",
-        "Accept-Encoding": "gzip, deflate",
-        "DNT": "1",
-        "Connection": "keep-alive",
-        "Upgrade-Insecure-Requests": "1",
-    }
-
-    session_num = 0
-    for i in range(0, len(url_batches), session_refresh):
-        session_num += 1
-        batches_in_session = url_batches[i : i + session_refresh]
-        movies_in_session = sum(len(batch) for batch in batches_in_session)
-
-        print(
-            f"🔗 Session {session_num}: Starting HTTP session for {len(batches_in_session)} batches ({movies_in_session} movies)"
+    print(
+        f"   📊 Total movies to scrape: {total_movies if total_movies is not None else 'unknown'}"
+    )
+    print(f"   👷 Workers: {num_workers}")
+    print(f"   ⚡ Save every {flush_size} movies or {flush_interval:g} seconds\n")
+
+    # Request pacing is handled by the shared adaptive rate limiter
+    async with create_session() as session:
+        results = await movie_crawl(
+            movie_urls=movie_urls,
+            session=session,
+            show_objects=show_objects,
+            update_movie_data=update_movie_data,
+            num_workers=num_workers,
+            flush_size=flush_size,
+            flush_interval=flush_interval,
+            verbose=False,
+            checkpoint=checkpoint,
+            total_movies=total_movies,
         )
 
-        connector = aiohttp.TCPConnector(limit=10, limit_per_host=2)
-        timeout = aiohttp.ClientTimeout(total=60, connect=10)
-        async with aiohttp.ClientSession(
-            headers=headers, connector=connector, timeout=timeout
-        ) as session:
-            tasks = [
-                movie_crawl(
-                    movie_urls=batch,
-                    session=session,
-                    show_objects=show_objects,
-                    update_movie_data=update_movie_data,
-                    verbose=False,
-                    batch_num=(i // session_refresh) * session_refresh + batch_idx + 1,
-                    total_batches=total_batches,
-                )
-                for batch_idx, batch in enumerate(batches_in_session)
-            ]
-            session_results = await asyncio.gather(*tasks)
-            results.extend(session_results)
-
-        print(f"✅ Session {session_num} completed\n")
-
     if update_movie_data:
-        num_success_batches = sum([r[0] for r in results])
-        num_updates = sum([r[1] for r in results])
-        num_failure_batches = sum([r[2] for r in results])
-        num_deprecated = sum([r[3] for r in results])
+        num_success_batches, num_updates, num_failure_batches, num_deprecated = results
 
         print(f"🎯 SCRAPING COMPLETE!")
         print(f"═══════════════════════════════════════")
-        print(f"📊 Total movies processed: {total_movies}")
+        print(f"📊 Total movies queued: {total_movies}")
         print(f"✅ Successfully saved: {num_updates} movies")
         print(f"📦 Successful batches: {num_success_batches}")
         print(f"❌ Failed batches: {num_failure_batches}")
         print(f"🗑️  Deprecated URLs found: {num_deprecated}")
-        if num_updates > 0:
+        if num_updates > 0 and total_movies:
             success_rate = (num_updates / total_movies) * 100
             print(f"📈 Success rate: {success_rate:.1f}%")
 
+        # Keeps the checkpoint until every batch has been saved
+        if num_failure_batches == 0 and not checkpoint.pending:
+            checkpoint.clear()
+        else:
+            print(f"🔁 Rerun with --resume to retry unsaved batches")
+
         # Show remaining URLs in queue
         try:
             remaining_urls = database.get_table_size("movie_urls")
@@ -608,20 +829,29 @@ async def main(
 
     finish = time.perf_counter()
     total_time = finish - start
-    movies_per_second = total_movies / total_time if total_time > 0 else 0
+    movies_per_second = (total_movies or 0) / total_time if total_time > 0 else 0
     print(f"⏱️  Total time: {total_time:.1f} seconds")
     print(f"🚀 Average speed: {movies_per_second:.2f} movies/second")
+    LETTERBOXD_HTTP_CACHE.report(job="scrape_movie_data")
+    FILM_PAGE_TIMINGS.report(job="scrape_movie_data")
+    CRAWL_TELEMETRY.finish(job="scrape_movie_data", task=telemetry_task)
     print(f"═══════════════════════════════════════\n")
 
     # Clears movie data cache
     if clear_movie_data_cache:
-        try:
-            url = f'{os.getenv("BACKEND_URL")}/api/admin/clear-movie-data-cache'
-            headers = {"Authorization": f'Bearer {os.getenv("ADMIN_SECRET_KEY")}'}
-            requests.post(url=url, headers=headers)
-            print("Successfully cleared movie data cache")
-        except Exception as e:
-            print("Failed to clear movie data cache")
+        clear_backend_movie_data_cache()
+
+
+# Asks the backend to drop its cached movie data
+def clear_backend_movie_data_cache() -> None:
+
+    try:
+        url = f'{os.getenv("BACKEND_URL")}/api/admin/clear-movie-data-cache'
+        headers = {"Authorization": f'Bearer {os.getenv("ADMIN_SECRET_KEY")}'}
+        requests.post(url=url, headers=headers)
+        print("Successfully cleared movie data cache")
+    except Exception as e:
+        print("Failed to clear movie data cache")
 
 
 if __name__ == "__main__":
@@ -669,6 +899,51 @@ if __name__ == "__main__":
         action="store_true",
     )
 
+    # Resume an interrupted run
+    parser.add_argument(
+        "-r",
+        "--resume",
+        help="Resumes from the checkpoint of an interrupted run.",
+        action="store_true",
+    )
+
+    # Number of crawler workers
+    parser.add_argument(
+        "-w",
+        "--workers",
+        type=int,
+        default=8,
+        help="Number of concurrent crawler workers.",
+    )
+
+    # Records per write
+    parser.add_argument(
+        "-b",
+        "--flush-size",
+        type=int,
+        default=100,
+        help="Saves scraped movies every n records.",
+    )
+
+    # Seconds between writes
+    parser.add_argument(
+        "-t",
+        "--flush-interval",
+        type=float,
+        default=30.0,
+        help="Saves scraped movies at least every t seconds.",
+    )
+
+    # Refresh mode
+    parser.add_argument(
+        "-R",
+        "--refresh",
+        type=int,
+        default=None,
+        metavar="BUDGET",
+        help="Re-scrapes up to BUDGET existing movies, stalest first.",
+    )
+
     args = parser.parse_args()
 
     asyncio.run(
@@ -678,5 +953,10 @@ if __name__ == "__main__":
             show_objects=args.show_objects,
             movie_url=args.movie_url,
             update_movie_data=args.update_movie_data,
+            resume=args.resume,
+            num_workers=args.workers,
+            flush_size=args.flush_size,
+            flush_interval=args.flush_interval,
+            refresh_budget=args.refresh,
         )
     )
@@ -1,31 +1,27 @@
 import aiohttp
 import argparse
 import asyncio
-from bs4 import BeautifulSoup, Tag
 import os
 import pandas as pd
 import sys
 import time
-from typing import Sequence, Tuple
+from typing import Any, Dict, Sequence, Tuple
 
 project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 sys.path.append(project_root)
 
+from data_processing.checkpoint import JobCheckpoint
 import data_processing.database as database
-
-
-RATINGS = {
-    "½": 0.5,
-    "★": 1,
-    "★½": 1.5,
-    "★★": 2,
-    "★★½": 2.5,
-    "★★★": 3,
-    "★★★½": 3.5,
-    "★★★★": 4,
-    "★★★★½": 4.5,
-    "★★★★★": 5,
-}
+from data_processing.event_loop import EventLoopBlockingMonitor, run_parser
+from data_processing.letterboxd_client import (
+    create_session,
+    fetch_page_text,
+    CRAWL_TELEMETRY,
+    LETTERBOXD_HTTP_CACHE,
+    LETTERBOXD_URL,
+)
+from data_processing.poster_parsing import parse_poster_grid
+from data_processing.progress import report_progress
 
 
 # Scrapes user ratings
@@ -45,23 +41,50 @@ async def get_user_ratings(
     urls = []
     unrated = []
 
-    pageNumber = 1  # Start scraping from page 1
-
-    # Asynchronously gathers the movie data
-    results = []
-    while True:
-        async with session.get(
-            f"https://letterboxd.com/{user}/films/page/{pageNumber}"
-        ) as page:
-            soup = BeautifulSoup(await page.text(), "html.parser")
-            movies = soup.select("li.poster-container")
-            if movies == []:  # Stops loop on empty page
-                break
-            tasks = [
-                get_rating(movie=movie, user=user, verbose=verbose) for movie in movies
-            ]
-            results.extend(await asyncio.gather(*tasks))
-            pageNumber += 1
+    base_url = f"{LETTERBOXD_URL}/{user}/films/page"
+    pages_scraped = 0
+
+    # Fetches a single films page and parses its posters in the parse pool
+    async def scrape_page(page_number: int) -> Tuple[Sequence[Tuple], int | None]:
+        nonlocal pages_scraped
+        text = await fetch_page_text(session=session, url=f"{base_url}/{page_number}")
+        posters, last_page = await run_parser(parse_poster_grid, text)
+
+        pages_scraped += 1
+        report_progress(
+            "ratings_page",
+            user=user,
+            pages_scraped=pages_scraped,
+            total_pages=last_page,
+        )
+
+        return [
+            get_rating(poster=poster, user=user, verbose=verbose) for poster in posters
+        ], last_page
+
+    async with EventLoopBlockingMonitor() as monitor:
+        # Reads the page count from the first page's pagination
+        results, last_page = await scrape_page(page_number=1)
+
+        if last_page is not None:
+            # Asynchronously scrapes the remaining pages, reassembled in page order
+            pages = await asyncio.gather(
+                *[
+                    scrape_page(page_number=page_number)
+                    for page_number in range(2, last_page + 1)
+                ]
+            )
+            for page_results, _ in pages:
+                results.extend(page_results)
+        elif results:
+            # Falls back to scraping until an empty page without pagination
+            page_number = 2
+            while True:
+                page_results, _ = await scrape_page(page_number=page_number)
+                if not page_results:  # Stops loop on empty page
+                    break
+                results.extend(page_results)
+                page_number += 1
 
     # Accumulates results
     for movie_id, rating, like, link, is_unrated in results:
@@ -112,34 +135,32 @@ async def get_user_ratings(
             print(f"Failed to update movie urls in database")
 
     finish = time.perf_counter()
-    print(f"Scraped {user}'s movie ratings in {finish - start} seconds")
+    print(
+        f"Scraped {user}'s movie ratings in {finish - start} seconds "
+        f"(event loop blocked {monitor.blocked_time:.3f} seconds)"
+    )
 
     return user_df, unrated
 
 
-# Scrapes rating for individual movie
-async def get_rating(
-    movie: Tag,
+# Gets rating for individual movie
+def get_rating(
+    poster: Dict[str, Any],
     user: str,
     verbose: bool = True,
-) -> Tuple[int, str | None, bool, str, bool]:
+) -> Tuple[int, float | None, bool, str, bool]:
 
-    movie_id = movie.div.get("data-film-id")  # id
-    title = movie.div.img.get("alt")  # title
+    title = poster["title"]
     if verbose:
         print(title)
-    like = True if movie.find("span", {"class": "like"}) is not None else False  # like
-    link = movie.div.get("data-target-link")  # link
-
-    try:
-        rating = RATINGS[movie.p.span.text.strip()]  # rating
 
-        return (int(movie_id), rating, like, link, False)
-    except:
+    if poster["rating"] is None:
         if verbose:
             print(f"{title} is not rated by {user}")
 
-        return (int(movie_id), None, like, link, True)
+        return (poster["movie_id"], None, poster["liked"], poster["url"], True)
+
+    return (poster["movie_id"], poster["rating"], poster["liked"], poster["url"], False)
 
 
 async def main(
@@ -150,6 +171,8 @@ async def main(
     update_ratings: bool,
     update_urls: bool,
     verbose: bool,
+    concurrent_users: int = 4,
+    resume: bool = False,
 ) -> None:
 
     if all:
@@ -157,12 +180,19 @@ async def main(
     else:
         users = users.split(",")
 
-    if output_path and os.path.exists(output_path):
+    checkpoint = JobCheckpoint(job="scrape_user_ratings", resume=resume)
+    LETTERBOXD_HTTP_CACHE.enable_for_batch_job()
+    telemetry_task = CRAWL_TELEMETRY.start(job="scrape_user_ratings")
+
+    if output_path and os.path.exists(output_path) and not resume:
         os.remove(output_path)
 
-    user_df_batch = []
-    for i, user in enumerate(users):
-        async with aiohttp.ClientSession() as session:
+    finished_user_dfs = asyncio.Queue(maxsize=2 * concurrent_users)
+    user_limit = asyncio.Semaphore(concurrent_users)
+
+    # Scrapes a user's ratings, bounded by the concurrent user limit
+    async def scrape_user(user: str, session: aiohttp.ClientSession) -> None:
+        async with user_limit:
             try:
                 user_df, _ = await get_user_ratings(
                     user=user,
@@ -171,35 +201,81 @@ async def main(
                     verbose=verbose,
                     update_urls=update_urls,
                 )
+            except Exception as e:
+                print(e)
+
+                return
 
-                if verbose:
-                    print(f"{user_df}")
-                user_df = user_df.drop(columns=["url"])
+        if verbose:
+            print(f"{user_df}")
+
+        await finished_user_dfs.put((user, user_df.drop(columns=["url"])))
+
+    # Writes each user's ratings as soon as they are scraped
+    async def write_user_dfs() -> None:
+        header = not (output_path and os.path.exists(output_path))
+        while True:
+            item = await finished_user_dfs.get()
+            if item is None:
+                break
+            user, user_df = item
+
+            # Persists the batch first so a crash before the write can replay it
+            if user not in checkpoint.pending:
+                await asyncio.to_thread(
+                    checkpoint.add_pending,
+                    batch=user,
+                    records=user_df.to_dict(orient="records"),
+                )
 
-                user_df_batch.append(user_df)
-                if len(user_df_batch) == 10 or i == len(users) - 1:
-                    combined_user_df_batch = pd.concat(user_df_batch, ignore_index=True)
+            if output_path:
+                user_df.to_csv(output_path, mode="a", index=False, header=header)
+                header = False
 
-                    if output_path:
-                        combined_user_df_batch.to_csv(
-                            output_path, mode="a", index=False, header=(i < 10)
+            if update_ratings:
+                try:
+                    with CRAWL_TELEMETRY.measure(stage="write"):
+                        await asyncio.to_thread(
+                            database.update_user_ratings, user_df=user_df
                         )
+                    print(f"Successfully updated {user}'s ratings in database")
+                except:
+                    print(f"Failed to update {user}'s ratings in database")
 
-                    if update_ratings:
-                        try:
-                            database.update_user_ratings(user_df=combined_user_df_batch)
-                            print(
-                                f"Successfully updated batch {i // 10} of user ratings in database"
-                            )
-                        except:
-                            print(
-                                f"Failed to updated batch {i // 10} of user ratings in database"
-                            )
+                    continue
 
-                    user_df_batch.clear()
+            await asyncio.to_thread(checkpoint.mark_flushed, batch=user)
+            await asyncio.to_thread(checkpoint.mark_completed, keys=[user])
 
-            except Exception as e:
-                print(e)
+    writer = asyncio.create_task(write_user_dfs())
+
+    # Writes batches left pending by an interrupted run before scraping again
+    for user, records in list(checkpoint.pending.items()):
+        await finished_user_dfs.put((user, pd.DataFrame(records)))
+
+    remaining_users = [
+        user
+        for user in users
+        if not checkpoint.is_completed(user) and user not in checkpoint.pending
+    ]
+    if resume:
+        print(f"Skipping {len(users) - len(remaining_users)} already scraped users")
+
+    async with create_session() as session:
+        await asyncio.gather(
+            *[scrape_user(user=user, session=session) for user in remaining_users]
+        )
+    await finished_user_dfs.put(None)
+    await writer
+
+    LETTERBOXD_HTTP_CACHE.report(job="scrape_user_ratings")
+    CRAWL_TELEMETRY.finish(job="scrape_user_ratings", task=telemetry_task)
+
+    # Keeps the checkpoint while any user still needs to be scraped or written
+    if checkpoint.pending or not checkpoint.completed.issuperset(users):
+        print(f"Some users were not saved, rerun with --resume to retry them")
+    else:
+        checkpoint.clear()
 
 
 if __name__ == "__main__":
@@ -244,6 +320,23 @@ if __name__ == "__main__":
         help="The users whose ratings to scrape. If including multiple users, format the input as a single comma-delimited string.",
     )
 
+    # Concurrent users
+    parser.add_argument(
+        "-cu",
+        "--concurrent-users",
+        type=int,
+        default=4,
+        help="The number of users to scrape concurrently.",
+    )
+
+    # Resume an interrupted run
+    parser.add_argument(
+        "-r",
+        "--resume",
+        help="Resume from the checkpoint of an interrupted run.",
+        action="store_true",
+    )
+
     # Verbosity
     parser.add_argument(
         "-v",
@@ -268,5 +361,7 @@ if __name__ == "__main__":
             update_ratings=args.update_ratings,
             update_urls=args.update_urls,
             verbose=args.verbose,
+            concurrent_users=args.concurrent_users,
+            resume=args.resume,
         )
     )
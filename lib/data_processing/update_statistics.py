@@ -1,4 +1,5 @@
 import asyncio
+import numpy as np
 import os
 import pandas as pd
 import sys
@@ -10,6 +11,7 @@ sys.path.append(project_root)
 
 from data_processing.calculate_user_statistics import get_user_statistics
 import data_processing.database as database
+from data_processing.letterboxd_client import CRAWL_TELEMETRY, LETTERBOXD_HTTP_CACHE
 from data_processing.utils import get_user_dataframe
 
 
@@ -17,6 +19,8 @@ from data_processing.utils import get_user_dataframe
 async def statistics_update() -> None:
 
     start = time.perf_counter()
+    LETTERBOXD_HTTP_CACHE.enable_for_batch_job()
+    telemetry_task = CRAWL_TELEMETRY.start(job="update_statistics")
 
     # Gets statistics users from database
     try:
@@ -25,9 +29,10 @@ async def statistics_update() -> None:
         print("Failed to get statistics users")
         raise e
 
-    # Gets movie data from database
+    # Gets movie data and its film id index from database
     try:
         movie_data = database.get_movie_data()
+        movie_index = database.get_movie_index()
     except Exception as e:
         print("Failed to get movie data")
         raise e
@@ -41,7 +46,9 @@ async def statistics_update() -> None:
     all_stats = {}
     for batch in batches:
         tasks = [
-            process_user_statistics_update(user=user, movie_data=movie_data)
+            process_user_statistics_update(
+                user=user, movie_data=movie_data, movie_index=movie_index
+            )
             for user in batch
         ]
         results = await asyncio.gather(*tasks)
@@ -49,23 +56,29 @@ async def statistics_update() -> None:
 
     # Updates user statistics in database
     try:
-        database.update_many_user_statistics(all_stats=all_stats, batch_size=100)
+        with CRAWL_TELEMETRY.measure(stage="write"):
+            database.update_many_user_statistics(all_stats=all_stats, batch_size=100)
         print(f"Successfully updated user statistics in database")
     except:
         print(f"Failed to update user statistics in database")
 
     finish = time.perf_counter()
     print(f"Updated statistics in {finish - start} seconds")
+    LETTERBOXD_HTTP_CACHE.report(job="update_statistics")
+    CRAWL_TELEMETRY.finish(job="update_statistics", task=telemetry_task)
 
 
 # Gets updated user stats
 async def process_user_statistics_update(
-    user: str, movie_data: pd.DataFrame
+    user: str, movie_data: pd.DataFrame, movie_index: Tuple[np.ndarray, np.ndarray]
 ) -> Tuple[str, Any]:
 
     try:
         user_df = await get_user_dataframe(
-            user=user, movie_data=movie_data, update_urls=False
+            user=user,
+            movie_data=movie_data,
+            update_urls=False,
+            movie_index=movie_index,
         )
         user_stats = await get_user_statistics(user_df=user_df)
         print(f"Successfully calculated {user}'s statistics")
@@ -1,10 +1,10 @@
-import aiohttp
 from dotenv import load_dotenv
 import json
+import numpy as np
 import os
 import pandas as pd
 import sys
-from typing import Dict, Sequence, Tuple
+from typing import Dict, Literal, Sequence, Tuple
 
 from upstash_redis import Redis
 
@@ -12,7 +12,9 @@ project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 sys.path.append(project_root)
 
 from data_processing import database
-
+from data_processing.genre_codec import GENRE_COLUMNS, GENRES, decode_genres
+from data_processing.letterboxd_client import create_session
+from data_processing.progress import report_progress
 from data_processing.scrape_user_ratings import get_user_ratings
 
 load_dotenv()
@@ -54,37 +56,66 @@ class WatchlistOverlapException(Exception):
         self.errors = errors
 
 
-GENRES = [
-    "action",
-    "adventure",
-    "animation",
-    "comedy",
-    "crime",
-    "documentary",
-    "drama",
-    "family",
-    "fantasy",
-    "history",
-    "horror",
-    "music",
-    "mystery",
-    "romance",
-    "science_fiction",
-    "tv_movie",
-    "thriller",
-    "war",
-    "western",
-]
+# Joins user ratings to movie data through the film id index
+def join_movie_data(
+    user_df: pd.DataFrame,
+    movie_data: pd.DataFrame,
+    movie_index: Tuple[np.ndarray, np.ndarray],
+    how: Literal["inner", "left"] = "inner",
+) -> pd.DataFrame:
+
+    film_ids, positions = movie_index
+
+    user_ids = user_df["movie_id"].to_numpy(dtype="int64")
+    user_urls = user_df["url"].astype(str).str.strip().to_numpy(dtype=object)
+
+    # Looks up each rated film id in the sorted catalog ids
+    if len(film_ids) > 0:
+        slots = np.minimum(np.searchsorted(film_ids, user_ids), len(film_ids) - 1)
+        matched = film_ids[slots] == user_ids
+        rows = np.where(matched, positions[slots], 0)
+    else:
+        matched = np.zeros(len(user_ids), dtype=bool)
+        rows = np.zeros(len(user_ids), dtype="int64")
+
+    # Requires the url to agree as well, matching the previous two-key merge
+    if len(movie_data) > 0:
+        catalog_urls = movie_data["url"].iloc[rows].to_numpy(dtype=object)
+        matched &= catalog_urls == user_urls
+
+    # Gathers catalog rows directly into rating order
+    keys = pd.DataFrame({"movie_id": user_ids.astype(str), "url": user_urls})
+    user_rows = user_df.drop(columns=["movie_id", "url"])
+    if how == "inner":
+        catalog_rows = movie_data.iloc[rows[matched]]
+        keys = keys.loc[matched]
+        user_rows = user_rows.loc[matched]
+    else:
+        catalog_rows = movie_data.iloc[rows].reset_index(drop=True)
+        catalog_rows = catalog_rows.where(pd.Series(matched), axis=0)
+
+    return pd.concat(
+        [
+            keys.reset_index(drop=True),
+            user_rows.reset_index(drop=True),
+            catalog_rows.drop(columns=["movie_id", "url"]).reset_index(drop=True),
+        ],
+        axis=1,
+    )
 
 
 # Gets user rating dataframe
 async def get_user_dataframe(
-    user: str, movie_data: pd.DataFrame, update_urls: bool, verbose: bool = False
+    user: str,
+    movie_data: pd.DataFrame,
+    update_urls: bool,
+    verbose: bool = False,
+    movie_index: Tuple[np.ndarray, np.ndarray] | None = None,
 ) -> pd.DataFrame:
 
     # Gets and processes the user data
     try:
-        async with aiohttp.ClientSession() as session:
+        async with create_session() as session:
             user_df, _ = await get_user_ratings(
                 user=user,
                 session=session,
@@ -93,27 +124,16 @@ async def get_user_dataframe(
                 update_urls=update_urls,
             )
 
-            # Ensure movie_id columns have the same type for merging
-        # Convert both to string and strip any whitespace
-        user_df["movie_id"] = user_df["movie_id"].astype(str).str.strip()
-        movie_data["movie_id"] = movie_data["movie_id"].astype(str).str.strip()
-
-        # Also ensure URL columns are consistent
-        user_df["url"] = user_df["url"].astype(str).str.strip()
-        movie_data["url"] = movie_data["url"].astype(str).str.strip()
+        # Builds an index when the caller passes movie data without one
+        if movie_index is None:
+            movie_index = database.build_movie_index(movie_data=movie_data)
 
         if verbose:
-            print(
-                f"User data: {len(user_df)} rows, movie_id type: {user_df['movie_id'].dtype}"
-            )
-            print(
-                f"Movie data: {len(movie_data)} rows, movie_id type: {movie_data['movie_id'].dtype}"
-            )
-            print(f"Sample user movie_ids: {user_df['movie_id'].head(3).tolist()}")
-            print(f"Sample movie movie_ids: {movie_data['movie_id'].head(3).tolist()}")
+            print(f"User data: {len(user_df)} rows")
+            print(f"Movie data: {len(movie_data)} rows")
 
-        processed_user_df = user_df.merge(
-            movie_data, how="left", on=["movie_id", "url"]
+        processed_user_df = join_movie_data(
+            user_df=user_df, movie_data=movie_data, movie_index=movie_index, how="left"
         )
         processed_user_df["rating_differential"] = (
             processed_user_df["user_rating"] - processed_user_df["letterboxd_rating"]
@@ -131,19 +151,10 @@ async def get_user_dataframe(
 # Converts genre integers into one-hot encoding
 def process_genres(row: pd.DataFrame) -> Dict[str, int]:
 
-    # Handle both string and integer inputs from database
-    genres_value = row["genres"]
-    if isinstance(genres_value, str):
-        # If it's a string, try to convert to int first
-        try:
-            genres_value = int(genres_value)
-        except ValueError:
-            # If conversion fails, assume it's 0 (no genres)
-            genres_value = 0
+    # Handles both string and integer inputs from database
+    flags = decode_genres(bitmasks=[row["genres"]])[0]
 
-    genre_binary = bin(genres_value)[2:].zfill(19)
-
-    return {f"is_{genre}": int(genre_binary[pos]) for pos, genre in enumerate(GENRES)}
+    return dict(zip(GENRE_COLUMNS, flags.tolist()))
 
 
 # Gets processed user df, unrated movies, and movie data
@@ -151,8 +162,9 @@ async def get_processed_user_df(
     user: str, update_urls: bool = True
 ) -> Tuple[pd.DataFrame, Sequence[int], pd.DataFrame]:
 
-    # Gets and processes movie data from the database
+    # Gets movie data and its film id index from the database
     movie_data = database.get_movie_data()
+    movie_index = database.get_movie_index()
 
     # Loads processed user df and unrated movies
     cache_key = f"user_df:{user}"
@@ -161,9 +173,10 @@ async def get_processed_user_df(
     if cached is not None:
         user_df, unrated = json.loads(cached)
         user_df = pd.DataFrame(user_df)
+        report_progress("ratings_loaded", user=user, cached=True)
     else:
         try:
-            async with aiohttp.ClientSession() as session:
+            async with create_session() as session:
                 user_df, unrated = await get_user_ratings(
                     user=user,
                     session=session,
@@ -179,25 +192,14 @@ async def get_processed_user_df(
             json.dumps((user_df.to_dict("records"), unrated)),
             ex=3600,
         )
-
-    # Ensure movie_id columns have the same type for merging
-    user_df["movie_id"] = user_df["movie_id"].astype(str).str.strip()
-    movie_data["movie_id"] = movie_data["movie_id"].astype(str).str.strip()
-
-    # Also ensure URL columns are consistent
-    user_df["url"] = user_df["url"].astype(str).str.strip()
-    movie_data["url"] = movie_data["url"].astype(str).str.strip()
+        report_progress("ratings_loaded", user=user, cached=False)
 
     try:
-        processed_user_df = user_df.merge(movie_data, on=["movie_id", "url"])
-    except Exception as e:
-        print(f"Error merging user and movie data: {e}")
-        print(
-            f"User data types: movie_id={user_df['movie_id'].dtype}, url={user_df['url'].dtype}"
-        )
-        print(
-            f"Movie data types: movie_id={movie_data['movie_id'].dtype}, url={movie_data['url'].dtype}"
+        processed_user_df = join_movie_data(
+            user_df=user_df, movie_data=movie_data, movie_index=movie_index
         )
+    except Exception as e:
+        print(f"Error joining user and movie data: {e}")
         raise e
 
     return processed_user_df, unrated, movie_data
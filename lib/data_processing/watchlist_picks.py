@@ -1,20 +1,39 @@
 import aiohttp
 import argparse
 import asyncio
-from bs4 import BeautifulSoup, Tag
-from itertools import chain
 import json
 import os
-import random
+import pandas as pd
 import sys
 import time
-from typing import Any, Dict, Literal, Sequence
+from typing import Any, Dict, Literal, Sequence, Tuple
 
 project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 sys.path.append(project_root)
 
+import data_processing.database as database
+from data_processing.event_loop import run_parser
+from data_processing.film_page_parsing import parse_film_page
+from data_processing.letterboxd_client import (
+    LETTERBOXD_URL,
+    LETTERBOXD_URL_PATTERN,
+    create_session,
+    fetch_page,
+    fetch_page_text,
+)
+from data_processing.poster_parsing import parse_poster_grid
+from data_processing.progress import report_progress
 from data_processing.utils import redis
-from model.recommender import merge_recommendations, recommend_n_watchlist_movies
+from data_processing.watchlist_pooling import (
+    WatchlistInterner,
+    pool_watchlists,
+    weighted_sample,
+)
+from model.recommender import recommend_watchlist_movies_for_users
+
+# Scraped film details for random picks outside the catalog
+FILM_METADATA_CACHE_PREFIX = "film_metadata:"
+FILM_METADATA_CACHE_TTL = 7 * 24 * 3600
 
 
 # Custom exceptions
@@ -43,11 +62,14 @@ async def get_user_watchlist_picks(
     pick_type: Literal["random", "recommendation"],
     model_type: Literal["personalized", "collaborative", "general"],
     num_picks: int,
+    min_overlap: int | None = None,
 ) -> Sequence[Dict[str, Any]]:
 
     # Verifies parameters
     if num_picks < 1:
         raise ValueError("Number of picks must be an integer greater than 0")
+    if min_overlap is not None and min_overlap < 1:
+        raise ValueError("Minimum overlap must be an integer greater than 0")
 
     # Asynchronously scrapes the user watchlists
     async def fetch_watchlist(
@@ -73,65 +95,55 @@ async def get_user_watchlist_picks(
                 ex=3600,
             )
 
+        report_progress(
+            "watchlist_loaded",
+            user=user,
+            num_movies=len(watchlist),
+            cached=cached is not None,
+        )
+
         return watchlist
 
     watchlists = []
-    async with aiohttp.ClientSession() as session:
+    async with create_session() as session:
         tasks = [fetch_watchlist(user=user, session=session) for user in user_list]
         watchlists = await asyncio.gather(*tasks)
 
-    # Creates appropriate watchlist pool
-    if overlap == "y":
-        # Finds common watchlist
-        watchlist_sets = [set(watchlist) for watchlist in watchlists]
-        watchlist_pool = list(set.intersection(*watchlist_sets))
+    # Interns each watchlist as a sorted array of film ids
+    interner = await asyncio.to_thread(WatchlistInterner.from_catalog)
+    watchlist_ids = [interner.intern(urls=watchlist) for watchlist in watchlists]
 
-        # Checks if overlap exists
-        if len(watchlist_pool) == 0:
-            raise WatchlistOverlapException("No movies in common across all watchlists")
-    else:
-        # Forms union of watchlists
-        watchlist_pool = list(chain(*watchlists))
+    # Keeps films on at least min_overlap watchlists, all of them for an overlap
+    if min_overlap is None:
+        min_overlap = len(user_list) if overlap == "y" else 1
+    min_overlap = max(1, min(min_overlap, len(user_list)))
+    pool_ids, pool_counts = pool_watchlists(
+        watchlists=watchlist_ids, min_count=min_overlap
+    )
 
-    # Randomly picks movies from watchlist pool
-    if pick_type == "random":
-        num_picks = min(num_picks, len(watchlist_pool))
-        picks = random.sample(watchlist_pool, num_picks) if watchlist_pool else []
+    # Checks if overlap exists
+    if len(pool_ids) == 0:
+        raise WatchlistOverlapException(
+            f"No movies in common across {min_overlap} of {len(user_list)} watchlists"
+        )
+    watchlist_pool = interner.urls(ids=pool_ids)
 
-        async with aiohttp.ClientSession() as session:
-            tasks = [get_letterboxd_data(url=url, session=session) for url in picks]
-            watchlist_picks = await asyncio.gather(*tasks)
+    # Randomly picks movies from watchlist pool, weighted by how many watchlists share them
+    if pick_type == "random":
+        picks = interner.urls(
+            ids=weighted_sample(ids=pool_ids, weights=pool_counts, num_picks=num_picks)
+        )
 
-        watchlist_picks = [pick for pick in watchlist_picks if pick is not None]
+        watchlist_picks = await get_pick_details(urls=picks)
     else:
-        if len(user_list) == 1:
-            watchlist_picks = await recommend_n_watchlist_movies(
-                num_recs=100,
-                user=user_list[0],
-                model_type=model_type,
-                watchlist_pool=watchlist_pool,
-            )
-            watchlist_picks = watchlist_picks["recommendations"].to_dict(
-                orient="records"
-            )
-
-        else:
-            tasks = [
-                recommend_n_watchlist_movies(
-                    num_recs=100,
-                    user=username,
-                    model_type=model_type,
-                    watchlist_pool=watchlist_pool,
-                )
-                for username in user_list
-            ]
-            all_recommendations = await asyncio.gather(*tasks)
-
-            # Merges recommendations
-            watchlist_picks = merge_recommendations(
-                num_recs=100, all_recommendations=all_recommendations
-            )
-            watchlist_picks = watchlist_picks.to_dict(orient="records")
+        # Scores the pool once for all users, reusing their cached models
+        watchlist_picks = await recommend_watchlist_movies_for_users(
+            num_recs=100,
+            users=user_list,
+            model_type=model_type,
+            watchlist_pool=watchlist_pool,
+        )
+        watchlist_picks = watchlist_picks.to_dict(orient="records")
 
     return watchlist_picks
 
@@ -141,27 +153,52 @@ async def get_watchlist(
     user: str, session: aiohttp.ClientSession = None
 ) -> Sequence[str]:
 
-    # Scrapes a single watchlist page
-    async def fetch_watchlist_page(page_number: int) -> Sequence[str]:
-        async with session.get(
-            f"https://letterboxd.com/{user}/watchlist/page/{page_number}"
-        ) as page:
-            soup = BeautifulSoup(await page.text(), "html.parser")
-            movies = soup.select("li.poster-container")
+    pages_scraped = 0
 
-            return [get_url(movie=movie) for movie in movies]
+    # Scrapes a single watchlist page and its page count
+    async def fetch_watchlist_page(
+        page_number: int,
+    ) -> Tuple[Sequence[str], int | None]:
+        nonlocal pages_scraped
+        text = await fetch_page_text(
+            session=session, url=f"{LETTERBOXD_URL}/{user}/watchlist/page/{page_number}"
+        )
+        posters, last_page = await run_parser(parse_poster_grid, text)
+
+        pages_scraped += 1
+        report_progress(
+            "watchlist_page",
+            user=user,
+            pages_scraped=pages_scraped,
+            total_pages=last_page,
+        )
 
-    watchlist = []
-    page_number = 1
+        return [get_url(poster=poster) for poster in posters], last_page
 
-    while True:
-        data = await fetch_watchlist_page(page_number=page_number)
-        if not data:  # Stops loop on empty page
-            break
+    # Reads the page count from the first page's pagination
+    watchlist, last_page = await fetch_watchlist_page(page_number=1)
 
-        # Extends watchlist with next page data
-        watchlist.extend(data)
-        page_number += 1
+    if last_page is not None:
+        # Scrapes the remaining pages concurrently under the per-host limit, in page order
+        pages = await asyncio.gather(
+            *[
+                fetch_watchlist_page(page_number=page_number)
+                for page_number in range(2, last_page + 1)
+            ]
+        )
+        for data, _ in pages:
+            watchlist.extend(data)
+    elif watchlist:
+        # Falls back to scraping until an empty page without pagination
+        page_number = 2
+        while True:
+            data, _ = await fetch_watchlist_page(page_number=page_number)
+            if not data:  # Stops loop on empty page
+                break
+
+            # Extends watchlist with next page data
+            watchlist.extend(data)
+            page_number += 1
 
     if not watchlist:
         raise WatchlistEmptyException(f"{user}'s watchlist is empty")
@@ -170,16 +207,81 @@ async def get_watchlist(
 
 
 # Gets movie url
-def get_url(movie: Tag) -> str:
+def get_url(poster: Dict[str, Any]) -> str:
 
-    if not movie:
+    if not poster:
         return None
 
-    url = movie.div.get("data-target-link")  # gets Letterboxd URL
+    url = poster["url"]  # gets Letterboxd URL
 
     return f"https://www.letterboxd.com{url}"
 
 
+# Gets pick details from the movie catalog, then the metadata cache, scraping the rest
+async def get_pick_details(urls: Sequence[str]) -> Sequence[Dict[str, Any]]:
+
+    details = dict.fromkeys(urls)
+
+    # Catalog films resolve in memory
+    try:
+        catalog, url_positions = await asyncio.to_thread(database.get_movie_url_index)
+        for url in urls:
+            position = url_positions.get(LETTERBOXD_URL_PATTERN.sub("", url))
+            if position is not None:
+                details[url] = get_catalog_pick(url=url, movie=catalog.iloc[position])
+    except Exception as e:
+        print(f"Failed to read the movie catalog: {e}")
+
+    # Films scraped for earlier picks are cached briefly
+    misses = [url for url in urls if details[url] is None]
+    if misses:
+        try:
+            cached = redis.mget(
+                *[f"{FILM_METADATA_CACHE_PREFIX}{url}" for url in misses]
+            )
+            for url, value in zip(misses, cached):
+                if value is not None:
+                    details[url] = json.loads(value)
+        except Exception as e:
+            print(f"Failed to read the film metadata cache: {e}")
+
+    # Only the remaining films are scraped, concurrently
+    misses = [url for url in urls if details[url] is None]
+    if misses:
+        async with create_session() as session:
+            scraped = await asyncio.gather(
+                *[get_letterboxd_data(url=url, session=session) for url in misses]
+            )
+        for url, pick in zip(misses, scraped):
+            if pick is None:
+                continue
+            details[url] = pick
+            try:
+                redis.set(
+                    f"{FILM_METADATA_CACHE_PREFIX}{url}",
+                    json.dumps(pick),
+                    ex=FILM_METADATA_CACHE_TTL,
+                )
+            except Exception as e:
+                print(f"Failed to cache metadata for {url}: {e}")
+
+    return [details[url] for url in urls if details[url] is not None]
+
+
+# Builds a pick from a catalog row, in the same shape as a scraped one
+def get_catalog_pick(url: str, movie: pd.Series) -> Dict[str, Any]:
+
+    return {
+        "url": url,
+        "title": str(movie["title"]),
+        "content_type": str(movie["content_type"]),
+        "release_year": (
+            None if pd.isna(movie["release_year"]) else int(movie["release_year"])
+        ),
+        "poster": None if pd.isna(movie["poster"]) else str(movie["poster"]),
+    }
+
+
 # Gets Letterboxd data
 async def get_letterboxd_data(
     url: str, session: aiohttp.ClientSession
@@ -187,52 +289,47 @@ async def get_letterboxd_data(
 
     # Scrapes relevant Letterboxd data from each page if possible
     try:
-        async with session.get(url, timeout=60) as response:
-            if response.status != 200:
-                print(f"Failed to fetch {url}, status code: {response.status}")
+        status, text = await fetch_page(session=session, url=url)
+        if status != 200:
+            print(f"Failed to fetch {url}, status code: {status}")
 
-                return None
+            return None
+    except:
+        print(f"Failed to scrape {url} - timed out")
 
-            soup = BeautifulSoup(await response.text(), "html.parser")
-            script = str(soup.find("script", {"type": "application/ld+json"}))
-            script = script[52:-20]  # Trimmed to useful json data
-            try:
-                webData = json.loads(script)
-            except:
-                print(f"Error while scraping {title}")
+        return None
 
-                return None
+    return await run_parser(parse_letterboxd_data, url, text)
 
-            try:
-                title = webData["name"]  # Title
-                release_year = int(
-                    webData["releasedEvent"][0]["startDate"]
-                )  # Release year
-                poster = webData["image"]  # Poster
-            except:
-                # Catches movies with missing data
-                print(f"Failed to scrape {title} - missing data")
 
-                return None
+# Parses Letterboxd data from a film page
+def parse_letterboxd_data(url: str, text: str) -> Dict[str, Any]:
 
-            try:
-                tmdb_url = soup.find("a", {"data-track-action": "TMDB"})["href"]
-                content_type = tmdb_url.split("/")[-3]  # Content type
-            except Exception as e:
-                # Catches movies missing content type
-                print(f"Failed to scrape {title} - missing content type")
-
-                return None
-
-            return {
-                "url": url,
-                "title": title,
-                "content_type": content_type,
-                "release_year": release_year,
-                "poster": poster,
-            }
-    except:
-        print(f"Failed to scrape {title} - timed out")
+    fields = parse_film_page(text=text)
+    if fields is None:
+        print(f"Error while scraping {url}")
+
+        return None
+
+    # Catches movies with missing data
+    if any(fields[field] is None for field in ["title", "release_year", "poster"]):
+        print(f"Failed to scrape {url} - missing data")
+
+        return None
+
+    # Catches movies missing content type
+    if fields["content_type"] is None:
+        print(f"Failed to scrape {fields['title']} - missing content type")
+
+        return None
+
+    return {
+        "url": url,
+        "title": fields["title"],
+        "content_type": fields["content_type"],
+        "release_year": fields["release_year"],
+        "poster": fields["poster"],
+    }
 
 
 async def main(
@@ -241,6 +338,7 @@ async def main(
     pick_type: Literal["random", "recommendation"] = "random",
     model_type: Literal["personalized", "collaborative", "general"] = "personalized",
     num_picks: int = 5,
+    min_overlap: int | None = None,
 ):
 
     watchlist_picks = await get_user_watchlist_picks(
@@ -249,6 +347,7 @@ async def main(
         pick_type=pick_type,
         model_type=model_type,
         num_picks=num_picks,
+        min_overlap=min_overlap,
     )
 
     return watchlist_picks
@@ -258,6 +357,15 @@ if __name__ == "__main__":
 
     parser = argparse.ArgumentParser()
 
+    # Minimum overlap
+    parser.add_argument(
+        "-k",
+        "--min-overlap",
+        type=int,
+        default=None,
+        help="Only consider movies that appear on at least this many watchlists. Overrides --overlap.",
+    )
+
     # Model type
     parser.add_argument(
         "-m",
@@ -312,6 +420,7 @@ if __name__ == "__main__":
                 pick_type=args.pick_type,
                 model_type=args.model_type,
                 num_picks=args.num_picks,
+                min_overlap=args.min_overlap,
             )
         )
     )
@@ -0,0 +1,144 @@
+import hashlib
+import numpy as np
+import os
+import pandas as pd
+import sys
+from typing import Dict, Iterable, Sequence, Tuple
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(project_root)
+
+import data_processing.database as database
+from data_processing.letterboxd_client import LETTERBOXD_URL_PATTERN
+
+
+# Normalizes a watchlist URL to the catalog's "/film/<slug>/" form
+def get_catalog_url(url: str) -> str:
+
+    return LETTERBOXD_URL_PATTERN.sub("", url)
+
+
+# Hashes a URL to a stable negative id, which can never clash with a film id
+def hash_url(url: str) -> int:
+
+    digest = hashlib.blake2b(get_catalog_url(url).encode("utf-8"), digest_size=8)
+
+    return -(int.from_bytes(digest.digest(), "big") & 0x7FFF_FFFF_FFFF_FFFF) - 1
+
+
+# Interns watchlist URLs as int64 ids and maps pooled ids back to URLs
+class WatchlistInterner:
+
+    def __init__(
+        self,
+        catalog_url_positions: pd.Series | None = None,
+        catalog_movie_ids: Sequence[str] | None = None,
+    ):
+        self.catalog_url_positions = catalog_url_positions
+        self.film_ids = (
+            None
+            if catalog_movie_ids is None
+            else pd.to_numeric(pd.Series(catalog_movie_ids), errors="coerce").to_numpy()
+        )
+        self.id_urls: Dict[int, str] = {}
+
+    # Builds an interner over the cached movie catalog, hashing every film if it is unavailable
+    @classmethod
+    def from_catalog(cls) -> "WatchlistInterner":
+
+        try:
+            catalog, url_positions = database.get_movie_url_index()
+        except Exception as e:
+            print(f"Failed to read the movie catalog: {e}")
+            return cls()
+
+        return cls(
+            catalog_url_positions=url_positions,
+            catalog_movie_ids=catalog["movie_id"].to_numpy(),
+        )
+
+    # Converts a watchlist to a sorted array of unique ids
+    def intern(self, urls: Iterable[str]) -> np.ndarray:
+
+        urls = list(urls)
+        ids = np.empty(len(urls), dtype=np.int64)
+        resolved = np.zeros(len(urls), dtype=bool)
+
+        # Catalog films keep their film id, looked up in one vectorized pass
+        if self.catalog_url_positions is not None and self.film_ids is not None:
+            positions = self.catalog_url_positions.reindex(
+                [get_catalog_url(url) for url in urls]
+            ).to_numpy()
+            found = ~pd.isna(positions)
+            film_ids = np.full(len(urls), np.nan)
+            film_ids[found] = self.film_ids[positions[found].astype(np.int64)]
+            resolved = ~np.isnan(film_ids)
+            ids[resolved] = film_ids[resolved].astype(np.int64)
+
+        for i in np.flatnonzero(~resolved):
+            ids[i] = hash_url(url=urls[i])
+
+        for film_id, url in zip(ids.tolist(), urls):
+            self.id_urls.setdefault(film_id, url)
+
+        return np.unique(ids)
+
+    # Converts pooled ids back to the URLs they were interned from
+    def urls(self, ids: Iterable[int]) -> Sequence[str]:
+
+        return [self.id_urls[film_id] for film_id in np.asarray(ids).tolist()]
+
+
+# Counts how many watchlists each film is on
+def count_watchlists(watchlists: Sequence[np.ndarray]) -> Tuple[np.ndarray, np.ndarray]:
+
+    if not watchlists:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+
+    # Each watchlist is already unique, so a film's count is its multiplicity
+    return np.unique(np.concatenate(watchlists), return_counts=True)
+
+
+# Pools films on at least min_count watchlists, with their multiplicity
+def pool_watchlists(
+    watchlists: Sequence[np.ndarray], min_count: int = 1
+) -> Tuple[np.ndarray, np.ndarray]:
+
+    ids, counts = count_watchlists(watchlists=watchlists)
+    keep = counts >= min_count
+
+    return ids[keep], counts[keep]
+
+
+# Films on every watchlist
+def intersect_watchlists(watchlists: Sequence[np.ndarray]) -> np.ndarray:
+
+    ids, _ = pool_watchlists(watchlists=watchlists, min_count=len(watchlists))
+
+    return ids
+
+
+# Films on any watchlist, each once
+def union_watchlists(watchlists: Sequence[np.ndarray]) -> np.ndarray:
+
+    ids, _ = pool_watchlists(watchlists=watchlists, min_count=1)
+
+    return ids
+
+
+# Samples distinct pool entries, favouring films shared by more watchlists
+def weighted_sample(
+    ids: np.ndarray,
+    weights: np.ndarray,
+    num_picks: int,
+    rng: np.random.Generator | None = None,
+) -> np.ndarray:
+
+    rng = rng or np.random.default_rng()
+    num_picks = min(num_picks, len(ids))
+    if num_picks == 0:
+        return ids[:0]
+
+    weights = np.asarray(weights, dtype=float)
+
+    return rng.choice(ids, size=num_picks, replace=False, p=weights / weights.sum())
@@ -4,7 +4,6 @@ import os
 import sys
 from tqdm import tqdm
 
-
 project_root = os.path.dirname((os.path.join(os.path.dirname(__file__), "../..")))
 sys.path.append(project_root)
 
@@ -1,8 +1,14 @@
+import asyncio
+from collections import OrderedDict
+from functools import lru_cache
+import hashlib
 import numpy as np
 import os
 import pandas as pd
+from sklearn.ensemble import RandomForestRegressor
 import sys
-from typing import Any, Dict, Literal, Sequence
+import threading
+from typing import Any, Dict, Literal, Sequence, Tuple
 
 project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 sys.path.append(project_root)
@@ -19,6 +25,65 @@ from model.personalized_model import (
     train_personalized_model,
 )
 
+from data_processing.progress import report_progress
+from data_processing.watchlist_pooling import get_catalog_url
+
+# Personalized models kept in memory, least recently used evicted first
+USER_MODEL_CACHE_SIZE = int(os.getenv("USER_MODEL_CACHE_SIZE", "32"))
+
+_user_models: OrderedDict[str, Tuple[str, RandomForestRegressor]] = OrderedDict()
+_user_models_lock = threading.Lock()
+
+
+# Fingerprints the ratings a personalized model is trained on
+def get_ratings_fingerprint(processed_user_df: pd.DataFrame) -> str:
+
+    hashes = pd.util.hash_pandas_object(
+        processed_user_df[["movie_id", "user_rating"]], index=False
+    )
+
+    return hashlib.blake2b(hashes.to_numpy().tobytes(), digest_size=16).hexdigest()
+
+
+# Loads the general model once per process
+@lru_cache(maxsize=1)
+def get_general_model() -> RandomForestRegressor:
+
+    return load_general_model()
+
+
+# Gets a user's model, retraining a personalized one only when their ratings change
+def get_recommendation_model(
+    user: str,
+    model_type: Literal["personalized", "collaborative", "general"],
+    processed_user_df: pd.DataFrame,
+) -> RandomForestRegressor:
+
+    if model_type == "general":
+        return get_general_model()
+    elif model_type != "personalized":
+        raise ValueError(f"Unsupported model type: {model_type}")
+
+    fingerprint = get_ratings_fingerprint(processed_user_df=processed_user_df)
+    with _user_models_lock:
+        cached = _user_models.get(user)
+        if cached is not None and cached[0] == fingerprint:
+            _user_models.move_to_end(user)
+            report_progress("model_ready", user=user, cached=True)
+            return cached[1]
+
+    model, _, _, _, _ = train_personalized_model(user_df=processed_user_df)
+    print(f"Created {user}'s personalized recommendation model")
+    report_progress("model_ready", user=user, cached=False)
+
+    with _user_models_lock:
+        _user_models[user] = (fingerprint, model)
+        _user_models.move_to_end(user)
+        while len(_user_models) > USER_MODEL_CACHE_SIZE:
+            _user_models.popitem(last=False)
+
+    return model
+
 
 # Gets recommendations
 async def recommend_n_movies(
@@ -41,12 +106,10 @@ async def recommend_n_movies(
     # Loads processed user df, unrated movies, and movie data
     processed_user_df, unrated, movie_data = await get_processed_user_df(user=user)
 
-    # Trains recommendation model on processed user data
-    if model_type == "personalized":
-        model, _, _, _, _ = train_personalized_model(user_df=processed_user_df)
-        print(f"Created {user}'s personalized recommendation model")
-    elif model_type == "general":
-        model = load_general_model()
+    # Gets recommendation model trained on processed user data
+    model = get_recommendation_model(
+        user=user, model_type=model_type, processed_user_df=processed_user_df
+    )
 
     # Finds movies not seen by the user
     initial_mask = (
@@ -113,6 +176,8 @@ async def recommend_n_movies(
             "No movies fit the selected filter criteria"
         )
 
+    report_progress("scoring", users=[user], num_candidates=len(unseen))
+
     # Prepares unseen feature data
     if model_type == "personalized":
         X_unseen = prepare_personalized_features(X=unseen)
@@ -152,12 +217,10 @@ async def recommend_n_watchlist_movies(
     # Loads processed user df and movie data
     processed_user_df, _, movie_data = await get_processed_user_df(user=user)
 
-    # Trains recommendation model on processed user data
-    if model_type == "personalized":
-        model, _, _, _, _ = train_personalized_model(user_df=processed_user_df)
-        print(f"Created {user}'s personalized recommendation model")
-    elif model_type == "general":
-        model = load_general_model()
+    # Gets recommendation model trained on processed user data
+    model = get_recommendation_model(
+        user=user, model_type=model_type, processed_user_df=processed_user_df
+    )
 
     # Collects movies on watchlist
     watchlist_pool = [
@@ -281,7 +344,7 @@ async def recommend_movies_by_category(
 
     # Prepare features & load model
     X_unseen = prepare_general_features(X=unseen)
-    model = load_general_model()
+    model = get_general_model()
 
     predicted_ratings = model.predict(X_unseen)
     unseen["predicted_rating"] = np.clip(predicted_ratings, 0.5, 5).astype("float32")
@@ -296,6 +359,80 @@ async def recommend_movies_by_category(
     return recommendations.iloc[:num_recs]
 
 
+# Scores a watchlist pool for every user in one pass and ranks it by mean predicted rating
+async def recommend_watchlist_movies_for_users(
+    num_recs: int,
+    users: Sequence[str],
+    model_type: Literal["personalized", "collaborative", "general"],
+    watchlist_pool: Sequence[str],
+) -> pd.DataFrame:
+
+    # Verifies parameters
+    if num_recs < 1:
+        raise ValueError("Number of recommendations must be an integer greater than 0")
+
+    # Resolves the pool to catalog rows once for all users
+    movie_data, url_positions = database.get_movie_url_index()
+    positions = url_positions.reindex(
+        [get_catalog_url(url) for url in watchlist_pool]
+    ).dropna()
+    watchlist_movies = movie_data.iloc[positions.astype(np.int64).unique()]
+
+    if len(watchlist_movies) == 0:
+        raise WatchlistMoviesMissingException(
+            f"No movies on {', '.join(users)}'s watchlist"
+        )
+
+    # Scores the candidates once per model, giving a users x movies matrix
+    if model_type == "general":
+        X_watchlist = prepare_general_features(X=watchlist_movies)
+        report_progress(
+            "scoring", users=list(users), num_candidates=len(watchlist_movies)
+        )
+        scores = get_general_model().predict(X_watchlist)[np.newaxis, :]
+    else:
+        X_watchlist = prepare_personalized_features(X=watchlist_movies)
+        user_dfs = await asyncio.gather(
+            *[get_processed_user_df(user=user) for user in users]
+        )
+        models = await asyncio.gather(
+            *[
+                asyncio.to_thread(
+                    get_recommendation_model,
+                    user=user,
+                    model_type=model_type,
+                    processed_user_df=processed_user_df,
+                )
+                for user, (processed_user_df, _, _) in zip(users, user_dfs)
+            ]
+        )
+        report_progress(
+            "scoring", users=list(users), num_candidates=len(watchlist_movies)
+        )
+        scores = np.vstack([model.predict(X_watchlist) for model in models])
+
+    # Averages the trimmed ratings across users and keeps the top movies
+    predicted_ratings = np.clip(scores, 0.5, 5).astype("float32").mean(axis=0)
+    top = np.argsort(-predicted_ratings, kind="stable")[:num_recs]
+
+    recommendations = watchlist_movies.iloc[top][
+        ["title", "poster", "release_year", "url"]
+    ].copy()
+    recommendations.insert(3, "predicted_rating", predicted_ratings[top])
+
+    # Matches the single and merged recommendation formats
+    if len(users) == 1:
+        recommendations["predicted_rating"] = recommendations["predicted_rating"].apply(
+            lambda x: "{:.2f}".format(round(x, 2))
+        )
+    else:
+        recommendations["predicted_rating"] = (
+            recommendations["predicted_rating"].astype(float).round(2)
+        )
+
+    return recommendations
+
+
 # Merges recommendations for multiple users
 def merge_recommendations(
     num_recs: int, all_recommendations: Sequence[Dict[str, Any]]
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+
+import aiohttp
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+# Add project root to path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(project_root)
+
+from data_processing import event_loop, letterboxd_client
+from data_processing import scrape_user_ratings
+from data_processing.event_loop import EventLoopBlockingMonitor, run_parser
+from letterboxd_fixture_server import start_fixture_server
+
+
+# Parses inline on the event loop, as the scrapers did before
+async def run_inline(parser, *args):
+
+    return parser(*args)
+
+
+# Scrapes one profile and reports the event loop blocking time
+async def measure(label: str, num_pages: int) -> None:
+
+    async with aiohttp.ClientSession() as session:
+        async with EventLoopBlockingMonitor() as monitor:
+            start = time.perf_counter()
+            user_df, unrated = await scrape_user_ratings.get_user_ratings(
+                user="benchmark",
+                session=session,
+                exclude_liked=True,
+                verbose=False,
+                update_urls=False,
+            )
+            elapsed = time.perf_counter() - start
+
+    print(
+        f"{label:<13} {elapsed:6.2f} s total  "
+        f"blocked {monitor.blocked_time:6.3f} s  "
+        f"longest block {monitor.max_block * 1000:6.1f} ms  "
+        f"posters {len(user_df) + len(unrated)} / {num_pages} pages"
+    )
+
+
+async def main(num_pages: int, latency: float, port: int) -> None:
+
+    runner = await start_fixture_server(port=port, num_pages=num_pages, latency=latency)
+    letterboxd_client.LETTERBOXD_URL = f"http://127.0.0.1:{port}"
+    letterboxd_client.MAX_REQUESTS_PER_HOST = 8
+
+    # The local server needs no pacing, so the limiter is opened up
+    limiter = letterboxd_client.LETTERBOXD_RATE_LIMITER
+    limiter.rate = limiter.max_rate = limiter.burst = 1000.0
+
+    # Every run must download and parse the pages again
+    letterboxd_client.LETTERBOXD_HTTP_CACHE.enabled = False
+
+    try:
+        scrape_user_ratings.run_parser = run_inline
+        await measure(label="inline", num_pages=num_pages)
+
+        scrape_user_ratings.run_parser = run_parser
+        await measure(label="thread pool", num_pages=num_pages)
+
+        event_loop.PARSE_POOL = "process"
+        event_loop._parse_executor = None
+        await measure(label="process pool", num_pages=num_pages)
+    finally:
+        await runner.cleanup()
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser()
+
+    parser.add_argument("-n", "--num-pages", type=int, default=20)
+    parser.add_argument("-l", "--latency", type=float, default=0.05)
+    parser.add_argument("-p", "--port", type=int, default=8787)
+
+    args = parser.parse_args()
+
+    asyncio.run(main(num_pages=args.num_pages, latency=args.latency, port=args.port))
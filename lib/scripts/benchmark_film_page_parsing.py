@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+
+import argparse
+from bs4 import BeautifulSoup
+import json
+import os
+import re
+import sys
+import time
+from typing import Any, Callable, Dict
+
+# Add project root to path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(project_root)
+
+from data_processing.film_page_parsing import extract_language_from_soup
+from data_processing.scrape_movie_data import parse_letterboxd_data
+
+FIXTURES_DIR = os.path.join(project_root, "test", "fixtures", "letterboxd")
+
+
+# Parses a film page through a full soup and position slicing, as before
+def legacy_parse_letterboxd_data(text: str) -> Dict[str, Any]:
+
+    soup = BeautifulSoup(text, "html.parser")
+    script = str(soup.find("script", {"type": "application/ld+json"}))
+    webData = json.loads(script[52:-20])
+
+    language = "English"
+    if isinstance(webData.get("inLanguage"), list) and webData["inLanguage"]:
+        language = webData["inLanguage"][0]["name"]
+    if language == "English":
+        language = extract_language_from_soup(soup=soup)
+
+    tmdb_url = soup.find("a", {"data-track-action": "TMDB"})["href"]
+
+    return {
+        "title": webData["name"],
+        "runtime": int(
+            re.search(
+                r"(\d+)\s+mins", soup.find("p", {"class": "text-footer"}).text
+            ).group(1)
+        ),
+        "language": language,
+        "content_type": "movie" if "/movie/" in tmdb_url else "tv",
+    }
+
+
+# Times a parser over repeated calls and returns milliseconds per page
+def time_parser(parser: Callable[[], Any], num_runs: int) -> float:
+
+    parser()
+    start = time.perf_counter()
+    for _ in range(num_runs):
+        parser()
+
+    return (time.perf_counter() - start) / num_runs * 1000
+
+
+def main(num_runs: int) -> None:
+
+    with open(os.path.join(FIXTURES_DIR, "film_page.html"), "r") as f:
+        text = f.read()
+
+    legacy = legacy_parse_letterboxd_data(text=text)
+    fast = parse_letterboxd_data(
+        movie_id="426406", url="/film/parasite-2019/", text=text, verbose=False
+    )
+    assert all(fast[field] == value for field, value in legacy.items())
+
+    # Markup the patterns do not expect forces the soup fallback
+    fallback_text = text.replace(
+        '<script type="application/ld+json">',
+        '<script  type="application/ld+json">',
+    )
+    assert parse_letterboxd_data("426406", "/film/x/", fallback_text, False)
+
+    legacy_ms = time_parser(lambda: legacy_parse_letterboxd_data(text=text), num_runs)
+    fast_ms = time_parser(
+        lambda: parse_letterboxd_data("426406", "/film/x/", text, False), num_runs
+    )
+    fallback_ms = time_parser(
+        lambda: parse_letterboxd_data("426406", "/film/x/", fallback_text, False),
+        num_runs,
+    )
+
+    print(f"full soup       {legacy_ms:7.2f} ms/page")
+    print(f"fast path       {fast_ms:7.2f} ms/page  ({legacy_ms / fast_ms:.0f}x)")
+    print(f"soup fallback   {fallback_ms:7.2f} ms/page")
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser()
+
+    parser.add_argument("-n", "--num-runs", type=int, default=200)
+
+    args = parser.parse_args()
+
+    main(num_runs=args.num_runs)
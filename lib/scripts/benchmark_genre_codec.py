@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+
+import argparse
+import numpy as np
+import os
+import pandas as pd
+import sys
+import time
+from typing import Sequence
+
+# Add project root to path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(project_root)
+
+from data_processing.genre_codec import (
+    GENRE_COLUMNS,
+    GENRES,
+    add_genre_columns,
+    encode_genre_lists,
+)
+
+
+# Encodes genres through "0"/"1" strings, as encode_genres did before
+def legacy_encode_genres(genres: Sequence[str]) -> int:
+
+    genre_binary = ""
+    for genre in GENRES:
+        genre_binary += "1" if genre in genres else "0"
+
+    return int(genre_binary, 2)
+
+
+# Decodes genres cell by cell, as add_genre_boolean_columns did before
+def legacy_add_genre_boolean_columns(df: pd.DataFrame) -> pd.DataFrame:
+
+    for genre in GENRES:
+        df[f"is_{genre}"] = 0
+
+    for idx, row in df.iterrows():
+        genres_int = row["genres"]
+        if pd.isna(genres_int) or genres_int == 0:
+            continue
+
+        genre_binary = bin(int(genres_int))[2:].zfill(19)
+        for i, genre in enumerate(GENRES):
+            df.loc[idx, f"is_{genre}"] = int(genre_binary[i])
+
+    return df
+
+
+# Creates scraped genre lists like the ones on Letterboxd film pages
+def create_genre_lists(num_rows: int) -> Sequence[Sequence[str]]:
+
+    rng = np.random.default_rng(0)
+    names = [genre.replace("_", " ").title() for genre in GENRES]
+
+    return [
+        list(rng.choice(names, size=rng.integers(0, 4), replace=False))
+        for _ in range(num_rows)
+    ]
+
+
+def main(num_rows: int, legacy_rows: int) -> None:
+
+    genre_lists = create_genre_lists(num_rows=num_rows)
+
+    # Legacy encoding needs the names normalized first
+    start = time.perf_counter()
+    legacy_bitmasks = np.array(
+        [
+            legacy_encode_genres(
+                genres=[genre.lower().replace(" ", "_") for genre in genres]
+            )
+            for genres in genre_lists
+        ]
+    )
+    legacy_encode = time.perf_counter() - start
+
+    start = time.perf_counter()
+    bitmasks = encode_genre_lists(genre_lists=genre_lists)
+    encode = time.perf_counter() - start
+    assert (bitmasks == legacy_bitmasks).all()
+
+    # The cell-by-cell decoder is too slow for every row, so it is scaled up
+    legacy_df = pd.DataFrame({"genres": bitmasks[:legacy_rows]})
+    start = time.perf_counter()
+    legacy_add_genre_boolean_columns(df=legacy_df)
+    legacy_decode = (time.perf_counter() - start) * num_rows / legacy_rows
+
+    df = pd.DataFrame({"genres": bitmasks})
+    start = time.perf_counter()
+    add_genre_columns(df=df)
+    decode = time.perf_counter() - start
+    assert (
+        df[GENRE_COLUMNS].iloc[:legacy_rows].to_numpy()
+        == legacy_df[GENRE_COLUMNS].to_numpy()
+    ).all()
+
+    print(f"{num_rows} rows")
+    print(
+        f"encode  legacy {legacy_encode * 1000:9.1f} ms  codec {encode * 1000:7.1f} ms"
+    )
+    print(
+        f"decode  legacy {legacy_decode * 1000:9.1f} ms  codec {decode * 1000:7.1f} ms"
+        f"  (legacy extrapolated from {legacy_rows} rows)"
+    )
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser()
+
+    parser.add_argument("-n", "--num-rows", type=int, default=100_000)
+    parser.add_argument("-l", "--legacy-rows", type=int, default=2_000)
+
+    args = parser.parse_args()
+
+    main(num_rows=args.num_rows, legacy_rows=args.legacy_rows)
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+
+import argparse
+import numpy as np
+import os
+import pandas as pd
+import sys
+import time
+from typing import Any, Dict
+
+# Add project root to path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(project_root)
+
+from data_processing.calculate_user_statistics import get_average_genre_ratings
+from data_processing.genre_codec import GENRE_COLUMNS, GENRES
+
+
+# Averages each genre through a masked copy of the user frame, as before
+def legacy_get_average_genre_ratings(
+    user_df: pd.DataFrame,
+) -> Dict[str, Dict[str, Any]]:
+
+    genre_averages = {genre: {} for genre in GENRES}
+    for genre in genre_averages:
+        temp = user_df.loc[user_df[f"is_{genre}"] == 1]
+        genre_averages[genre]["mean_user_rating"] = round(temp["user_rating"].mean(), 3)
+        genre_averages[genre]["mean_rating_differential"] = round(
+            temp["rating_differential"].mean(), 3
+        )
+        genre_averages[genre]["std_user_rating"] = round(temp["user_rating"].std(), 3)
+
+    for key in genre_averages:
+        for subkey in genre_averages[key]:
+            if pd.isna(genre_averages[key][subkey]):
+                genre_averages[key][subkey] = "N/A"
+
+    return genre_averages
+
+
+# Creates a rated films frame like the one a user profile joins to movie data
+def create_user_df(
+    num_rows: int, seed: int, unmatched_share: float = 0.0
+) -> pd.DataFrame:
+
+    rng = np.random.default_rng(seed)
+    user_df = pd.DataFrame(
+        rng.random((num_rows, len(GENRES))) < 0.15, columns=GENRE_COLUMNS
+    ).astype("int8")
+    user_df["user_rating"] = rng.integers(1, 11, num_rows) / 2
+    user_df["letterboxd_rating"] = rng.uniform(1, 5, num_rows).round(2)
+    user_df["rating_differential"] = (
+        user_df["user_rating"] - user_df["letterboxd_rating"]
+    )
+
+    # Films missing from the catalog have no movie columns after the left join
+    unmatched = rng.random(num_rows) < unmatched_share
+    user_df[GENRE_COLUMNS] = user_df[GENRE_COLUMNS].astype("float64")
+    user_df.loc[
+        unmatched, GENRE_COLUMNS + ["letterboxd_rating", "rating_differential"]
+    ] = np.nan
+
+    return user_df
+
+
+# Times a function over repeated calls and returns milliseconds per call
+def time_function(function, num_runs: int) -> float:
+
+    function()
+    start = time.perf_counter()
+    for _ in range(num_runs):
+        function()
+
+    return (time.perf_counter() - start) / num_runs * 1000
+
+
+def main(num_users: int, num_rows: int) -> None:
+
+    user_dfs = [create_user_df(num_rows=num_rows, seed=seed) for seed in range(20)]
+    user_dfs += [
+        create_user_df(num_rows=num_rows, seed=seed, unmatched_share=0.05)
+        for seed in range(20, 30)
+    ]
+    user_dfs.append(create_user_df(num_rows=num_rows, seed=30, unmatched_share=1.0))
+
+    # Keys the legacy version also computes must match, up to rounding ties
+    for user_df in user_dfs:
+        legacy = legacy_get_average_genre_ratings(user_df=user_df)
+        vectorized = get_average_genre_ratings(user_df=user_df)
+        for genre, averages in legacy.items():
+            for key, value in averages.items():
+                assert vectorized[genre]["count"] == int(
+                    (user_df[f"is_{genre}"] == 1).sum()
+                ), (genre, "count")
+                if value == "N/A":
+                    assert vectorized[genre][key] == value, (genre, key)
+                else:
+                    assert abs(vectorized[genre][key] - value) <= 0.001 + 1e-9, (
+                        genre,
+                        key,
+                    )
+
+    user_df = user_dfs[0]
+    legacy_ms = time_function(
+        lambda: legacy_get_average_genre_ratings(user_df=user_df), num_runs=50
+    )
+    vectorized_ms = time_function(
+        lambda: get_average_genre_ratings(user_df=user_df), num_runs=50
+    )
+
+    print(f"{num_rows} rated films per user")
+    print(f"masked copies   {legacy_ms:7.3f} ms/user")
+    print(
+        f"matrix product  {vectorized_ms:7.3f} ms/user  ({legacy_ms / vectorized_ms:.0f}x)"
+    )
+    print(
+        f"{num_users} users: {legacy_ms * num_users / 1000:.1f} s before, "
+        f"{vectorized_ms * num_users / 1000:.1f} s now"
+    )
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser()
+
+    parser.add_argument("-u", "--num-users", type=int, default=10_000)
+    parser.add_argument("-n", "--num-rows", type=int, default=1_000)
+
+    args = parser.parse_args()
+
+    main(num_users=args.num_users, num_rows=args.num_rows)
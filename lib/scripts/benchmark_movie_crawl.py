@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+
+import argparse
+import asyncio
+from contextlib import redirect_stdout
+import io
+import os
+import pandas as pd
+import sys
+import time
+
+# Add project root to path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(project_root)
+
+from data_processing import letterboxd_client
+from data_processing.letterboxd_client import create_session
+from data_processing.scrape_movie_data import movie_crawl
+from letterboxd_fixture_server import start_fixture_server
+
+
+# Crawls the film pages with a given worker count and reports throughput
+async def measure(movie_urls: pd.DataFrame, num_workers: int) -> None:
+
+    async with create_session() as session:
+        start = time.perf_counter()
+
+        # Keeps the crawler's progress output out of the report
+        with redirect_stdout(io.StringIO()):
+            await movie_crawl(
+                movie_urls=movie_urls,
+                session=session,
+                show_objects=False,
+                update_movie_data=False,
+                num_workers=num_workers,
+            )
+        elapsed = time.perf_counter() - start
+
+    print(
+        f"{num_workers:>3} workers  {len(movie_urls) / elapsed:8.1f} movies/s  "
+        f"({elapsed:.2f} s for {len(movie_urls)} movies)"
+    )
+
+
+async def main(
+    port: int,
+    num_movies: int,
+    workers: str,
+    latency: float,
+    jitter: float,
+    per_host_limit: int,
+) -> None:
+
+    runner = await start_fixture_server(port=port, latency=latency, jitter=jitter)
+    letterboxd_client.LETTERBOXD_URL = f"http://127.0.0.1:{port}"
+    letterboxd_client.LETTERBOXD_HTTP_CACHE.enabled = False
+    letterboxd_client.MAX_REQUESTS_PER_HOST = per_host_limit
+
+    # The local server needs no pacing, so the limiter is opened up
+    limiter = letterboxd_client.LETTERBOXD_RATE_LIMITER
+    limiter.rate = limiter.max_rate = limiter.burst = 1000.0
+
+    movie_urls = pd.DataFrame(
+        {
+            "movie_id": [str(i) for i in range(num_movies)],
+            "url": [f"/film/film-{i}/" for i in range(num_movies)],
+        }
+    )
+
+    try:
+        for num_workers in [int(count) for count in workers.split(",")]:
+            await measure(movie_urls=movie_urls, num_workers=num_workers)
+    finally:
+        await runner.cleanup()
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser()
+
+    parser.add_argument("-p", "--port", type=int, default=8789)
+    parser.add_argument("-n", "--num-movies", type=int, default=400)
+    parser.add_argument("-w", "--workers", default="1,2,4,8,16,32")
+    parser.add_argument("-l", "--latency", type=float, default=0.1)
+    parser.add_argument("-j", "--jitter", type=float, default=0.05)
+    parser.add_argument(
+        "-hl",
+        "--per-host-limit",
+        type=int,
+        default=32,
+        help="In-flight request cap per host (production uses 4).",
+    )
+
+    args = parser.parse_args()
+
+    asyncio.run(
+        main(
+            port=args.port,
+            num_movies=args.num_movies,
+            workers=args.workers,
+            latency=args.latency,
+            jitter=args.jitter,
+            per_host_limit=args.per_host_limit,
+        )
+    )
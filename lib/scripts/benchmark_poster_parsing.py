@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+
+import argparse
+from bs4 import BeautifulSoup
+import os
+import sys
+import time
+
+# Add project root to path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(project_root)
+
+from data_processing.poster_parsing import parse_poster_grid, RATINGS
+
+FIXTURES_DIR = os.path.join(project_root, "test", "fixtures", "letterboxd")
+
+
+# Previous full-page parse followed by per-poster tree traversals
+def full_soup_parse(text: str) -> int:
+
+    soup = BeautifulSoup(text, "html.parser")
+    movies = soup.select("li.poster-container")
+    for movie in movies:
+        movie.div.get("data-film-id")
+        movie.div.img.get("alt")
+        movie.find("span", {"class": "like"})
+        movie.div.get("data-target-link")
+        try:
+            RATINGS[movie.p.span.text.strip()]
+        except:
+            pass
+
+    return len(movies)
+
+
+# Strained parse of poster containers and pagination only
+def strained_parse(text: str) -> int:
+
+    posters, _ = parse_poster_grid(text=text)
+
+    return len(posters)
+
+
+# Times a parser over a page
+def measure(label: str, parse, text: str, repeats: int) -> float:
+
+    start = time.perf_counter()
+    for _ in range(repeats):
+        num_posters = parse(text)
+    elapsed = (time.perf_counter() - start) / repeats
+
+    print(f"  {label:<16} {elapsed * 1000:8.2f} ms/page  posters {num_posters}")
+
+    return elapsed
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser()
+
+    parser.add_argument("-d", "--fixtures-dir", default=FIXTURES_DIR)
+    parser.add_argument("-n", "--repeats", type=int, default=20)
+
+    args = parser.parse_args()
+
+    for name in ["films_page.html", "watchlist_page.html", "list_page.html"]:
+        with open(os.path.join(args.fixtures_dir, name), "r") as f:
+            text = f.read()
+
+        print(f"{name} ({len(text) / 1024:.0f} KiB)")
+        full = measure("full soup", full_soup_parse, text, args.repeats)
+        strained = measure("strained", strained_parse, text, args.repeats)
+        print(f"  speedup          {full / strained:8.2f}x")
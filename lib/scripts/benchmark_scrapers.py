@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+
+import argparse
+import asyncio
+from contextlib import redirect_stdout
+import io
+import numpy as np
+import os
+import sys
+import time
+from typing import Awaitable, Callable, Sequence
+
+# Add project root to path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(project_root)
+
+from data_processing import letterboxd_client
+from data_processing.letterboxd_client import create_session
+from data_processing.scrape_letterboxd_list import get_letterboxd_list
+from data_processing.scrape_movie_data import get_letterboxd_data
+from data_processing.scrape_user_ratings import get_user_ratings
+from data_processing.watchlist_picks import get_watchlist
+from letterboxd_fixture_server import start_fixture_server
+
+
+# Runs scrape calls concurrently and reports throughput and tail latency
+async def measure(
+    label: str, calls: Sequence[Callable[[], Awaitable]], concurrency: int
+) -> None:
+
+    limit = asyncio.Semaphore(concurrency)
+    latencies = []
+    errors = 0
+
+    async def run(call: Callable[[], Awaitable]) -> None:
+        nonlocal errors
+        async with limit:
+            start = time.perf_counter()
+            try:
+                await call()
+            except Exception:
+                errors += 1
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+
+    # Keeps the scrapers' progress output out of the report
+    with redirect_stdout(io.StringIO()):
+        await asyncio.gather(*[run(call) for call in calls])
+    elapsed = time.perf_counter() - start
+
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99]) * 1000
+    print(
+        f"{label:<13} {len(calls) / elapsed:8.1f} calls/s  "
+        f"p50 {p50:7.1f} ms  p95 {p95:7.1f} ms  p99 {p99:7.1f} ms  "
+        f"errors {errors}/{len(calls)}"
+    )
+
+
+async def main(
+    port: int,
+    latency: float,
+    jitter: float,
+    error_rate: float,
+    throttle_rate: float,
+    num_pages: int,
+    num_calls: int,
+    concurrency: int,
+    rate_limit: float | None,
+) -> None:
+
+    runner = await start_fixture_server(
+        port=port,
+        latency=latency,
+        jitter=jitter,
+        error_rate=error_rate,
+        throttle_rate=throttle_rate,
+        num_pages=num_pages,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    letterboxd_client.LETTERBOXD_URL = base_url
+    letterboxd_client.LETTERBOXD_HTTP_CACHE.enabled = False
+
+    # Without a fixed rate the limiter is opened up to measure the scrapers alone
+    limiter = letterboxd_client.LETTERBOXD_RATE_LIMITER
+    limiter.rate = limiter.max_rate = rate_limit or 1000.0
+    limiter.burst = max(1.0, limiter.rate)
+
+    users = [f"user{i}" for i in range(num_calls)]
+    try:
+        async with create_session() as session:
+            await measure(
+                label="user ratings",
+                calls=[
+                    lambda user=user: get_user_ratings(
+                        user=user,
+                        session=session,
+                        exclude_liked=True,
+                        verbose=False,
+                        update_urls=False,
+                    )
+                    for user in users
+                ],
+                concurrency=concurrency,
+            )
+            await measure(
+                label="watchlists",
+                calls=[
+                    lambda user=user: get_watchlist(user=user, session=session)
+                    for user in users
+                ],
+                concurrency=concurrency,
+            )
+            await measure(
+                label="lists",
+                calls=[
+                    lambda user=user: get_letterboxd_list(
+                        list_url=f"{base_url}/{user}/list/favourites/",
+                        session=session,
+                    )
+                    for user in users
+                ],
+                concurrency=concurrency,
+            )
+            await measure(
+                label="film pages",
+                calls=[
+                    lambda i=i: get_letterboxd_data(
+                        row={"movie_id": str(i), "url": f"/film/film-{i}/"},
+                        session=session,
+                        verbose=False,
+                    )
+                    for i in range(num_calls * num_pages)
+                ],
+                concurrency=concurrency,
+            )
+    finally:
+        print(f"Server responses: {dict(runner.app['stats'])}")
+        await runner.cleanup()
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser()
+
+    parser.add_argument("-p", "--port", type=int, default=8788)
+    parser.add_argument("-l", "--latency", type=float, default=0.05)
+    parser.add_argument("-j", "--jitter", type=float, default=0.05)
+    parser.add_argument("-e", "--error-rate", type=float, default=0.0)
+    parser.add_argument("-t", "--throttle-rate", type=float, default=0.0)
+    parser.add_argument("-n", "--num-pages", type=int, default=5)
+    parser.add_argument("-c", "--num-calls", type=int, default=20)
+    parser.add_argument("-w", "--concurrency", type=int, default=4)
+    parser.add_argument(
+        "-r",
+        "--rate-limit",
+        type=float,
+        default=None,
+        help="Fixes the limiter's maximum requests per second.",
+    )
+
+    args = parser.parse_args()
+
+    asyncio.run(
+        main(
+            port=args.port,
+            latency=args.latency,
+            jitter=args.jitter,
+            error_rate=args.error_rate,
+            throttle_rate=args.throttle_rate,
+            num_pages=args.num_pages,
+            num_calls=args.num_calls,
+            concurrency=args.concurrency,
+            rate_limit=args.rate_limit,
+        )
+    )
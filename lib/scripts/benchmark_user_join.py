@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+
+import argparse
+import numpy as np
+import os
+import pandas as pd
+import sys
+import time
+import tracemalloc
+
+# Add project root to path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(project_root)
+
+from data_processing.database import build_movie_index
+from data_processing.utils import GENRES, join_movie_data
+
+
+# Creates a synthetic catalog shaped like movie_data
+def make_movie_data(num_movies: int, rng: np.random.Generator) -> pd.DataFrame:
+
+    movie_ids = rng.choice(10_000_000, size=num_movies, replace=False)
+    movie_data = pd.DataFrame(
+        {
+            "movie_id": movie_ids.astype(str),
+            "url": pd.Series([f"/film/film-{i}/" for i in movie_ids], dtype="string"),
+            "title": pd.Series([f"Film {i}" for i in movie_ids], dtype="string"),
+            "release_year": rng.integers(1920, 2025, size=num_movies),
+            "runtime": rng.integers(60, 200, size=num_movies),
+            "country_of_origin": rng.integers(0, 16, size=num_movies),
+            "content_type": "movie",
+            "letterboxd_rating": rng.uniform(1, 5, size=num_movies).round(2),
+            "letterboxd_rating_count": rng.integers(10, 1_000_000, size=num_movies),
+            "poster": pd.Series(["https://a.ltrbxd.com/poster.jpg"] * num_movies),
+        }
+    )
+    for genre in GENRES:
+        movie_data[f"is_{genre}"] = rng.integers(0, 2, size=num_movies)
+
+    return movie_data
+
+
+# Creates a synthetic user rating frame drawn mostly from the catalog
+def make_user_df(
+    movie_data: pd.DataFrame, num_ratings: int, rng: np.random.Generator
+) -> pd.DataFrame:
+
+    sample = movie_data.sample(n=num_ratings, random_state=0)
+    user_df = pd.DataFrame(
+        {
+            "movie_id": sample["movie_id"].astype("int").to_numpy(),
+            "user_rating": rng.choice(np.arange(0.5, 5.5, 0.5), size=num_ratings),
+            "url": sample["url"].to_numpy(),
+            "username": "benchmark",
+        }
+    )
+
+    # Some rated films are missing from the catalog
+    user_df.loc[user_df.index[::10], "movie_id"] += 10_000_000
+    user_df["url"] = user_df["url"].astype("string")
+
+    return user_df
+
+
+# Previous string-normalizing merge
+def string_merge(user_df: pd.DataFrame, movie_data: pd.DataFrame) -> pd.DataFrame:
+
+    user_df = user_df.copy()
+    user_df["movie_id"] = user_df["movie_id"].astype(str).str.strip()
+    movie_data["movie_id"] = movie_data["movie_id"].astype(str).str.strip()
+    user_df["url"] = user_df["url"].astype(str).str.strip()
+    movie_data["url"] = movie_data["url"].astype(str).str.strip()
+
+    return user_df.merge(movie_data, on=["movie_id", "url"])
+
+
+# Times and traces memory for a join function
+def measure(label: str, repeats: int, join) -> pd.DataFrame:
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    for _ in range(repeats):
+        result = join()
+    finish = time.perf_counter()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(
+        f"{label:<16} {(finish - start) / repeats * 1000:8.2f} ms/join  "
+        f"peak {peak / 1024 / 1024:7.2f} MiB  rows {len(result)}"
+    )
+
+    return result
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser()
+
+    parser.add_argument("-m", "--num-movies", type=int, default=100_000)
+    parser.add_argument("-r", "--num-ratings", type=int, default=2_000)
+    parser.add_argument("-n", "--repeats", type=int, default=20)
+
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    movie_data = make_movie_data(num_movies=args.num_movies, rng=rng)
+    user_df = make_user_df(movie_data=movie_data, num_ratings=args.num_ratings, rng=rng)
+
+    start = time.perf_counter()
+    movie_index = build_movie_index(movie_data=movie_data)
+    print(f"Built film id index in {(time.perf_counter() - start) * 1000:.2f} ms")
+
+    merged = measure(
+        "string merge",
+        args.repeats,
+        lambda: string_merge(user_df=user_df, movie_data=movie_data.copy()),
+    )
+    gathered = measure(
+        "index gather",
+        args.repeats,
+        lambda: join_movie_data(
+            user_df=user_df, movie_data=movie_data, movie_index=movie_index
+        ),
+    )
+
+    # Verifies both joins select the same ratings
+    assert merged["movie_id"].tolist() == gathered["movie_id"].tolist()
+    assert np.allclose(merged["user_rating"], gathered["user_rating"])
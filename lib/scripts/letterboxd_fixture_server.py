@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+
+import aiohttp
+from aiohttp import web
+import argparse
+import asyncio
+from collections import Counter
+from functools import lru_cache
+import os
+import random
+import re
+import sys
+
+# Add project root to path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(project_root)
+
+from data_processing.letterboxd_client import HEADERS
+
+FIXTURES_DIR = os.path.join(project_root, "test", "fixtures", "letterboxd")
+RECORDINGS_DIR = os.path.join(FIXTURES_DIR, "recorded")
+
+# Synthetic page templates by URL class
+PAGE_ROUTES = [
+    (re.compile(r"^/[^/]+/films/(?:page/(\d+)/?)?$"), "films_page.html"),
+    (re.compile(r"^/[^/]+/watchlist/(?:page/(\d+)/?)?$"), "watchlist_page.html"),
+    (re.compile(r"^/[^/]+/list/[^/]+/?(?:page/(\d+)/?)?$"), "list_page.html"),
+]
+FILM_ROUTE = re.compile(r"^/film/([^/]+)/?$")
+FIXTURE_FILM_SLUG = "parasite-2019"
+
+
+# Reads a fixture page once per process
+@lru_cache(maxsize=None)
+def read_fixture(name: str) -> str:
+
+    with open(os.path.join(FIXTURES_DIR, name), "r") as f:
+        return f.read()
+
+
+# Gets the file a recorded page is stored under
+def get_recording_path(path: str, recordings_dir: str) -> str:
+
+    key = path.strip("/").replace("/", "__") or "index"
+
+    return os.path.join(recordings_dir, f"{key}.html")
+
+
+# Renders one page of a poster grid fixture with its own films and pagination
+@lru_cache(maxsize=1024)
+def render_grid_page(template: str, path_prefix: str, page: int, num_pages: int) -> str:
+
+    text = read_fixture(template)
+
+    # Pages past the last one have an empty grid, as on Letterboxd
+    if page > num_pages:
+        return re.sub(
+            r'<ul class="poster-list.*?</ul>\s*<div class="pagination">.*?</section>',
+            "</section>",
+            text,
+            flags=re.S,
+        )
+
+    pagination = (
+        f'<div class="paginate-pages"><ul><li class="paginate-page">'
+        f'<a href="{path_prefix}page/{num_pages}/">{num_pages}</a></li></ul></div>'
+        if num_pages > 1
+        else ""
+    )
+    text = re.sub(r'<div class="paginate-pages">.*?</div>', pagination, text)
+
+    # Gives every page distinct film ids and slugs
+    if page > 1:
+        offset = (page - 1) * 1_000_000
+        text = re.sub(
+            r'data-film-id="(\d+)"',
+            lambda match: f'data-film-id="{int(match.group(1)) + offset}"',
+            text,
+        )
+        text = re.sub(
+            r'data-target-link="/film/([^/"]+)/"',
+            lambda match: f'data-target-link="/film/{match.group(1)}-p{page}/"',
+            text,
+        )
+
+    return text
+
+
+# Renders the film page fixture for any film slug
+@lru_cache(maxsize=4096)
+def render_film_page(slug: str) -> str:
+
+    return read_fixture("film_page.html").replace(FIXTURE_FILM_SLUG, slug)
+
+
+# Builds a synthetic page for a Letterboxd path, if the path is recognised
+def render_synthetic_page(path: str, num_pages: int) -> str | None:
+
+    for pattern, template in PAGE_ROUTES:
+        match = pattern.match(path)
+        if match:
+            page = int(match.group(1) or 1)
+            path_prefix = re.sub(r"page/\d+/?$", "", path).rstrip("/") + "/"
+
+            return render_grid_page(
+                template=template,
+                path_prefix=path_prefix,
+                page=page,
+                num_pages=num_pages,
+            )
+
+    match = FILM_ROUTE.match(path)
+    if match:
+        return render_film_page(slug=match.group(1))
+
+    return None
+
+
+# Creates the stand-in app, replaying recordings and falling back to fixtures
+def create_app(
+    latency: float = 0.05,
+    jitter: float = 0.0,
+    error_rate: float = 0.0,
+    throttle_rate: float = 0.0,
+    num_pages: int = 5,
+    recordings_dir: str = RECORDINGS_DIR,
+    record_from: str | None = None,
+    seed: int = 0,
+) -> web.Application:
+
+    rng = random.Random(seed)
+    stats = Counter()
+
+    # Downloads and saves a page from the live site
+    async def record_page(request: web.Request, recording_path: str) -> str | None:
+
+        session = request.app["upstream_session"]
+        async with session.get(record_from.rstrip("/") + request.path) as page:
+            if page.status != 200:
+                return None
+            text = await page.text()
+
+        os.makedirs(recordings_dir, exist_ok=True)
+        with open(recording_path, "w") as f:
+            f.write(text)
+
+        return text
+
+    async def handle(request: web.Request) -> web.Response:
+
+        await asyncio.sleep(latency + rng.uniform(0, jitter))
+
+        roll = rng.random()
+        if roll < throttle_rate:
+            stats[429] += 1
+            return web.Response(status=429, headers={"Retry-After": "1"})
+        if roll < throttle_rate + error_rate:
+            stats[500] += 1
+            return web.Response(status=500)
+
+        recording_path = get_recording_path(
+            path=request.path, recordings_dir=recordings_dir
+        )
+        if os.path.exists(recording_path):
+            with open(recording_path, "r") as f:
+                text = f.read()
+        elif record_from is not None:
+            text = await record_page(request=request, recording_path=recording_path)
+        else:
+            text = render_synthetic_page(path=request.path, num_pages=num_pages)
+
+        if text is None:
+            stats[404] += 1
+            return web.Response(status=404)
+
+        stats[200] += 1
+
+        return web.Response(text=text, content_type="text/html")
+
+    async def open_upstream_session(app: web.Application) -> None:
+        if record_from is not None:
+            app["upstream_session"] = aiohttp.ClientSession(headers=HEADERS)
+
+    async def close_upstream_session(app: web.Application) -> None:
+        if record_from is not None:
+            await app["upstream_session"].close()
+
+    app = web.Application()
+    app["stats"] = stats
+    app.router.add_get("/{path:.*}", handle)
+    app.on_startup.append(open_upstream_session)
+    app.on_cleanup.append(close_upstream_session)
+
+    return app
+
+
+# Starts the stand-in server in the running event loop
+async def start_fixture_server(
+    port: int, host: str = "127.0.0.1", **options
+) -> web.AppRunner:
+
+    runner = web.AppRunner(create_app(**options))
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+
+    return runner
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(
+        description="Serves recorded or synthetic Letterboxd pages. Point the "
+        "scrapers at it with LETTERBOXD_BASE_URL=http://127.0.0.1:<port>."
+    )
+
+    parser.add_argument("-p", "--port", type=int, default=8787)
+    parser.add_argument("-l", "--latency", type=float, default=0.05)
+    parser.add_argument("-j", "--jitter", type=float, default=0.0)
+    parser.add_argument("-e", "--error-rate", type=float, default=0.0)
+    parser.add_argument("-t", "--throttle-rate", type=float, default=0.0)
+    parser.add_argument("-n", "--num-pages", type=int, default=5)
+    parser.add_argument("-d", "--recordings-dir", default=RECORDINGS_DIR)
+    parser.add_argument(
+        "-r",
+        "--record-from",
+        help="Records missing pages from this site, e.g. https://letterboxd.com.",
+    )
+    parser.add_argument("-s", "--seed", type=int, default=0)
+
+    args = parser.parse_args()
+
+    web.run_app(
+        create_app(
+            latency=args.latency,
+            jitter=args.jitter,
+            error_rate=args.error_rate,
+            throttle_rate=args.throttle_rate,
+            num_pages=args.num_pages,
+            recordings_dir=args.recordings_dir,
+            record_from=args.record_from,
+            seed=args.seed,
+        ),
+        host="127.0.0.1",
+        port=args.port,
+    )
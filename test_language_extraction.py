@@ -11,6 +11,7 @@ import os
 project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), "."))
 sys.path.append(project_root)
 
+from lib.data_processing.letterboxd_client import LETTERBOXD_URL
 from lib.data_processing.scrape_movie_data import assign_languages
 
 
@@ -34,7 +35,7 @@ async def test_language_extraction(movie_url, movie_name):
     try:
         async with aiohttp.ClientSession(headers=headers) as session:
             async with session.get(
-                "https://letterboxd.com" + movie_url, timeout=60
+                LETTERBOXD_URL + movie_url, timeout=60
             ) as response:
 
                 if response.status != 200:
@@ -11,6 +11,7 @@ import os
 project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), "."))
 sys.path.append(project_root)
 
+from lib.data_processing.letterboxd_client import LETTERBOXD_URL
 from lib.data_processing.scrape_movie_data import assign_languages
 
 
@@ -37,7 +38,7 @@ async def test_parasite_language_extraction():
     try:
         async with aiohttp.ClientSession(headers=headers) as session:
             async with session.get(
-                "https://letterboxd.com" + url, timeout=60
+                LETTERBOXD_URL + url, timeout=60
             ) as response:
 
                 if response.status != 200:
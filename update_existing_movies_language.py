@@ -1,9 +1,8 @@
 #!/usr/bin/env python3
 
+import argparse
 import asyncio
 import aiohttp
-from bs4 import BeautifulSoup
-import json
 import pandas as pd
 import sys
 import os
@@ -15,96 +14,67 @@ project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), "."))
 sys.path.append(project_root)
 
 from lib.data_processing import database
+from lib.data_processing.checkpoint import JobCheckpoint
+from lib.data_processing.event_loop import run_parser
+from lib.data_processing.film_page_parsing import FILM_PAGE_TIMINGS, parse_film_page
+from lib.data_processing.letterboxd_client import (
+    CRAWL_TELEMETRY,
+    LETTERBOXD_HTTP_CACHE,
+    LETTERBOXD_RATE_LIMITER,
+    LETTERBOXD_URL,
+    create_session,
+    fetch_page,
+)
 from lib.data_processing.scrape_movie_data import assign_languages
 
-async def scrape_movie_language(movie_url: str, session: aiohttp.ClientSession) -> str:
-    """Scrape language information for a single movie"""
+async def scrape_movie_language(movie_url: str, session: aiohttp.ClientSession) -> str | None:
+    """Scrape language information for a single movie, or None if the page could not be read"""
     
     try:
-        # Add small delay to be respectful to Letterboxd's servers
-        await asyncio.sleep(0.5)
+        # Pacing is handled by the shared adaptive rate limiter
+        status, text = await fetch_page(session=session, url=LETTERBOXD_URL + movie_url)
         
-        async with session.get("https://letterboxd.com" + movie_url, timeout=60) as response:
-            
-            if response.status != 200:
-                print(f"   ❌ Failed to fetch {movie_url} - status code: {response.status}")
-                return "English"  # Default to English
-            
-            soup = BeautifulSoup(await response.text(), "html.parser")
-            script = str(soup.find("script", {"type": "application/ld+json"}))
-            script = script[52:-20]  # Trimmed to useful json data
-            
-            try:
-                webData = json.loads(script)
-            except Exception as e:
-                print(f"   ❌ Error parsing JSON for {movie_url}: {e}")
-                return "English"
-            
-            # Extract language information
-            language = "English"  # Default to English
-            
-            # First try JSON data
-            if "inLanguage" in webData:
-                if isinstance(webData["inLanguage"], list) and len(webData["inLanguage"]) > 0:
-                    language = webData["inLanguage"][0]["name"]
-                elif isinstance(webData["inLanguage"], dict):
-                    language = webData["inLanguage"]["name"]
-            
-            # If no language in JSON, try to find it in the HTML
-            if language == "English":
-                # Look for language in text-slug elements
-                language_elements = soup.find_all("a", {"class": "text-slug"})
-                
-                # First, look for "Primary Language" specifically
-                primary_language_found = False
-                for elem in language_elements:
-                    elem_text = elem.get_text().strip()
-                    # Check if this element is near a "Primary Language" label
-                    parent = elem.parent
-                    if parent:
-                        parent_text = parent.get_text()
-                        if "Primary Language" in parent_text:
-                            language = elem_text
-                            primary_language_found = True
-                            break
-                
-                # If no "Primary Language" found, look for just "Language"
-                if not primary_language_found:
-                    for elem in language_elements:
-                        elem_text = elem.get_text().strip()
-                        # Check if this element is near a "Language" label (but not "Primary Language")
-                        parent = elem.parent
-                        if parent:
-                            parent_text = parent.get_text()
-                            if "Language" in parent_text and "Primary Language" not in parent_text:
-                                language = elem_text
-                                break
-                
-                # If still not found, look for any language mentions in text-slug elements
-                if language == "English":
-                    for elem in language_elements:
-                        elem_text = elem.get_text().strip()
-                        # Check if it's a known language
-                        known_languages = [
-                            "Korean", "English", "Spanish", "French", "German", "Italian", 
-                            "Japanese", "Chinese", "Russian", "Portuguese", "Hindi", "Arabic"
-                        ]
-                        if elem_text in known_languages:
-                            language = elem_text
-                            break
-            
-            return language
+        if status != 200:
+            print(f"   ❌ Failed to fetch {movie_url} - status code: {status}")
+            return None
+        
+        # Parses in the parse pool so other fetches keep going
+        return await run_parser(parse_movie_language, movie_url, text)
             
     except Exception as e:
         print(f"   ❌ Error scraping {movie_url}: {e}")
-        return "English"
+        return None
 
-async def update_movies_language():
+def parse_movie_language(movie_url: str, text: str) -> str | None:
+    """Extract the language from a film page"""
+    
+    # The shared extractor parses every field, so other backfills can reuse the cached page
+    fields = parse_film_page(text=text)
+    if fields is None:
+        print(f"   ❌ Error parsing JSON for {movie_url}")
+        return None
+    
+    return fields["language"]
+
+async def update_movies_language(resume: bool = False, num_workers: int = 8, chunk_size: int = 200):
     """Update all existing movies in the database with language information"""
     
     print("🌍 Updating existing movies with language information")
     print("=" * 60)
     
+    checkpoint = JobCheckpoint(job="update_existing_movies_language", resume=resume)
+    
+    # Writes chunks left pending by an interrupted run
+    for batch_key, records in list(checkpoint.pending.items()):
+        try:
+            print(f"💾 Saving pending {batch_key} from the interrupted run...")
+            pending_df = pd.DataFrame(records)
+            database.update_movie_languages(pending_df, chunk_size=chunk_size)
+            checkpoint.mark_flushed(batch=batch_key)
+            checkpoint.mark_completed(keys=pending_df['movie_id'])
+        except Exception as e:
+            print(f"   ❌ Failed to save pending {batch_key}: {e}")
+    
     # Get all existing movies from database
     print("📊 Loading existing movies from database...")
     movies_df = database.get_movie_data()
@@ -119,99 +89,89 @@ async def update_movies_language():
         movies_without_language = movies_df
         print(f"   All {len(movies_without_language)} movies need language information")
     
+    # Skips movies finished by an interrupted run
+    if checkpoint.completed:
+        before_filter = len(movies_without_language)
+        movies_without_language = movies_without_language[
+            ~movies_without_language['movie_id'].astype(str).isin(checkpoint.completed)
+        ]
+        print(f"   ⏩ Skipped {before_filter - len(movies_without_language)} movies completed before the run stopped")
+    
     if len(movies_without_language) == 0:
         print("✅ All movies already have language information!")
+        checkpoint.clear()
         return
     
+    LETTERBOXD_HTTP_CACHE.enable_for_batch_job()
+    telemetry_task = CRAWL_TELEMETRY.start(job="update_existing_movies_language")
+    total_movies = len(movies_without_language)
+    movie_queue = asyncio.Queue()
+    for _, movie in movies_without_language.iterrows():
+        movie_queue.put_nowait(movie)
+    
+    counts = {"done": 0, "successful": 0, "failed": 0, "chunks": 0}
+    results = []
+    
+    # Writes only (movie_id, language) for a chunk of scraped movies
+    async def flush_results():
+        chunk = results.copy()
+        results.clear()
+        counts["chunks"] += 1
+        batch_key = checkpoint.get_batch_key(name="chunk", batch_num=counts["chunks"])
+        checkpoint.add_pending(batch=batch_key, records=chunk)
+        try:
+            with CRAWL_TELEMETRY.measure(stage="write"):
+                await asyncio.to_thread(database.update_movie_languages, pd.DataFrame(chunk), chunk_size)
+            checkpoint.mark_flushed(batch=batch_key)
+            checkpoint.mark_completed(keys=[record['movie_id'] for record in chunk])
+            print(f"   💾 Updated {len(chunk)} movies in database")
+        except Exception as e:
+            print(f"   ❌ Error updating database: {e}")
+            counts["failed"] += len(chunk)
+            counts["successful"] -= len(chunk)
+    
+    # Scrapes movies off the shared queue; the rate limiter paces all workers together
+    async def language_worker(session: aiohttp.ClientSession):
+        while True:
+            try:
+                movie = movie_queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            
+            title = str(movie['title'])
+            language = await scrape_movie_language(movie['url'], session)
+            counts["done"] += 1
+            if language is None:
+                print(f"   ❌ {title[:40]}{'...' if len(title) > 40 else ''}: no language found")
+                counts["failed"] += 1
+            else:
+                language_code = assign_languages(language)
+                print(f"   ✅ {title[:40]}{'...' if len(title) > 40 else ''}: {language} (Code: {language_code})")
+                counts["successful"] += 1
+                results.append({'movie_id': str(movie['movie_id']), 'language': language_code})
+                if len(results) >= chunk_size:
+                    await flush_results()
+            
+            if counts["done"] % chunk_size == 0:
+                progress = (counts["done"] / total_movies) * 100
+                print(f"   📈 Progress: {progress:.1f}% ({counts['done']}/{total_movies})")
+    
     # Set up HTTP session
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
-        "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
-        "Accept-Language": "en-US,en;q=0.5",
-        "Accept-Encoding": "gzip, deflate",
-        "DNT": "1",
-        "Connection": "keep-alive",
-        "Upgrade-Insecure-Requests": "1",
-    }
-    
-    connector = aiohttp.TCPConnector(limit=5, limit_per_host=2)
-    timeout = aiohttp.ClientTimeout(total=60, connect=10)
-    
-    async with aiohttp.ClientSession(headers=headers, connector=connector, timeout=timeout) as session:
-        
-        # Process movies in batches
-        batch_size = 50
-        total_movies = len(movies_without_language)
-        successful_updates = 0
-        failed_updates = 0
+    async with create_session() as session:
         
         print(f"\n🚀 Starting language extraction for {total_movies} movies...")
-        print(f"   Batch size: {batch_size}")
-        print(f"   Estimated time: {total_movies * 0.5 / 60:.1f} minutes")
+        print(f"   Workers: {num_workers}, write chunk size: {chunk_size}")
+        print(f"   Estimated time: {total_movies / LETTERBOXD_RATE_LIMITER.rate / 60:.1f} minutes")
         
-        for i in range(0, total_movies, batch_size):
-            batch = movies_without_language.iloc[i:i+batch_size]
-            batch_num = (i // batch_size) + 1
-            total_batches = (total_movies + batch_size - 1) // batch_size
-            
-            print(f"\n📦 Processing batch {batch_num}/{total_batches} ({len(batch)} movies)...")
-            
-            # Create tasks for this batch
-            tasks = []
-            for _, movie in batch.iterrows():
-                task = scrape_movie_language(movie['url'], session)
-                tasks.append((movie['movie_id'], movie['title'], task))
-            
-            # Execute tasks
-            batch_results = []
-            for movie_id, title, task in tasks:
-                try:
-                    language = await task
-                    language_code = assign_languages(language)
-                    batch_results.append({
-                        'movie_id': movie_id,
-                        'language': language,
-                        'language_code': language_code
-                    })
-                    print(f"   ✅ {title[:40]}{'...' if len(title) > 40 else ''}: {language} (Code: {language_code})")
-                    successful_updates += 1
-                except Exception as e:
-                    print(f"   ❌ {title[:40]}{'...' if len(title) > 40 else ''}: Error - {e}")
-                    failed_updates += 1
-            
-            # Update database with batch results
-            if batch_results:
-                try:
-                    # Create DataFrame for batch update
-                    batch_df = pd.DataFrame(batch_results)
-                    
-                    # Get the full movie data for these movies
-                    batch_movies = movies_df[movies_df['movie_id'].isin(batch_df['movie_id'])]
-                    
-                    # Update the language column
-                    for _, row in batch_df.iterrows():
-                        movie_idx = batch_movies[batch_movies['movie_id'] == row['movie_id']].index[0]
-                        movies_df.loc[movie_idx, 'language'] = row['language_code']
-                    
-                    print(f"   💾 Updated {len(batch_results)} movies in database")
-                    
-                except Exception as e:
-                    print(f"   ❌ Error updating database: {e}")
-                    failed_updates += len(batch_results)
-                    successful_updates -= len(batch_results)
-            
-            # Progress update
-            progress = ((i + len(batch)) / total_movies) * 100
-            print(f"   📈 Progress: {progress:.1f}% ({i + len(batch)}/{total_movies})")
+        try:
+            await asyncio.gather(*[language_worker(session) for _ in range(num_workers)])
+        finally:
+            # Saves what was scraped even if the run stops early
+            if results:
+                await flush_results()
     
-    # Final database update
-    print(f"\n💾 Final database update...")
-    try:
-        # Update the database with all the language information
-        database.update_movie_data(movies_df)
-        print(f"   ✅ Successfully updated database with language information")
-    except Exception as e:
-        print(f"   ❌ Error in final database update: {e}")
+    successful_updates = counts["successful"]
+    failed_updates = counts["failed"]
     
     print(f"\n🎯 UPDATE COMPLETE!")
     print(f"═══════════════════════════════════════")
@@ -221,7 +181,47 @@ async def update_movies_language():
     if successful_updates > 0:
         success_rate = (successful_updates / total_movies) * 100
         print(f"📈 Success rate: {success_rate:.1f}%")
+    LETTERBOXD_HTTP_CACHE.report(job="update_existing_movies_language")
+    FILM_PAGE_TIMINGS.report(job="update_existing_movies_language")
+    CRAWL_TELEMETRY.finish(job="update_existing_movies_language", task=telemetry_task)
     print(f"═══════════════════════════════════════")
+    
+    # Keeps the checkpoint until every chunk has been saved
+    if not checkpoint.pending:
+        checkpoint.clear()
+    else:
+        print(f"🔁 Rerun with --resume to retry unsaved chunks")
 
 if __name__ == "__main__":
-    asyncio.run(update_movies_language())
+    
+    parser = argparse.ArgumentParser()
+    
+    # Resume an interrupted run
+    parser.add_argument(
+        "-r",
+        "--resume",
+        help="Resumes from the checkpoint of an interrupted run.",
+        action="store_true",
+    )
+    
+    # Number of concurrent scrapers
+    parser.add_argument(
+        "-w",
+        "--workers",
+        type=int,
+        default=8,
+        help="Number of concurrent scrape workers.",
+    )
+    
+    # Movies per database write
+    parser.add_argument(
+        "-b",
+        "--chunk-size",
+        type=int,
+        default=200,
+        help="Writes languages every n scraped movies.",
+    )
+    
+    args = parser.parse_args()
+    
+    asyncio.run(update_movies_language(resume=args.resume, num_workers=args.workers, chunk_size=args.chunk_size))